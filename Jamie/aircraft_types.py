@@ -0,0 +1,293 @@
+"""
+One ICAO aircraft type table merged from the four copies in the package:
+TopSky, MAESTRO and GroundRadar ICAO_Aircraft.json and the EuroScope
+FASA/ICAO/ICAO_Aircraft.txt. A type takes each field from the first source
+in SOURCES that has it, so later sources only fill gaps and add types the
+earlier ones lack.
+
+The merged table is compiled into a fixed-width record array sorted by type
+designator and cached next to the EuroScope file. The cache is memory-mapped
+and invalidated when any source's mtime or size changes. Tools that load it
+share its pages, and repeated loads in one process return the same table
+after only checking the source stamps.
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+FASA_DIR = "FASA"
+
+# Highest precedence first
+SOURCES = (
+    os.path.join("Plugins", "TopSky", "ICAO_Aircraft.json"),
+    os.path.join("Plugins", "MAESTRO", "ICAO_Aircraft.json"),
+    os.path.join("Plugins", "GroundRadar", "ICAO_Aircraft.json"),
+    os.path.join("ICAO", "ICAO_Aircraft.txt"),
+)
+CACHE_FILE = os.path.join("ICAO", "ICAO_Aircraft.types")
+
+# Table fields and the ICAO_Aircraft.json keys they come from
+TEXT_FIELDS = {
+    'icao': 'ICAO',
+    'description': 'Description',
+    'wtc': 'WTC',
+    'wtg': 'WTG',
+    'recat': 'RECAT-EU',
+    'use': 'Use',
+    'iata': 'IATA',
+    'iata_cargo': 'IATA_cargo',
+    'manufacturer': 'Manufacturer',
+    'model': 'Model',
+}
+NUMBER_FIELDS = {
+    'wingspan': 'Wingspan',
+    'length': 'Length',
+    'height': 'Height',
+    'mtow': 'MTOW',
+}
+
+TYPES_MAGIC = b'ACFTTYP1'
+TYPES_HEADER = struct.Struct('<8sII')
+TYPES_ALIGNMENT = 16
+
+_loaded = {}
+
+
+def source_stamps(fasa_dir=FASA_DIR):
+    """(mtime_ns, size) of every source, None for missing ones"""
+    stamps = []
+    for source in SOURCES:
+        try:
+            stat = os.stat(os.path.join(fasa_dir, source))
+            stamps.append([stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            stamps.append(None)
+    return stamps
+
+
+def read_json_source(path):
+    """icao -> fields of one ICAO_Aircraft.json"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        entries = json.load(f)
+    types = {}
+    for entry in entries:
+        fields = {field: entry[key] for field, key in TEXT_FIELDS.items() if entry.get(key) not in (None, '')}
+        fields.update({field: float(entry[key]) for field, key in NUMBER_FIELDS.items()
+                       if entry.get(key) is not None})
+        if 'icao' in fields:
+            types[fields['icao'].upper()] = fields
+    return types
+
+
+def read_txt_source(path):
+    """
+    icao -> fields of the EuroScope ICAO_Aircraft.txt, whose lines are
+    ICAO, WTC followed by the description (ML2J), manufacturer and model
+    """
+    types = {}
+    with open(path, 'r', encoding='latin-1') as f:
+        for line in f:
+            if line.startswith(';'):
+                continue
+            parts = line.rstrip('\r\n').split('\t')
+            if len(parts) < 4 or not parts[0]:
+                continue
+            fields = {'icao': parts[0].upper(), 'manufacturer': parts[2], 'model': parts[3]}
+            if parts[1][:1] not in ('', '-'):
+                fields['wtc'] = parts[1][0]
+            if parts[1][1:] and '-' not in parts[1][1:]:
+                fields['description'] = parts[1][1:]
+            types[fields['icao']] = {field: value for field, value in fields.items() if value}
+    return types
+
+
+def merge_sources(fasa_dir=FASA_DIR):
+    """icao -> merged fields, each from the highest-precedence source that has it, plus its first source"""
+    merged = {}
+    for number, source in enumerate(SOURCES):
+        path = os.path.join(fasa_dir, source)
+        if not os.path.exists(path):
+            continue
+        types = read_json_source(path) if path.endswith('.json') else read_txt_source(path)
+        for icao, fields in types.items():
+            entry = merged.setdefault(icao, {'source': number})
+            for field, value in fields.items():
+                entry.setdefault(field, value)
+    return merged
+
+
+def compile_table(merged):
+    """Record array of merged types sorted by designator, text fields as UTF-8 sized to their longest value"""
+    icaos = sorted(merged)
+    encoded = {field: [merged[icao].get(field, '').encode('utf-8') for icao in icaos] for field in TEXT_FIELDS}
+    dtype = ([(field, f'S{max([len(value) for value in values] + [1])}') for field, values in encoded.items()]
+             + [(field, '<f8') for field in NUMBER_FIELDS] + [('source', 'i1')])
+    table = np.zeros(len(icaos), dtype=dtype)
+    for field, values in encoded.items():
+        table[field] = values
+    for field in NUMBER_FIELDS:
+        table[field] = [merged[icao].get(field, np.nan) for icao in icaos]
+    table['source'] = [merged[icao]['source'] for icao in icaos]
+    return table
+
+
+def save_table(path, table, stamps):
+    """Write the header, stamps and dtype, then the records aligned for memory-mapping"""
+    meta = json.dumps({'stamps': stamps, 'dtype': table.dtype.descr}).encode('utf-8')
+    offset = -(-(TYPES_HEADER.size + len(meta)) // TYPES_ALIGNMENT) * TYPES_ALIGNMENT
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as f:
+            f.write(TYPES_HEADER.pack(TYPES_MAGIC, len(table), len(meta)))
+            f.write(meta.ljust(offset - TYPES_HEADER.size, b' '))
+            f.write(table.tobytes())
+        os.replace(temporary, path)
+    except OSError:
+        # Read-only packages just recompile on every cold load
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def load_table(path, stamps):
+    """Memory-mapped records of a cache file, None when missing, stale or unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            magic, count, meta_size = TYPES_HEADER.unpack(f.read(TYPES_HEADER.size))
+            if magic != TYPES_MAGIC:
+                return None
+            meta = json.loads(f.read(meta_size))
+        if meta['stamps'] != stamps:
+            return None
+        dtype = np.dtype([tuple(field) for field in meta['dtype']])
+        offset = -(-(TYPES_HEADER.size + meta_size) // TYPES_ALIGNMENT) * TYPES_ALIGNMENT
+        if not count:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+    except (OSError, struct.error, ValueError, KeyError, TypeError):
+        return None
+
+
+class AircraftTypes:
+    """Merged ICAO aircraft types, looked up by designator"""
+
+    def __init__(self, table):
+        self.table = table
+        self.icaos = table['icao']
+        self.width = table.dtype['icao'].itemsize
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, icao):
+        return self.index(icao) >= 0
+
+    def index(self, icao):
+        """Row of one designator, -1 when unknown"""
+        key = icao.upper().encode('utf-8')
+        if len(key) > self.width:
+            return -1
+        position = int(np.searchsorted(self.icaos, key))
+        if position < len(self.icaos) and self.icaos[position] == key:
+            return position
+        return -1
+
+    def indices(self, icaos):
+        """Rows of an array of designators, -1 for unknown ones"""
+        distinct, inverse = np.unique(np.asarray(icaos, dtype=str), return_inverse=True)
+        if not len(self.icaos) or not len(distinct):
+            return np.full(len(inverse), -1, dtype=np.int64)
+        distinct = np.char.upper(distinct)
+        keys = np.char.encode(distinct, 'utf-8').astype(self.icaos.dtype)
+        positions = np.minimum(np.searchsorted(self.icaos, keys), len(self.icaos) - 1)
+        found = (self.icaos[positions] == keys) & (np.char.str_len(distinct) <= self.width)
+        return np.where(found, positions, -1)[inverse]
+
+    def row(self, position):
+        """Fields of one row as a dict; missing text is '' and missing numbers NaN"""
+        record = self.table[position]
+        fields = {field: record[field].decode('utf-8') for field in TEXT_FIELDS}
+        fields.update({field: float(record[field]) for field in NUMBER_FIELDS})
+        fields['source'] = SOURCES[record['source']]
+        return fields
+
+    def get(self, icao):
+        """Fields of one designator, or None"""
+        position = self.index(icao)
+        return self.row(position) if position >= 0 else None
+
+    def column(self, field):
+        """One field for every type, text decoded to str"""
+        values = self.table[field]
+        return np.char.decode(values, 'utf-8') if field in TEXT_FIELDS else np.asarray(values)
+
+
+def load_aircraft_types(fasa_dir=FASA_DIR, cache=True):
+    """
+    AircraftTypes of a package, compiled on the first load after any source
+    changes. Later loads in the same process return the same object.
+    """
+    path = os.path.join(fasa_dir, CACHE_FILE)
+    stamps = source_stamps(fasa_dir)
+    key = os.path.abspath(path)
+    if cache and key in _loaded and _loaded[key][0] == stamps:
+        return _loaded[key][1]
+
+    table = load_table(path, stamps) if cache else None
+    if table is None:
+        table = compile_table(merge_sources(fasa_dir))
+        if cache:
+            save_table(path, table, stamps)
+            table = load_table(path, stamps)
+            if table is None:
+                table = compile_table(merge_sources(fasa_dir))
+    types = AircraftTypes(table)
+    if cache:
+        _loaded[key] = (stamps, types)
+    return types
+
+
+def main():
+    """
+    Time cold, compiled and warm loads of the merged aircraft types
+    Usage: python aircraft_types.py [ICAO type]
+    """
+    icao = sys.argv[1] if len(sys.argv) > 1 else "B738"
+
+    started = time.perf_counter()
+    compiled = load_aircraft_types(cache=False)
+    print(f"🛠️ {len(compiled)} types merged from {len(SOURCES)} sources in "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+    for number, source in enumerate(SOURCES):
+        print(f"   {source}: first source of {np.count_nonzero(compiled.table['source'] == number)} types")
+
+    load_aircraft_types()
+    _loaded.clear()
+    started = time.perf_counter()
+    types = load_aircraft_types()
+    print(f"💾 Cached table mapped in {(time.perf_counter() - started) * 1000:.3f} ms")
+
+    repeat = 10000
+    started = time.perf_counter()
+    for _ in range(repeat):
+        load_aircraft_types()
+    print(f"⚡ Warm load: {(time.perf_counter() - started) / repeat * 1e6:.1f} µs")
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        types.get(icao)
+    print(f"✈️ {icao}: {types.get(icao)}")
+    print(f"   Lookup: {(time.perf_counter() - started) / repeat * 1e6:.1f} µs")
+
+    codes = np.random.default_rng(0).choice(types.column('icao'), 100000)
+    started = time.perf_counter()
+    types.indices(codes)
+    print(f"🔢 {len(codes)} designators indexed in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
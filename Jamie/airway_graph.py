@@ -0,0 +1,613 @@
+"""
+Airway graph engine
+Builds a directed graph of the route network from the sector file's
+[HIGH AIRWAY]/[LOW AIRWAY] segments (nav_data/airways.txt) and the .ese
+SID/STAR route strings. Adjacency is held in CSR form (edge start offsets per
+node, neighbour ids, precomputed segment lengths in NM and airway ids), with
+shortest-path and route-expansion queries on top for batch route validation.
+"""
+
+import heapq
+import math
+import os
+import sys
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from coordinates import parse_coordinate
+from geodesy import EARTH_RADIUS_NM, great_circle_nm_array
+from spatial_index import GeoGrid
+
+# Coordinate endpoints within this distance of a named point become that point
+SNAP_DISTANCE_NM = 0.05
+
+# Tokens of a route string that only separate points
+DIRECT_TOKENS = ('DCT',)
+
+# Airway kinds of .ese procedures, keyed by (airport, runway, name) rather than name
+PROCEDURE_KINDS = ('SID', 'STAR')
+
+Path = namedtuple('Path', ['nodes', 'edges', 'distance'])
+ExpandedRoute = namedtuple('ExpandedRoute', ['route', 'points', 'distance', 'errors'])
+
+
+class NavPoints:
+    """Every named point (fixes, VORs, NDBs, airports) with an ident lookup"""
+
+    def __init__(self, nav_data):
+        idents = []
+        lats = []
+        lons = []
+        for table, field in (('fixes', 'ident'), ('vors', 'ident'), ('ndbs', 'ident'), ('airports', 'icao')):
+            if table not in nav_data:
+                continue
+            idents.extend(nav_data[table].text(field))
+            lats.append(nav_data[table].columns['lat'])
+            lons.append(nav_data[table].columns['lon'])
+        self.idents = idents
+        self.lats = np.concatenate(lats) if lats else np.zeros(0)
+        self.lons = np.concatenate(lons) if lons else np.zeros(0)
+        self.by_ident = {}
+        for point, ident in enumerate(idents):
+            if not np.isnan(self.lats[point]):
+                self.by_ident.setdefault(ident, []).append(point)
+        self._grid = None
+
+    def candidates(self, ident):
+        return self.by_ident.get(ident, [])
+
+    def resolve(self, ident, near=None):
+        """
+        Point index for an ident, or None. Idents used by several points
+        (duplicate fix names, NDBs sharing a VOR ident) resolve to the one
+        closest to near=(lat, lon) when given, else the first.
+        """
+        points = self.by_ident.get(ident)
+        if not points:
+            return None
+        if len(points) == 1 or near is None:
+            return points[0]
+        distances = great_circle_nm_array(near[0], near[1], self.lats[points], self.lons[points])
+        return points[int(np.argmin(distances))]
+
+    def snap(self, lat, lon):
+        """Named point at a coordinate (within SNAP_DISTANCE_NM), or None"""
+        if self._grid is None:
+            self._grid = GeoGrid(self.lats, self.lons, cell_size=0.5)
+        points, _ = self._grid.radius(lat, lon, SNAP_DISTANCE_NM)
+        return int(points[0]) if len(points) else None
+
+
+class AirwayGraphBuilder:
+    """Collects nodes and segments, then packs them into an AirwayGraph"""
+
+    def __init__(self, points):
+        self.points = points
+        self.node_ids = {}
+        self.names = []
+        self.lats = []
+        self.lons = []
+        self.airway_ids = {}
+        self.airway_keys = []
+        self.airway_names = []
+        self.airway_kinds = []
+        self.sources = []
+        self.targets = []
+        self.edge_airways = []
+        self.unresolved = set()
+
+    def _node(self, key, name, lat, lon):
+        node = self.node_ids.get(key)
+        if node is None:
+            node = len(self.names)
+            self.node_ids[key] = node
+            self.names.append(name)
+            self.lats.append(lat)
+            self.lons.append(lon)
+        return node
+
+    def point_node(self, point):
+        points = self.points
+        return self._node(('P', point), points.idents[point], float(points.lats[point]), float(points.lons[point]))
+
+    def endpoint(self, lat_text, lon_text, near=None):
+        """
+        Node for a segment endpoint given either as a DMS coordinate pair or,
+        as sector files also allow, as a point name repeated in both columns.
+        """
+        lat = parse_coordinate(lat_text)
+        lon = parse_coordinate(lon_text)
+        if lat is not None and lon is not None:
+            point = self.points.snap(lat, lon)
+            if point is not None:
+                return self.point_node(point)
+            return self._node(('C', round(lat, 6), round(lon, 6)), f"{lat_text}/{lon_text}", lat, lon)
+        point = self.points.resolve(lat_text, near)
+        if point is None:
+            self.unresolved.add(lat_text)
+            return None
+        return self.point_node(point)
+
+    def airway(self, key, name, kind):
+        airway = self.airway_ids.get(key)
+        if airway is None:
+            airway = len(self.airway_names)
+            self.airway_ids[key] = airway
+            self.airway_keys.append(key)
+            self.airway_names.append(name)
+            self.airway_kinds.append(kind)
+        return airway
+
+    def add_edge(self, source, target, airway, both_ways=True):
+        if source is None or target is None or source == target:
+            return
+        self.sources.append(source)
+        self.targets.append(target)
+        self.edge_airways.append(airway)
+        if both_ways:
+            self.sources.append(target)
+            self.targets.append(source)
+            self.edge_airways.append(airway)
+
+    def add_segment(self, airway_name, level, start_lat, start_lon, end_lat, end_lon):
+        """One airway segment; airways can be flown in both directions"""
+        airway = self.airway(airway_name, airway_name, level)
+        start = self.endpoint(start_lat, start_lon)
+        near = (self.lats[start], self.lons[start]) if start is not None else None
+        end = self.endpoint(end_lat, end_lon, near)
+        self.add_edge(start, end, airway)
+
+    def add_procedure(self, route):
+        """
+        A SID or STAR from the .ese: directed edges from the airport through
+        its fixes (SID) or through its fixes to the airport (STAR).
+        Fixes missing from the nav data are skipped. Procedures sharing a name
+        across runways or airports stay separate.
+        """
+        airway = self.airway((route.airport, route.runway, route.name), route.name, route.kind)
+        airport = self.points.resolve(route.airport)
+        sequence = []
+        near = None
+        if airport is not None:
+            near = (float(self.points.lats[airport]), float(self.points.lons[airport]))
+        for ident in route.fixes:
+            point = self.points.resolve(ident, near)
+            if point is None:
+                self.unresolved.add(ident)
+                continue
+            sequence.append(self.point_node(point))
+            near = (float(self.points.lats[point]), float(self.points.lons[point]))
+        if airport is not None:
+            if route.kind == 'SID':
+                sequence.insert(0, self.point_node(airport))
+            else:
+                sequence.append(self.point_node(airport))
+        for source, target in zip(sequence, sequence[1:]):
+            self.add_edge(source, target, airway, both_ways=False)
+
+    def build(self):
+        return AirwayGraph(self.names, self.lats, self.lons, self.sources, self.targets,
+                           self.edge_airways, self.airway_names, self.airway_kinds, self.unresolved,
+                           self.airway_keys)
+
+
+class AirwayGraph:
+    """CSR adjacency over airway and procedure segments"""
+
+    def __init__(self, names, lats, lons, sources, targets, edge_airways, airway_names, airway_kinds,
+                 unresolved=(), airway_keys=None):
+        self.names = list(names)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.airway_names = list(airway_names)
+        self.airway_kinds = list(airway_kinds)
+        # Airways by name, SIDs/STARs by (airport, runway, name) and by name for route strings
+        self.airway_ids = {}
+        self.procedure_ids = {}
+        self.procedure_names = {}
+        for airway, key in enumerate(self.airway_names if airway_keys is None else airway_keys):
+            if self.airway_kinds[airway] in PROCEDURE_KINDS:
+                self.procedure_ids[key] = airway
+                self.procedure_names.setdefault(self.airway_names[airway], []).append(airway)
+            else:
+                self.airway_ids[key] = airway
+        self.unresolved = sorted(unresolved)
+
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        edge_airways = np.asarray(edge_airways, dtype=np.int32)
+
+        # Drop repeated segments, then sort by source so each node's edges are contiguous
+        if len(sources):
+            keys = np.unique(np.stack([sources, targets, edge_airways], axis=1), axis=0)
+            sources, targets, edge_airways = keys[:, 0], keys[:, 1], keys[:, 2]
+
+        # CSR layout: edges of node n are indptr[n]:indptr[n + 1]
+        counts = np.bincount(sources, minlength=len(self.names))
+        self.indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.sources = sources.astype(np.int32)
+        self.indices = targets.astype(np.int32)
+        self.airways = edge_airways.astype(np.int32)
+        self.lengths = great_circle_nm_array(self.lats[self.sources], self.lons[self.sources],
+                                    self.lats[self.indices], self.lons[self.indices])
+
+        self.node_ids = {}
+        for node, name in enumerate(self.names):
+            self.node_ids.setdefault(name, []).append(node)
+        self._segment_cache = {}
+        self._adjacency = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    def nbytes(self):
+        """Memory held by the CSR arrays"""
+        return sum(values.nbytes for values in (self.indptr, self.sources, self.indices, self.airways,
+                                                self.lengths, self.lats, self.lons))
+
+    def _python_adjacency(self):
+        """Per-node (target, length, edge) lists, converted once for the search loops"""
+        if self._adjacency is None:
+            indptr = self.indptr.tolist()
+            targets = self.indices.tolist()
+            lengths = self.lengths.tolist()
+            self._adjacency = [
+                [(targets[edge], lengths[edge], edge) for edge in range(indptr[node], indptr[node + 1])]
+                for node in range(len(self.names))
+            ]
+        return self._adjacency
+
+    def node(self, ident, near=None):
+        """Node id for a point ident (closest to near=(lat, lon) if repeated), or None"""
+        nodes = self.node_ids.get(ident)
+        if not nodes:
+            return None
+        if len(nodes) == 1 or near is None:
+            return nodes[0]
+        distances = great_circle_nm_array(near[0], near[1], self.lats[nodes], self.lons[nodes])
+        return nodes[int(np.argmin(distances))]
+
+    def shortest_path(self, origin, destination):
+        """
+        A* search between two node ids (or idents) using great-circle
+        distance as the heuristic. Returns a Path or None if unreachable.
+        """
+        if isinstance(origin, str):
+            origin = self.node(origin)
+        if isinstance(destination, str):
+            destination = self.node(destination)
+        if origin is None or destination is None:
+            return None
+
+        adjacency = self._python_adjacency()
+        lats = np.radians(self.lats).tolist()
+        lons = np.radians(self.lons).tolist()
+        goal_lat = lats[destination]
+        goal_lon = lons[destination]
+        cos_goal = math.cos(goal_lat)
+
+        def heuristic(node):
+            dlat = lats[node] - goal_lat
+            dlon = lons[node] - goal_lon
+            a = math.sin(dlat / 2) ** 2 + math.cos(lats[node]) * cos_goal * math.sin(dlon / 2) ** 2
+            return 2 * EARTH_RADIUS_NM * math.asin(math.sqrt(min(a, 1.0)))
+
+        best = {origin: 0.0}
+        came_from = {}
+        queue = [(heuristic(origin), 0.0, origin)]
+        while queue:
+            _, distance, node = heapq.heappop(queue)
+            if node == destination:
+                break
+            if distance > best[node]:
+                continue
+            for target, length, edge in adjacency[node]:
+                candidate = distance + length
+                if candidate < best.get(target, math.inf):
+                    best[target] = candidate
+                    came_from[target] = (node, edge)
+                    heapq.heappush(queue, (candidate + heuristic(target), candidate, target))
+        else:
+            return None
+
+        nodes = [destination]
+        edges = []
+        while nodes[-1] != origin:
+            node, edge = came_from[nodes[-1]]
+            nodes.append(node)
+            edges.append(edge)
+        nodes.reverse()
+        edges.reverse()
+        return Path(nodes, edges, best[destination])
+
+    def format_path(self, path):
+        """Route string for a Path, e.g. 'DUSLI Q24 ETOSA DCT GBV'"""
+        if not path.nodes:
+            return ''
+        tokens = [self.names[path.nodes[0]]]
+        for i, edge in enumerate(path.edges):
+            airway = self.airway_names[self.airways[edge]]
+            following = self.airways[path.edges[i + 1]] if i + 1 < len(path.edges) else None
+            if following != self.airways[edge]:
+                tokens.append(airway)
+                tokens.append(self.names[path.nodes[i + 1]])
+        return ' '.join(tokens)
+
+    def along_airway(self, airway, start, end):
+        """
+        Nodes from start to end following only edges of one airway
+        (breadth-first, cached per segment), or None if they are not joined.
+        """
+        key = (airway, start, end)
+        if key in self._segment_cache:
+            return self._segment_cache[key]
+        adjacency = self._python_adjacency()
+        airways = self.airways
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if node == end:
+                break
+            for target, _, edge in adjacency[node]:
+                if airways[edge] == airway and target not in previous:
+                    previous[target] = node
+                    queue.append(target)
+        nodes = None
+        if end in previous:
+            nodes = [end]
+            while nodes[-1] != start:
+                nodes.append(previous[nodes[-1]])
+            nodes.reverse()
+        self._segment_cache[key] = nodes
+        return nodes
+
+    def route_airways(self, token):
+        """Airways and SIDs/STARs a route string token may name, empty for a point"""
+        airway = self.airway_ids.get(token)
+        return ([] if airway is None else [airway]) + self.procedure_names.get(token, [])
+
+    def along_any(self, airways, start, end):
+        """along_airway over the first of several airways that joins start to end"""
+        for airway in airways:
+            nodes = self.along_airway(airway, start, end)
+            if nodes is not None:
+                return nodes
+        return None
+
+    def airway_nodes(self, airway):
+        """Node ids on an airway (by id or name)"""
+        if isinstance(airway, str):
+            airway = self.airway_ids[airway]
+        edges = np.flatnonzero(self.airways == airway)
+        return np.unique(np.concatenate([self.sources[edges], self.indices[edges]]))
+
+    def airway_terminals(self, airway, exits=False):
+        """
+        Nodes where an airway starts, or with exits where it ends: for a
+        directed procedure the nodes with no incoming (outgoing) edge of it,
+        for an airway its one-neighbour ends.
+        """
+        edges = np.flatnonzero(self.airways == airway)
+        sources = self.sources[edges]
+        targets = self.indices[edges]
+        incoming = np.bincount(targets, minlength=len(self.names))
+        outgoing = np.bincount(sources, minlength=len(self.names))
+        nodes = self.airway_nodes(airway)
+        starts = nodes[(outgoing if exits else incoming)[nodes] == 0]
+        if len(starts):
+            return starts.tolist()
+        return nodes[(outgoing[nodes] == 1) & (incoming[nodes] == 1)].tolist()
+
+    def airway_fixes(self, airway):
+        """
+        Idents of an airway in flying order, walked from its westernmost
+        end; disconnected pieces follow one another west to east.
+        """
+        if isinstance(airway, str):
+            airway = self.airway_ids[airway]
+        adjacency = self._python_adjacency()
+        airways = self.airways
+        remaining = set(self.airway_nodes(airway).tolist())
+        ends = set(self.airway_terminals(airway))
+        ordered = []
+        while remaining:
+            pool = [node for node in remaining if node in ends] or list(remaining)
+            node = min(pool, key=lambda n: self.lons[n])
+            while node is not None:
+                ordered.append(node)
+                remaining.discard(node)
+                following = None
+                for target, _, edge in adjacency[node]:
+                    if airways[edge] == airway and target in remaining:
+                        following = target
+                        break
+                node = following
+        return [self.names[node] for node in ordered]
+
+    def expand_route(self, route):
+        """
+        Expand a route string such as 'DUSLI Q24 ETOSA DCT GBV' into points.
+        Airway and SID/STAR tokens are expanded along the graph between the
+        points either side of them. A leading one is entered at its only
+        start, or at the only end from which it reaches the next point; a
+        trailing one is left at the only end it reaches other than the
+        previous point, so 'Q24 BBB' and 'AAA Q24' work when BBB and AAA
+        are ends of Q24. A name shared by several SIDs/STARs or an airway
+        follows whichever of them joins its neighbouring points. Speed/level
+        suffixes ('/N0450F350') are ignored. Returns an ExpandedRoute of (ident, lat, lon) points,
+        the total great-circle distance in NM and a list of error strings.
+        """
+        tokens = [token.split('/')[0] for token in route.split()]
+        tokens = [token for token in tokens if token]
+        nodes = []
+        errors = []
+        pending_airway = None
+
+        for token in tokens:
+            if token in DIRECT_TOKENS:
+                continue
+            airways = self.route_airways(token)
+            if airways and pending_airway is None:
+                if nodes:
+                    pending_airway = (token, airways)
+                    continue
+                # Leading airway or SID: enter it at its only start, else
+                # wait for the next point to pick the end it is entered at
+                starts = sorted({start for airway in airways for start in self.airway_terminals(airway)})
+                if len(starts) == 1:
+                    nodes.append(starts[0])
+                    pending_airway = (token, airways)
+                elif starts:
+                    pending_airway = (token, airways)
+                else:
+                    errors.append(f"{token} has no entry point")
+                continue
+
+            near = (self.lats[nodes[-1]], self.lons[nodes[-1]]) if nodes else None
+            node = self.node(token, near)
+            if node is None:
+                if airways:
+                    errors.append(f"{token} follows airway {pending_airway[0]} without an exit point")
+                else:
+                    errors.append(f"unknown point or airway {token}")
+                pending_airway = None
+                continue
+
+            if pending_airway is not None and not nodes:
+                name, airways = pending_airway
+                pending_airway = None
+                starts = sorted({start for airway in airways for start in self.airway_terminals(airway)
+                                 if start != node and self.along_airway(airway, start, node)})
+                if len(starts) == 1:
+                    nodes.extend(self.along_any(airways, starts[0], node))
+                else:
+                    errors.append(f"{name} has no entry point")
+                    nodes.append(node)
+            elif pending_airway is not None:
+                name, airways = pending_airway
+                pending_airway = None
+                segment = self.along_any(airways, nodes[-1], node)
+                if segment is None:
+                    errors.append(f"{self.names[node]} is not on {name} after {self.names[nodes[-1]]}")
+                    nodes.append(node)
+                else:
+                    nodes.extend(segment[1:])
+            elif not nodes or nodes[-1] != node:
+                nodes.append(node)
+
+        if pending_airway is not None and not nodes:
+            errors.append(f"{pending_airway[0]} has no entry point")
+        elif pending_airway is not None:
+            # Trailing airway or STAR: leave it at its only end other than the last point
+            name, airways = pending_airway
+            ends = sorted({node for airway in airways for node in self.airway_terminals(airway, exits=True)
+                           if node != nodes[-1] and self.along_airway(airway, nodes[-1], node)})
+            if len(ends) == 1:
+                nodes.extend(self.along_any(airways, nodes[-1], ends[0])[1:])
+            else:
+                errors.append(f"{name} has no exit point")
+
+        points = [(self.names[node], float(self.lats[node]), float(self.lons[node])) for node in nodes]
+        distance = 0.0
+        if len(nodes) > 1:
+            distance = float(great_circle_nm_array(self.lats[nodes[:-1]], self.lons[nodes[:-1]],
+                                          self.lats[nodes[1:]], self.lons[nodes[1:]]).sum())
+        return ExpandedRoute(route, points, distance, errors)
+
+    def validate_routes(self, routes):
+        """Expand many route strings; returns a list of ExpandedRoute, errors empty when valid"""
+        return [self.expand_route(route) for route in routes]
+
+
+def read_airway_segments(filename):
+    """
+    Read nav_data/airways.txt.
+    Format: Airway,Level,Lat1,Lon1,Lat2,Lon2 where an endpoint is a DMS
+    coordinate pair or a point name repeated in both columns.
+    """
+    segments = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        next(f, None)
+        for line in f:
+            parts = line.strip().split(',')
+            if len(parts) >= 6:
+                segments.append(tuple(parts[:6]))
+    return segments
+
+
+def build_airway_graph(nav_data, segments=(), routes=()):
+    """
+    Airway graph from nav data points, airway segments as
+    (airway, level, lat1, lon1, lat2, lon2) tuples and .ese SID/STAR routes.
+    """
+    builder = AirwayGraphBuilder(NavPoints(nav_data))
+    for segment in segments:
+        builder.add_segment(*segment)
+    for route in routes:
+        builder.add_procedure(route)
+    return builder.build()
+
+
+def nav_data_segments(nav_data):
+    """Airway segments stored in the nav data's airways table"""
+    if 'airways' not in nav_data:
+        return []
+    table = nav_data['airways']
+    columns = [table.text(field) for field in ('airway', 'level', 'lat1', 'lon1', 'lat2', 'lon2')]
+    return list(zip(*columns))
+
+
+def main():
+    """Build the graph from nav_data and the .ese, then time batch route expansion and routing"""
+    from ese_parser import EseFile
+    from nav_store import load_nav_data
+
+    nav_data_dir = sys.argv[1] if len(sys.argv) > 1 else "nav_data"
+    ese_path = sys.argv[2] if len(sys.argv) > 2 else "FASA-Package_20251004101136-251001-0002.ese"
+
+    nav_data = load_nav_data(nav_data_dir)
+    routes = EseFile(ese_path).routes.routes if os.path.exists(ese_path) else []
+
+    started = time.perf_counter()
+    graph = build_airway_graph(nav_data, nav_data_segments(nav_data), routes)
+    build_time = time.perf_counter() - started
+    print(f"🛣️ Graph: {len(graph)} nodes, {graph.edge_count} edges, {len(graph.airway_names)} airways/procedures "
+          f"in {build_time * 1000:.1f} ms ({graph.nbytes() / 1024:.1f} KiB)")
+    if graph.unresolved:
+        print(f"⚠️ {len(graph.unresolved)} unresolved points: {', '.join(graph.unresolved[:10])}")
+
+    # Every procedure as a route string, repeated to a few thousand flight plans
+    samples = []
+    for route in routes:
+        if route.kind == 'SID':
+            samples.append(f"{route.airport} {route.name} {route.fixes[-1] if route.fixes else ''}")
+        else:
+            samples.append(f"{route.fixes[0] if route.fixes else ''} {route.name} {route.airport}")
+    if samples:
+        batch = (samples * (5000 // len(samples) + 1))[:5000]
+        started = time.perf_counter()
+        results = graph.validate_routes(batch)
+        batch_time = time.perf_counter() - started
+        invalid = sum(1 for result in results if result.errors)
+        print(f"✅ Expanded {len(batch)} routes in {batch_time * 1000:.1f} ms "
+              f"({batch_time / len(batch) * 1e6:.1f} µs each), {invalid} with errors")
+        example = results[0]
+        print(f"   {example.route}: {' '.join(point[0] for point in example.points)} ({example.distance:.1f} NM)")
+
+    stars = [route for route in routes if route.kind == 'STAR' and route.fixes]
+    if stars:
+        started = time.perf_counter()
+        path = graph.shortest_path(stars[0].fixes[0], stars[0].airport)
+        path_time = time.perf_counter() - started
+        if path:
+            print(f"🧭 {graph.format_path(path)} ({path.distance:.1f} NM) in {path_time * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
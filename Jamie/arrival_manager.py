@@ -0,0 +1,279 @@
+"""
+Arrival ETA and landing sequence calculator over the .ese STARs
+Inbounds are given by their STAR and either the distance flown along it or
+their position, which is projected onto it. ETAs come from the remaining
+along-track distance with a per-type speed profile: STAR speed by engine
+type, then approach speed by RECAT-EU category over the last
+FINAL_DISTANCE_NM. Both come from the merged aircraft types, whose
+ICAO_Aircraft.json sources have no speeds of their own. Each runway's
+landing sequence is the ETA order with RECAT-EU wake spacing enforced. The
+spacing is a running maximum, landing[k] = max(eta[k], landing[k-1] +
+gap[k]), solved for all runways at once with one accumulate, so no Python
+loop runs per inbound.
+
+Feeders come from MAESTROsettings.txt (FEEDER:name:fix:airport:fixes); an
+inbound belongs to the first feeder one of whose fixes its STAR passes, and
+gets an ETA at that fix.
+"""
+
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from aircraft_types import FASA_DIR, load_aircraft_types
+from procedure_paths import STAR, load_procedure_paths
+
+MAESTRO_DIR = os.path.join(FASA_DIR, "Plugins", "MAESTRO")
+SETTINGS_FILE = os.path.join(MAESTRO_DIR, "MAESTROsettings.txt")
+
+RECAT_CATEGORIES = ('A', 'B', 'C', 'D', 'E', 'F')
+
+# RECAT-EU wake separation on final (NM), leader rows by follower columns;
+# pairs without a wake minimum get the minimum radar separation
+MINIMUM_RADAR_SEPARATION_NM = 3.0
+RECAT_SEPARATION_NM = np.array([
+    [3.0, 4.0, 5.0, 5.0, 6.0, 8.0],
+    [0.0, 3.0, 4.0, 4.0, 5.0, 7.0],
+    [0.0, 0.0, 3.0, 3.0, 4.0, 6.0],
+    [0.0, 0.0, 0.0, 0.0, 0.0, 5.0],
+    [0.0, 0.0, 0.0, 0.0, 0.0, 4.0],
+    [0.0, 0.0, 0.0, 0.0, 0.0, 3.0],
+]).clip(MINIMUM_RADAR_SEPARATION_NM)
+
+# Final approach speed (knots) by RECAT-EU category
+FINAL_SPEEDS = np.array([155.0, 150.0, 145.0, 140.0, 130.0, 110.0])
+
+# STAR speed (knots) by the engine type letter of the ICAO description (L2J)
+STAR_SPEEDS = {'J': 250.0, 'T': 210.0, 'P': 160.0, 'E': 140.0, 'R': 250.0}
+HELICOPTER_SPEED = 120.0
+
+FINAL_DISTANCE_NM = 15.0
+
+# Types missing from the database are flown as a medium jet
+DEFAULT_CATEGORY = RECAT_CATEGORIES.index('D')
+DEFAULT_STAR_SPEED = STAR_SPEEDS['J']
+
+Feeder = namedtuple('Feeder', ['name', 'fix', 'airport', 'fixes'])
+ArrivalSequence = namedtuple('ArrivalSequence', ['order', 'runway', 'position', 'eta', 'landing', 'delay',
+                                                 'feeder', 'feeder_eta', 'runway_keys'])
+
+
+class AircraftPerformance:
+    """RECAT-EU category and STAR speed of every merged ICAO aircraft type"""
+
+    def __init__(self, aircraft_types):
+        self.aircraft_types = aircraft_types
+        recats = aircraft_types.column('recat')
+        self.rated = np.isin(recats, RECAT_CATEGORIES)
+        self.categories = np.array([RECAT_CATEGORIES.index(recat) if rated else DEFAULT_CATEGORY
+                                    for recat, rated in zip(recats, self.rated)], dtype=np.int64)
+        self.star_speeds = np.array([star_speed(description) for description in aircraft_types.column('description')])
+
+    def __len__(self):
+        return len(self.aircraft_types)
+
+    def lookup(self, types):
+        """(categories, STAR speeds, final speeds) arrays for type designators"""
+        rows = self.aircraft_types.indices(types)
+        known = rows >= 0
+        categories = np.where(known, self.categories[rows], DEFAULT_CATEGORY)
+        star_speeds = np.where(known, self.star_speeds[rows], DEFAULT_STAR_SPEED)
+        return categories, star_speeds, FINAL_SPEEDS[categories]
+
+
+def star_speed(description):
+    """STAR speed of an ICAO type description such as L2J"""
+    if description.startswith('H'):
+        return HELICOPTER_SPEED
+    if len(description) == 3 and description[2] in STAR_SPEEDS:
+        return STAR_SPEEDS[description[2]]
+    return DEFAULT_STAR_SPEED
+
+
+def load_aircraft_performance(fasa_dir=FASA_DIR):
+    return AircraftPerformance(load_aircraft_types(fasa_dir))
+
+
+def parse_maestro_settings(path=SETTINGS_FILE):
+    """(airports, feeders) configured in MAESTROsettings.txt"""
+    airports = []
+    feeders = []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            parts = line.strip().split(':')
+            if parts[0] == 'AIRPORT' and len(parts) >= 2:
+                airports.append(parts[1])
+            elif parts[0] == 'FEEDER' and len(parts) >= 5:
+                feeders.append(Feeder(parts[1], parts[2], parts[3],
+                                      tuple(fix.strip() for fix in parts[4].split(',') if fix.strip())))
+    return airports, feeders
+
+
+class ArrivalManager:
+    """ETAs and per-runway landing sequences for inbounds on STARs"""
+
+    def __init__(self, paths, performance, feeders=()):
+        self.paths = paths
+        self.performance = performance
+        self.feeders = list(feeders)
+        self.runway_keys = sorted({(paths.airports[route], paths.runways[route])
+                                   for route in range(len(paths)) if paths.kinds[route] == STAR})
+        lookup = {key: number for number, key in enumerate(self.runway_keys)}
+        self.route_runways = np.array([lookup.get((paths.airports[route], paths.runways[route]), -1)
+                                       for route in range(len(paths))], dtype=np.int64)
+
+        # Feeder of every procedure and the distance along it of the feeder's fix
+        self.route_feeders = np.full(len(paths), -1, dtype=np.int64)
+        self.feeder_distances = np.full(len(paths), np.nan)
+        for route in range(len(paths)):
+            for number, feeder in enumerate(self.feeders):
+                if feeder.airport != paths.airports[route]:
+                    continue
+                distances = [paths.fix_distance(route, fix) for fix in feeder.fixes]
+                distances = [distance for distance in distances if not np.isnan(distance)]
+                if distances:
+                    self.route_feeders[route] = number
+                    self.feeder_distances[route] = min(distances)
+                    break
+
+    def remaining_distance(self, routes, along=None, lats=None, lons=None):
+        """
+        Distance (NM) to the threshold: from along when given, else from
+        positions projected onto the STAR; positions short of its first
+        fix add their distance to it
+        """
+        routes = np.asarray(routes, dtype=np.int64)
+        if along is None:
+            along, off = self.paths.project(routes, lats, lons)
+            return self.paths.lengths[routes] - along + np.where(along <= 0, off, 0.0)
+        return self.paths.lengths[routes] - np.asarray(along, dtype=np.float64)
+
+    def sequence(self, now, types, routes, along=None, lats=None, lons=None):
+        """
+        ArrivalSequence of inbounds (type designators, STAR indices and
+        along-track distances or positions) at time now (s). order lists
+        inbounds by runway then landing time; the other arrays are per
+        inbound, in input order.
+        """
+        routes = np.asarray(routes, dtype=np.int64)
+        categories, star_speeds, final_speeds = self.performance.lookup(types)
+        remaining = np.maximum(self.remaining_distance(routes, along, lats, lons), 0)
+        final = np.minimum(remaining, FINAL_DISTANCE_NM)
+        to_go = (remaining - final) / star_speeds * 3600 + final / final_speeds * 3600
+
+        feeders = self.route_feeders[routes]
+        flown = self.paths.lengths[routes] - remaining
+        feeder_to_go = (self.feeder_distances[routes] - flown) / star_speeds * 3600
+        feeder_eta = np.where((feeders >= 0) & (feeder_to_go >= 0), now + feeder_to_go, np.nan)
+
+        runways = self.route_runways[routes]
+        order = np.lexsort((to_go, runways))
+        ordered_runways = runways[order]
+        ordered_categories = categories[order]
+        new_runway = np.ones(len(order), dtype=bool)
+        new_runway[1:] = ordered_runways[1:] != ordered_runways[:-1]
+
+        # Time the follower needs to cover its leader's wake spacing at approach speed
+        gaps = np.zeros(len(order))
+        gaps[1:] = (RECAT_SEPARATION_NM[ordered_categories[:-1], ordered_categories[1:]]
+                    / final_speeds[order][1:] * 3600)
+        gaps[new_runway] = 0
+        spacing = np.cumsum(gaps)
+        # landing[k] = spacing[k] + max over j <= k of (eta[j] - spacing[j]), per runway:
+        # each runway is lifted above every earlier one so the running maximum restarts
+        group = np.cumsum(new_runway)
+        slack = to_go[order] - spacing
+        lift = (slack.max() - slack.min() + 1.0) * group if len(order) else 0
+        landing_to_go = np.maximum.accumulate(slack + lift) - lift + spacing
+
+        landing = np.empty(len(order))
+        landing[order] = now + landing_to_go
+        position = np.empty(len(order), dtype=np.int64)
+        starts = np.flatnonzero(new_runway)
+        position[order] = np.arange(len(order)) - np.repeat(starts, np.diff(np.append(starts, len(order)))) + 1
+        eta = now + to_go
+        delay = np.maximum(landing - eta, 0)
+        return ArrivalSequence(order, runways, position, eta, landing, delay, feeders, feeder_eta, self.runway_keys)
+
+
+def _sequence_loop(sequence, categories, final_speeds):
+    """Reference landing times from a plain loop over each runway's ETA order"""
+    landing = {}
+    previous = {}
+    for inbound in sorted(range(len(sequence.eta)), key=lambda i: (sequence.runway[i], sequence.eta[i])):
+        runway = sequence.runway[inbound]
+        time_ = sequence.eta[inbound]
+        if runway in previous:
+            leader = previous[runway]
+            gap = RECAT_SEPARATION_NM[categories[leader], categories[inbound]] / final_speeds[inbound] * 3600
+            time_ = max(time_, landing[leader] + gap)
+        landing[inbound] = time_
+        previous[runway] = inbound
+    return np.array([landing[inbound] for inbound in range(len(sequence.eta))])
+
+
+def synthetic_inbounds(paths, performance, count, airports=None, seed=0):
+    """Type designators, STARs and along-track distances of random inbounds"""
+    rng = np.random.default_rng(seed)
+    stars = np.flatnonzero(paths.kinds == STAR)
+    if airports:
+        stars = np.array([route for route in stars if paths.airports[route] in airports])
+    jets = performance.aircraft_types.column('icao')[performance.rated & (performance.star_speeds == STAR_SPEEDS['J'])]
+    types = jets[rng.integers(0, len(jets), count)]
+    routes = stars[rng.integers(0, len(stars), count)]
+    along = rng.uniform(0, 1, count) * paths.lengths[routes]
+    return types, routes, along
+
+
+def main():
+    """
+    Sequence synthetic inbounds to the MAESTRO airports and time recomputation
+    Usage: python arrival_manager.py [inbounds]
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    paths = load_procedure_paths("FASA-Package_20251004101136-251001-0002.ese")
+    performance = load_aircraft_performance()
+    airports, feeders = parse_maestro_settings()
+    manager = ArrivalManager(paths, performance, feeders)
+    print(f"✈️ {len(performance)} aircraft types, {len(manager.runway_keys)} arrival runways, "
+          f"MAESTRO airports {', '.join(airports)}, feeders {', '.join(feeder.name for feeder in feeders)}")
+
+    types, routes, along = synthetic_inbounds(paths, performance, count, airports)
+    now = 0.0
+    manager.sequence(now, types, routes, along)
+    repeat = 200
+    started = time.perf_counter()
+    for _ in range(repeat):
+        sequence = manager.sequence(now, types, routes, along)
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"⏱️ {count} inbounds sequenced in {elapsed * 1000:.2f} ms")
+
+    lats, lons, _ = paths.position(routes, along)
+    started = time.perf_counter()
+    from_positions = manager.sequence(now, types, routes, lats=lats, lons=lons)
+    print(f"📍 From positions: {(time.perf_counter() - started) * 1000:.2f} ms, "
+          f"largest ETA difference {np.abs(from_positions.eta - sequence.eta).max():.2f} s")
+
+    categories, _, final_speeds = performance.lookup(types)
+    mismatch = np.abs(_sequence_loop(sequence, categories, final_speeds) - sequence.landing).max()
+    print(f"✅ Loop check: largest landing time difference {mismatch:.2e} s")
+
+    for runway, (airport, designator) in enumerate(sequence.runway_keys):
+        inbounds = [inbound for inbound in sequence.order if sequence.runway[inbound] == runway]
+        if not inbounds:
+            continue
+        print(f"🛬 {airport} {designator}: {len(inbounds)} inbounds, "
+              f"total delay {sequence.delay[inbounds].sum() / 60:.0f} min")
+        for inbound in inbounds[:3]:
+            feeder = (f", {feeders[sequence.feeder[inbound]].name} at {sequence.feeder_eta[inbound] / 60:.1f} min"
+                      if not np.isnan(sequence.feeder_eta[inbound]) else '')
+            print(f"   #{sequence.position[inbound]} {types[inbound]} {paths.names[routes[inbound]]}: "
+                  f"ETA {sequence.eta[inbound] / 60:.1f} min, lands {sequence.landing[inbound] / 60:.1f} min "
+                  f"(+{sequence.delay[inbound]:.0f} s){feeder}")
+
+
+if __name__ == "__main__":
+    main()
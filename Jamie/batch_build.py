@@ -0,0 +1,194 @@
+"""
+Batch build of adaptation packages for several FIRs
+Each sector file runs through the full pipeline (.sct -> nav_data ->
+adaptation_files) in its own worker process. Workers are spawned fresh for
+every package so a large FIR's memory is returned before the next starts,
+and at most two packages per worker are queued at a time. Parsed nav tables
+are cached by content in a shared directory, so packages (and rebuilds)
+with the same coordinate tables skip the DMS conversion.
+
+Output of package NAME.sct goes to <output>/NAME/nav_data and
+<output>/NAME/adaptation_files, with the build output in <output>/NAME/build.log.
+"""
+
+import contextlib
+import csv
+import glob
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import create_adaptation_files
+import generate_london_ctrl
+
+NAV_CACHE_DIR = ".nav_cache"
+REPORT_NAME = "build_report.csv"
+
+PackageResult = namedtuple('PackageResult', ['package', 'status', 'parse_s', 'nav_data_s', 'adaptation_s',
+                                             'total_s', 'peak_rss_mb', 'error'])
+
+
+def expand_packages(patterns):
+    """Sector files named by paths or glob patterns, in order and without duplicates"""
+    packages = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"⚠️ No sector files match {pattern}")
+        for path in matches:
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                packages.append(path)
+    return packages
+
+
+def package_names(packages):
+    """Output directory name of each package: the file stem, numbered when stems repeat"""
+    names = []
+    counts = {}
+    for path in packages:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        counts[stem] = counts.get(stem, 0) + 1
+        names.append(stem if counts[stem] == 1 else f"{stem}-{counts[stem]}")
+    return names
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def build_package(sct_path, name, output_root, cache_dir=None, incremental=False):
+    """Run one package through the pipeline, logging to its build.log; returns a PackageResult"""
+    package_dir = os.path.join(output_root, name)
+    nav_data_dir = os.path.join(package_dir, "nav_data")
+    adaptation_dir = os.path.join(package_dir, "adaptation_files")
+    os.makedirs(package_dir, exist_ok=True)
+
+    timings = {'parse_s': 0.0, 'nav_data_s': 0.0, 'adaptation_s': 0.0}
+    status, error = 'OK', ''
+    started = time.perf_counter()
+    with open(os.path.join(package_dir, "build.log"), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        try:
+            stage = time.perf_counter()
+            sections = generate_london_ctrl.parse_sector_file(sct_path)
+            timings['parse_s'] = time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            generate_london_ctrl.write_nav_data(sections, nav_data_dir)
+            del sections
+            timings['nav_data_s'] = time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            create_adaptation_files.main(nav_data_dir, adaptation_dir, incremental=incremental, cache_dir=cache_dir)
+            timings['adaptation_s'] = time.perf_counter() - stage
+        except Exception as e:
+            status, error = 'FAILED', f"{type(e).__name__}: {e}"
+            print(f"❌ {error}")
+    return PackageResult(name, status, timings['parse_s'], timings['nav_data_s'], timings['adaptation_s'],
+                         time.perf_counter() - started, peak_rss_mb(), error)
+
+
+def build_packages(packages, output_root, jobs=1, cache_dir=None, incremental=False):
+    """
+    Build every package on a pool of jobs workers, each process used for a
+    single package; yields PackageResults as packages finish
+    """
+    names = package_names(packages)
+    os.makedirs(output_root, exist_ok=True)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # max_tasks_per_child needs spawned workers; they also keep the parent's
+    # memory out of the peak RSS of each package
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'),
+                             max_tasks_per_child=1) as pool:
+        pending = set()
+        for path, name in zip(packages, names):
+            pending.add(pool.submit(build_package, path, name, output_root, cache_dir, incremental))
+            if len(pending) >= 2 * jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def write_report(results, path):
+    """Per-package timings as CSV"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(PackageResult._fields)
+        for result in results:
+            writer.writerow([f"{value:.3f}" if isinstance(value, float) else value for value in result])
+
+
+def print_report(results, elapsed):
+    """Timing table of all packages, slowest first"""
+    width = max([len(result.package) for result in results] + [7])
+    print(f"\n{'Package':<{width}}  {'Status':<6}  {'Parse':>7}  {'NavData':>7}  {'Adapt':>7}  "
+          f"{'Total':>7}  {'RSS MB':>7}")
+    for result in sorted(results, key=lambda result: -result.total_s):
+        print(f"{result.package:<{width}}  {result.status:<6}  {result.parse_s:>7.2f}  {result.nav_data_s:>7.2f}  "
+              f"{result.adaptation_s:>7.2f}  {result.total_s:>7.2f}  {result.peak_rss_mb:>7.1f}")
+    failed = [result for result in results if result.status != 'OK']
+    print(f"\n⏱️ {len(results)} packages in {elapsed:.2f} s wall, "
+          f"{sum(result.total_s for result in results):.2f} s of package time, {len(failed)} failed")
+    for result in failed:
+        print(f"❌ {result.package}: {result.error}")
+
+
+def parse_option(args, name, default):
+    if name not in args:
+        return default
+    index = args.index(name)
+    return args[index + 1] if index + 1 < len(args) else default
+
+
+def main():
+    """
+    Usage: python batch_build.py PACKAGE.sct|'GLOB' ... [--jobs N] [--output DIR]
+                                 [--cache DIR] [--report FILE] [--incremental]
+    """
+    args = sys.argv[1:]
+    options = ("--jobs", "--output", "--cache", "--report")
+    patterns = [arg for index, arg in enumerate(args)
+                if not arg.startswith("--") and (index == 0 or args[index - 1] not in options)]
+    packages = expand_packages(patterns)
+    if not packages:
+        print(main.__doc__)
+        return 1
+
+    jobs = int(parse_option(args, "--jobs", 1)) or os.cpu_count() or 1
+    output_root = parse_option(args, "--output", "packages")
+    cache_dir = parse_option(args, "--cache", os.path.join(output_root, NAV_CACHE_DIR))
+    report_path = parse_option(args, "--report", os.path.join(output_root, REPORT_NAME))
+
+    print(f"🚀 Building {len(packages)} packages on {jobs} worker(s) into {output_root}")
+    started = time.perf_counter()
+    results = []
+    for result in build_packages(packages, output_root, jobs, cache_dir, "--incremental" in args):
+        results.append(result)
+        mark = "✅" if result.status == 'OK' else "❌"
+        print(f"{mark} {result.package} in {result.total_s:.2f} s ({len(results)}/{len(packages)})")
+    elapsed = time.perf_counter() - started
+
+    write_report(results, report_path)
+    print_report(results, elapsed)
+    print(f"📄 Report written to {report_path}")
+    return 1 if any(result.status != 'OK' for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
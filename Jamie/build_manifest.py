@@ -0,0 +1,78 @@
+"""
+Build manifest for incremental adaptation builds
+Records the content hash of every input and output of each generator so a
+rebuild can skip generators whose inputs, outputs and code are unchanged.
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = ".build_manifest.json"
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents, or None if it does not exist"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def files_hash(paths):
+    """Combined SHA-256 over several files, used to fingerprint generator code"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update((file_hash(path) or '').encode('ascii'))
+    return digest.hexdigest()
+
+
+def load_manifest(output_dir):
+    """Load the manifest from an output directory, empty if missing or unreadable"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'code': None, 'targets': {}}
+    manifest.setdefault('code', None)
+    manifest.setdefault('targets', {})
+    return manifest
+
+
+def save_manifest(output_dir, manifest):
+    """Write the manifest atomically"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def input_hashes(input_dir, inputs):
+    """Hashes of a generator's input files keyed by file name"""
+    return {name: file_hash(os.path.join(input_dir, name)) for name in inputs}
+
+
+def is_up_to_date(manifest, target, hashes, output_dir, outputs):
+    """
+    True when the target was built from the same inputs and every output
+    still has the hash recorded when it was written.
+    """
+    entry = manifest['targets'].get(target)
+    if not entry or entry.get('inputs') != hashes:
+        return False
+    recorded = entry.get('outputs', {})
+    for name in outputs:
+        if name not in recorded or file_hash(os.path.join(output_dir, name)) != recorded[name]:
+            return False
+    return True
+
+
+def record_target(manifest, target, hashes, output_dir, outputs):
+    """Store the input and output hashes of a freshly built target"""
+    manifest['targets'][target] = {
+        'inputs': hashes,
+        'outputs': {name: file_hash(os.path.join(output_dir, name)) for name in outputs}
+    }
@@ -0,0 +1,170 @@
+"""
+Batch DMS coordinate conversion for the adaptation pipeline
+Converts whole columns of EuroScope coordinates (S028.34.14.350) at once
+using fixed-width byte views instead of per-string parsing.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Canonical EuroScope coordinate layout: H DDD . MM . SS . fff
+DMS_WIDTH = 14
+DEGREE_COLUMNS = slice(1, 4)
+MINUTE_COLUMNS = slice(5, 7)
+SECOND_COLUMNS = slice(8, 10)
+FRACTION_COLUMNS = slice(11, 14)
+DOT_COLUMNS = [4, 7, 10]
+DIGIT_COLUMNS = [1, 2, 3, 5, 6, 8, 9, 11, 12, 13]
+
+ASCII_ZERO = ord('0')
+NEGATIVE_HEMISPHERES = (ord('S'), ord('W'))
+HEMISPHERES = (ord('N'), ord('S'), ord('E'), ord('W'))
+
+
+def dms_to_decimal(dms_str):
+    """Convert DMS coordinate to decimal degrees"""
+    try:
+        hemisphere = dms_str[0]
+        if hemisphere not in 'NSEW':
+            return 0.0
+        parts = dms_str[1:].split('.')
+        degrees = int(parts[0])
+        minutes = int(parts[1])
+        seconds = float(parts[2] + '.' + parts[3])
+        decimal = degrees + minutes/60 + seconds/3600
+        if hemisphere in 'SW':
+            return -decimal
+        return decimal
+    except Exception:
+        return 0.0
+
+
+def parse_coordinate(value):
+    """
+    Convert a DMS coordinate to decimal degrees, accepting both
+    H DDD.MM.SS.fff and H DDD.MM.SS (as used in .ese [RADAR] lines).
+    Returns None if the value is not a coordinate.
+    """
+    if not value or value[0] not in 'NSEW':
+        return None
+    parts = value[1:].split('.')
+    if len(parts) not in (3, 4):
+        return None
+    try:
+        degrees = int(parts[0])
+        minutes = int(parts[1])
+        seconds = float('.'.join(parts[2:]))
+    except ValueError:
+        return None
+    decimal = degrees + minutes/60 + seconds/3600
+    return -decimal if value[0] in 'SW' else decimal
+
+
+def _byte_matrix(values):
+    """View a sequence of coordinate strings as an (n, width) code point matrix"""
+    raw = np.array(values, dtype=f'U{DMS_WIDTH + 2}')
+    return raw.view(np.uint32).reshape(len(raw), DMS_WIDTH + 2)
+
+
+def _canonical_rows(matrix):
+    """Mask of rows laid out exactly as H DDD.MM.SS.fff"""
+    hemi = matrix[:, 0]
+    mask = np.isin(hemi, HEMISPHERES)
+    mask &= (matrix[:, DOT_COLUMNS] == ord('.')).all(axis=1)
+    digits = matrix[:, DIGIT_COLUMNS]
+    mask &= ((digits >= ASCII_ZERO) & (digits <= ASCII_ZERO + 9)).all(axis=1)
+    mask &= matrix[:, DMS_WIDTH] == 0
+    return mask
+
+
+def _column_value(matrix, columns):
+    """Decimal integer value of a fixed run of digit columns"""
+    digits = matrix[:, columns].astype(np.int64) - ASCII_ZERO
+    value = np.zeros(len(matrix), dtype=np.int64)
+    for i in range(digits.shape[1]):
+        value = value * 10 + digits[:, i]
+    return value
+
+
+def dms_array_to_decimal(values, invalid=0.0):
+    """
+    Convert a column of DMS strings to a float64 array of decimal degrees.
+    Results are bit-identical to dms_to_decimal(); strings that are not in
+    the canonical 14 character layout fall back to it. Unparseable values
+    become `invalid`.
+    """
+    values = list(values)
+    result = np.full(len(values), invalid, dtype=np.float64)
+    if not values:
+        return result
+
+    matrix = _byte_matrix(values)
+    canonical = _canonical_rows(matrix)
+
+    rows = matrix[canonical]
+    degrees = _column_value(rows, DEGREE_COLUMNS).astype(np.float64)
+    minutes = _column_value(rows, MINUTE_COLUMNS).astype(np.float64)
+    # SS.fff as an exact integer over 1000 rounds the same way float('SS.fff') does
+    seconds = (_column_value(rows, SECOND_COLUMNS) * 1000
+               + _column_value(rows, FRACTION_COLUMNS)).astype(np.float64) / 1000
+    decimal = degrees + minutes/60 + seconds/3600
+    negative = np.isin(rows[:, 0], NEGATIVE_HEMISPHERES)
+    result[canonical] = np.where(negative, -decimal, decimal)
+
+    for index in np.flatnonzero(~canonical):
+        value = values[index]
+        if value and value[0] in 'NSEW':
+            result[index] = dms_to_decimal(value)
+    return result
+
+
+def dms_pairs_to_decimal(latitudes, longitudes, invalid=0.0):
+    """Convert latitude and longitude columns, returning (lat_array, lon_array)"""
+    return (dms_array_to_decimal(latitudes, invalid),
+            dms_array_to_decimal(longitudes, invalid))
+
+
+def benchmark(fixes_file, repeat=20):
+    """Compare scalar and batch conversion over the fixes file"""
+    latitudes = []
+    longitudes = []
+    with open(fixes_file, 'r', encoding='utf-8') as f:
+        next(f)
+        for line in f:
+            parts = line.strip().split(',')
+            if len(parts) >= 3:
+                latitudes.append(parts[1])
+                longitudes.append(parts[2])
+
+    # Repeat the column so the benchmark covers a world-scale dataset
+    scale = max(1, 10000 // max(len(latitudes), 1) + 1)
+    latitudes = latitudes * scale
+    longitudes = longitudes * scale
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        scalar_lats = [dms_to_decimal(lat) for lat in latitudes]
+        scalar_lons = [dms_to_decimal(lon) for lon in longitudes]
+    scalar_time = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        batch_lats, batch_lons = dms_pairs_to_decimal(latitudes, longitudes)
+    batch_time = (time.perf_counter() - started) / repeat
+
+    identical = (batch_lats.tolist() == scalar_lats and batch_lons.tolist() == scalar_lons)
+
+    print(f"📍 {len(latitudes)} coordinate pairs from {fixes_file}")
+    print(f"   Scalar: {scalar_time * 1000:.2f} ms")
+    print(f"   Batch:  {batch_time * 1000:.2f} ms")
+    print(f"   Speedup: {scalar_time / batch_time:.1f}x")
+    print(f"   Identical results: {'✅' if identical else '❌'}")
+    return scalar_time, batch_time, identical
+
+
+if __name__ == "__main__":
+    fixes_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join("nav_data", "fixes.txt")
+    benchmark(fixes_file)
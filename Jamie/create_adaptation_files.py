@@ -1,124 +1,79 @@
 import os
+import sys
 import configparser
 from datetime import datetime
-import math
-
-def parse_nav_data(nav_data_dir):
-    """Parse ALL navigation data from the nav_data folder"""
-    data = {
-        'airports': [],
-        'runways': [],
-        'vors': [],
-        'ndbs': [],
-        'fixes': []
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from nav_store import load_nav_data
+from spatial_index import GeoGrid
+import build_manifest
+from ini_writer import IniWriter, unique_sections, warn_duplicates
+from map_sidecar import MapSidecarWriter
+from airway_graph import build_airway_graph, nav_data_segments
+from runway_geometry import THRESHOLD_FIELDS, table_geometry
+
+# Sector maps: centre and default range (NM) of each position map
+SECTOR_MAPS = {
+    'LON_C_CTR': {
+        'center_lat': 51.47,
+        'center_lon': -0.45,
+        'range': 80,
+        'description': 'London Central Control - Heathrow Area'
+    },
+    'LON_N_CTR': {
+        'center_lat': 52.5,
+        'center_lon': -1.0,
+        'range': 100,
+        'description': 'London North Control - Midlands'
+    },
+    'LON_S_CTR': {
+        'center_lat': 50.5,
+        'center_lon': -1.5,
+        'range': 80,
+        'description': 'London South Control - Southern England'
+    },
+    'LON_E_CTR': {
+        'center_lat': 51.5,
+        'center_lon': 1.0,
+        'range': 80,
+        'description': 'London East Control - East Anglia'
+    },
+    'LON_W_CTR': {
+        'center_lat': 51.5,
+        'center_lon': -2.5,
+        'range': 80,
+        'description': 'London West Control - West Country'
+    },
+    'SCO_CTR': {
+        'center_lat': 56.5,
+        'center_lon': -4.0,
+        'range': 150,
+        'description': 'Scottish Control'
+    },
+    'MAN_CTR': {
+        'center_lat': 53.5,
+        'center_lon': -2.5,
+        'range': 80,
+        'description': 'Manchester Control'
     }
-    
+}
+
+def parse_nav_data(nav_data_dir, cache_dir=None):
+    """
+    Parse ALL navigation data from the nav_data folder into a columnar
+    NavStore, reusing parsed tables from cache_dir when given
+    """
     print("🔍 Parsing ALL data from nav_data folder...")
     
-    # Parse airports
-    airports_file = os.path.join(nav_data_dir, "airports.txt")
-    if os.path.exists(airports_file):
-        print(f"📁 Reading {airports_file}")
-        with open(airports_file, 'r', encoding='utf-8') as f:
-            headers = next(f).strip().split(',')
-            for line_num, line in enumerate(f, 2):
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(',')
-                if len(parts) >= 5:
-                    data['airports'].append({
-                        'icao': parts[0],
-                        'frequency': parts[1],
-                        'latitude': parts[2],
-                        'longitude': parts[3],
-                        'type': parts[4]
-                    })
-        print(f"✅ Parsed {len(data['airports'])} airports")
-    
-    # Parse runways
-    runways_file = os.path.join(nav_data_dir, "runways.txt")
-    if os.path.exists(runways_file):
-        print(f"📁 Reading {runways_file}")
-        with open(runways_file, 'r', encoding='utf-8') as f:
-            headers = next(f).strip().split(',')
-            for line_num, line in enumerate(f, 2):
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(',')
-                if len(parts) >= 9:
-                    data['runways'].append({
-                        'rwy1': parts[0],
-                        'rwy2': parts[1],
-                        'hdg1': parts[2],
-                        'hdg2': parts[3],
-                        'lat1': parts[4],
-                        'lon1': parts[5],
-                        'lat2': parts[6],
-                        'lon2': parts[7],
-                        'airport': parts[8]
-                    })
-        print(f"✅ Parsed {len(data['runways'])} runways")
-    
-    # Parse VORs
-    vors_file = os.path.join(nav_data_dir, "vors.txt")
-    if os.path.exists(vors_file):
-        print(f"📁 Reading {vors_file}")
-        with open(vors_file, 'r', encoding='utf-8') as f:
-            headers = next(f).strip().split(',')
-            for line_num, line in enumerate(f, 2):
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(',')
-                if len(parts) >= 4:
-                    data['vors'].append({
-                        'ident': parts[0],
-                        'frequency': parts[1],
-                        'latitude': parts[2],
-                        'longitude': parts[3]
-                    })
-        print(f"✅ Parsed {len(data['vors'])} VORs")
-    
-    # Parse NDBs
-    ndbs_file = os.path.join(nav_data_dir, "ndbs.txt")
-    if os.path.exists(ndbs_file):
-        print(f"📁 Reading {ndbs_file}")
-        with open(ndbs_file, 'r', encoding='utf-8') as f:
-            headers = next(f).strip().split(',')
-            for line_num, line in enumerate(f, 2):
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(',')
-                if len(parts) >= 4:
-                    data['ndbs'].append({
-                        'ident': parts[0],
-                        'frequency': parts[1],
-                        'latitude': parts[2],
-                        'longitude': parts[3]
-                    })
-        print(f"✅ Parsed {len(data['ndbs'])} NDBs")
-    
-    # Parse fixes
-    fixes_file = os.path.join(nav_data_dir, "fixes.txt")
-    if os.path.exists(fixes_file):
-        print(f"📁 Reading {fixes_file}")
-        with open(fixes_file, 'r', encoding='utf-8') as f:
-            headers = next(f).strip().split(',')
-            for line_num, line in enumerate(f, 2):
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(',')
-                if len(parts) >= 3:
-                    data['fixes'].append({
-                        'ident': parts[0],
-                        'latitude': parts[1],
-                        'longitude': parts[2]
-                    })
-        print(f"✅ Parsed {len(data['fixes'])} fixes")
+    data = load_nav_data(nav_data_dir, cache_dir=cache_dir)
+    
+    print(f"✅ Parsed {len(data['airports'])} airports")
+    print(f"✅ Parsed {len(data['runways'])} runways")
+    print(f"✅ Parsed {len(data['vors'])} VORs")
+    print(f"✅ Parsed {len(data['ndbs'])} NDBs")
+    print(f"✅ Parsed {len(data['fixes'])} fixes")
     
     return data
 
@@ -126,10 +81,14 @@ def create_comprehensive_airways(nav_data):
     """Create comprehensive airway definitions using ALL parsed data"""
     print("🛣️ Creating comprehensive airway network...")
     
+    segments = nav_data_segments(nav_data)
+    if segments:
+        return create_graph_airways(nav_data, segments)
+    
     airways = {}
     
     # Get ALL fix identifiers for lookup
-    all_fixes = {fix['ident']: fix for fix in nav_data['fixes']}
+    all_fixes = {ident: row for row, ident in enumerate(nav_data['fixes'].text('ident'))}
     print(f"🔍 Analyzing {len(all_fixes)} fixes for airway patterns...")
     
     # Common UK airway routes based on real navigation
@@ -164,7 +123,7 @@ def create_comprehensive_airways(nav_data):
         existing_fixes = [fix for fix in route_fixes if fix in all_fixes]
         if len(existing_fixes) >= 2:
             # Sort fixes geographically for logical sequence
-            sorted_fixes = sort_fixes_geographically(existing_fixes, all_fixes)
+            sorted_fixes = sort_fixes_geographically(existing_fixes, all_fixes, nav_data['fixes'])
             airways[airway_name] = {
                 'fixes': sorted_fixes,
                 'levels': 'ALL',
@@ -175,19 +134,37 @@ def create_comprehensive_airways(nav_data):
     print(f"🎯 Total airways created: {len(airways)}")
     return airways
 
-def sort_fixes_geographically(fix_identifiers, all_fixes):
-    """Sort fixes in a logical geographic sequence"""
+def create_graph_airways(nav_data, segments):
+    """Airway definitions from the sector file's airway segments, fixes in flying order"""
+    graph = build_airway_graph(nav_data, segments)
+    print(f"🔍 Airway graph: {len(graph)} points, {graph.edge_count} segments")
+    if graph.unresolved:
+        print(f"⚠️ {len(graph.unresolved)} airway points not in nav data: {', '.join(graph.unresolved[:10])}")
+    
+    airways = {}
+    for airway_id, airway_name in enumerate(graph.airway_names):
+        route_fixes = graph.airway_fixes(airway_id)
+        if len(route_fixes) >= 2:
+            airways[airway_name] = {
+                'fixes': route_fixes,
+                'levels': 'ALL',
+                'type': 'UPPER' if graph.airway_kinds[airway_id] == 'HIGH' else 'LOWER'
+            }
+    
+    print(f"🎯 Total airways created: {len(airways)}")
+    return airways
+
+def sort_fixes_geographically(fix_identifiers, all_fixes, fixes):
+    """Sort fixes in a logical geographic sequence (all_fixes maps ident to row in fixes)"""
     if len(fix_identifiers) <= 1:
         return fix_identifiers
     
     # Get coordinates for all fixes
-    fix_coords = {}
-    for fix_ident in fix_identifiers:
-        if fix_ident in all_fixes:
-            fix_data = all_fixes[fix_ident]
-            lat = dms_to_decimal(fix_data['latitude'])
-            lon = dms_to_decimal(fix_data['longitude'])
-            fix_coords[fix_ident] = (lat, lon)
+    known = [ident for ident in fix_identifiers if ident in all_fixes]
+    rows = [all_fixes[ident] for ident in known]
+    lats = np.nan_to_num(fixes.columns['lat'][rows])
+    lons = np.nan_to_num(fixes.columns['lon'][rows])
+    fix_coords = dict(zip(known, zip(lats.tolist(), lons.tolist())))
     
     if not fix_coords:
         return fix_identifiers
@@ -222,44 +199,39 @@ def create_airways_ini(nav_data, output_dir):
     
     print(f"✅ Saved {len(airways)} airways to airways.ini")
 
+def collect_map_points(nav_data):
+    """(ident, lat, lon) points and their grid index for each map section"""
+    airports = nav_data['airports']
+    airport_points = list(zip(airports.text('icao'), airports.columns['lat'].tolist(),
+                              airports.columns['lon'].tolist()))
+    
+    # Only fixes with real coordinates
+    fixes = nav_data['fixes']
+    dms_fixes = ~np.isnan(fixes.columns['lat'])
+    fix_points = list(zip(np.array(fixes.text('ident'), dtype=object)[dms_fixes].tolist(),
+                          fixes.columns['lat'][dms_fixes].tolist(), fixes.columns['lon'][dms_fixes].tolist()))
+    
+    vors = nav_data['vors']
+    vor_points = list(zip(vors.text('ident'), vors.columns['lat'].tolist(), vors.columns['lon'].tolist()))
+    
+    # Index each point type once so every sector only visits nearby cells
+    return {
+        'airports': (airport_points, points_index(airport_points)),
+        'fixes': (fix_points, points_index(fix_points)),
+        'vors': (vor_points, points_index(vor_points))
+    }
+
 def create_comprehensive_maps(nav_data, output_dir):
     """Create comprehensive position maps using ALL parsed data"""
     print("🗺️ Creating comprehensive position maps using ALL data...")
     
-    # Calculate REAL bounds from ALL data
-    all_lats = []
-    all_lons = []
-    
-    # Add ALL airport coordinates
-    for airport in nav_data['airports']:
-        try:
-            lat_dec = dms_to_decimal(airport['latitude'])
-            lon_dec = dms_to_decimal(airport['longitude'])
-            all_lats.append(lat_dec)
-            all_lons.append(lon_dec)
-        except:
-            continue
+    # Convert ALL coordinates once, every sector map reuses them
+    map_points = collect_map_points(nav_data)
     
-    # Add ALL fix coordinates
-    for fix in nav_data['fixes']:
-        try:
-            if fix['latitude'].startswith('N') or fix['latitude'].startswith('S'):
-                lat_dec = dms_to_decimal(fix['latitude'])
-                lon_dec = dms_to_decimal(fix['longitude'])
-                all_lats.append(lat_dec)
-                all_lons.append(lon_dec)
-        except:
-            continue
-    
-    # Add ALL VOR coordinates
-    for vor in nav_data['vors']:
-        try:
-            lat_dec = dms_to_decimal(vor['latitude'])
-            lon_dec = dms_to_decimal(vor['longitude'])
-            all_lats.append(lat_dec)
-            all_lons.append(lon_dec)
-        except:
-            continue
+    # Calculate REAL bounds from ALL data
+    all_points = map_points['airports'][0] + map_points['fixes'][0] + map_points['vors'][0]
+    all_lats = [lat for _, lat, _ in all_points]
+    all_lons = [lon for _, _, lon in all_points]
     
     if not all_lats or not all_lons:
         print("⚠️ No valid coordinates found, using UK default bounds")
@@ -273,61 +245,55 @@ def create_comprehensive_maps(nav_data, output_dir):
         max_lon = max(all_lons)
         print(f"📍 Data covers: Lat {min_lat:.2f}°N to {max_lat:.2f}°N, Lon {min_lon:.2f}°W to {max_lon:.2f}°E")
     
-    # Create sector maps
-    sector_maps = {
-        'LON_C_CTR': {
-            'center_lat': 51.47,
-            'center_lon': -0.45,
-            'range': 80,
-            'description': 'London Central Control - Heathrow Area'
-        },
-        'LON_N_CTR': {
-            'center_lat': 52.5,
-            'center_lon': -1.0,
-            'range': 100,
-            'description': 'London North Control - Midlands'
-        },
-        'LON_S_CTR': {
-            'center_lat': 50.5,
-            'center_lon': -1.5,
-            'range': 80,
-            'description': 'London South Control - Southern England'
-        },
-        'LON_E_CTR': {
-            'center_lat': 51.5,
-            'center_lon': 1.0,
-            'range': 80,
-            'description': 'London East Control - East Anglia'
-        },
-        'LON_W_CTR': {
-            'center_lat': 51.5,
-            'center_lon': -2.5,
-            'range': 80,
-            'description': 'London West Control - West Country'
-        },
-        'SCO_CTR': {
-            'center_lat': 56.5,
-            'center_lon': -4.0,
-            'range': 150,
-            'description': 'Scottish Control'
-        },
-        'MAN_CTR': {
-            'center_lat': 53.5,
-            'center_lon': -2.5,
-            'range': 80,
-            'description': 'Manchester Control'
-        }
-    }
-    
     # Create maps directory
     maps_dir = os.path.join(output_dir, "maps")
     os.makedirs(maps_dir, exist_ok=True)
     
     # Create map files for each sector
-    for sector, map_info in sector_maps.items():
-        print(f"🗺️ Creating map: {sector}")
-        
-        map_content = f"""; {sector} Position Map
+    for sector in SECTOR_MAPS:
+        create_sector_map(sector, map_points, maps_dir)
+    
+    create_maps_ini(output_dir)
+    
+    print(f"✅ Created {len(SECTOR_MAPS)} sector maps")
+
+# Map point sections in file order: (point kind, INI section title)
+MAP_SECTIONS = (('airports', 'Airports'), ('fixes', 'Fixes'), ('vors', 'VORs'))
+
+# Map lines are joined and written in batches of this many
+MAP_FLUSH_LINES = 4096
+
+# Runway geometry cache in the output directory, keyed by the runway input hash
+RUNWAY_GEOMETRY_CACHE = ".runway_geometry.cache.npz"
+
+def sector_map_records(sector, map_points):
+    """
+    Yield (kind, ident, lat, lon) for every point on a sector map, section by
+    section. A record with ident None marks the start of each section.
+    """
+    map_info = SECTOR_MAPS[sector]
+    
+    # Include points within one and a half times the display range
+    center = (map_info['center_lat'], map_info['center_lon'])
+    max_distance = map_info['range'] * 1.5
+    
+    for kind, _ in MAP_SECTIONS:
+        points, index = map_points[kind]
+        yield kind, None, None, None
+        for ident, lat_dec, lon_dec in points_in_range(index, points, *center, max_distance):
+            yield kind, ident, lat_dec, lon_dec
+
+def create_sector_map(sector, map_points, maps_dir):
+    """
+    Create one sector's position map from collect_map_points() output.
+    The INI file and its binary sidecar are written from one pass over the records.
+    """
+    map_info = SECTOR_MAPS[sector]
+    titles = dict(MAP_SECTIONS)
+    
+    print(f"🗺️ Creating map: {sector}")
+    
+    header = f"""; {sector} Position Map
 ; {map_info['description']}
 ; Auto-generated from UK navigation data
 ; Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -344,66 +310,33 @@ DefaultRange={map_info['range']}
 RangeRings=true
 RangeRingDistance=20
 
-[Airports]
 """
-        
-        # Add airports to each map
-        airport_count = 0
-        for airport in nav_data['airports']:
-            try:
-                lat_dec = dms_to_decimal(airport['latitude'])
-                lon_dec = dms_to_decimal(airport['longitude'])
-                
-                # Simple distance check
-                distance = calculate_distance(lat_dec, lon_dec, map_info['center_lat'], map_info['center_lon'])
-                if distance <= map_info['range'] * 1.5:  # Include airports within range
-                    map_content += f"{airport['icao']}={lat_dec:.6f},{lon_dec:.6f}\n"
-                    airport_count += 1
-            except:
-                continue
-        
-        map_content += "\n[Fixes]\n"
-        
-        # Add fixes to each map
-        fix_count = 0
-        for fix in nav_data['fixes']:
-            try:
-                if fix['latitude'].startswith('N') or fix['latitude'].startswith('S'):
-                    lat_dec = dms_to_decimal(fix['latitude'])
-                    lon_dec = dms_to_decimal(fix['longitude'])
-                    
-                    # Simple distance check
-                    distance = calculate_distance(lat_dec, lon_dec, map_info['center_lat'], map_info['center_lon'])
-                    if distance <= map_info['range'] * 1.5:
-                        map_content += f"{fix['ident']}={lat_dec:.6f},{lon_dec:.6f}\n"
-                        fix_count += 1
-            except:
-                continue
-        
-        map_content += "\n[VORs]\n"
-        
-        # Add VORs to each map
-        vor_count = 0
-        for vor in nav_data['vors']:
-            try:
-                lat_dec = dms_to_decimal(vor['latitude'])
-                lon_dec = dms_to_decimal(vor['longitude'])
-                
-                # Simple distance check
-                distance = calculate_distance(lat_dec, lon_dec, map_info['center_lat'], map_info['center_lon'])
-                if distance <= map_info['range'] * 1.5:
-                    map_content += f"{vor['ident']}={lat_dec:.6f},{lon_dec:.6f}\n"
-                    vor_count += 1
-            except:
+    
+    counts = {kind: 0 for kind, _ in MAP_SECTIONS}
+    sidecar = MapSidecarWriter()
+    map_filename = os.path.join(maps_dir, f"{sector}.ini")
+    with open(map_filename, 'w', encoding='utf-8') as f:
+        pending = [header]
+        first_section = True
+        for kind, ident, lat_dec, lon_dec in sector_map_records(sector, map_points):
+            if ident is None:
+                pending.append(f"[{titles[kind]}]\n" if first_section else f"\n[{titles[kind]}]\n")
+                first_section = False
                 continue
-        
-        map_filename = os.path.join(maps_dir, f"{sector}.ini")
-        with open(map_filename, 'w', encoding='utf-8') as f:
-            f.write(map_content)
-        
-        print(f"✅ Created {sector} with {airport_count} airports, {fix_count} fixes, {vor_count} VORs")
+            pending.append(f"{ident}={lat_dec:.6f},{lon_dec:.6f}\n")
+            sidecar.add(kind, ident, lat_dec, lon_dec)
+            counts[kind] += 1
+            if len(pending) >= MAP_FLUSH_LINES:
+                f.write(''.join(pending))
+                pending.clear()
+        f.write(''.join(pending))
     
-    # Create main maps.ini file
+    sidecar.write(os.path.join(maps_dir, f"{sector}.bin"))
+    
+    print(f"✅ Created {sector} with {counts['airports']} airports, {counts['fixes']} fixes, {counts['vors']} VORs")
+
+def create_maps_ini(output_dir):
+    """Create the main maps.ini listing every sector map"""
     maps_ini_content = """; Main Maps Configuration
 ; Maps for UK Sectors
 
@@ -414,177 +347,142 @@ SectorFile=UK_2025_03.sct
 [Maps]
 """
     
-    for sector in sector_maps.keys():
+    for sector in SECTOR_MAPS.keys():
         maps_ini_content += f"{sector}=maps/{sector}.ini\n"
     
     with open(os.path.join(output_dir, "maps.ini"), 'w') as f:
         f.write(maps_ini_content)
-    
-    print(f"✅ Created {len(sector_maps)} sector maps")
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate approximate distance between two points in kilometers"""
-    # Simple approximation - for map filtering only
-    lat_diff = abs(lat1 - lat2) * 111  # 1 degree lat ≈ 111 km
-    lon_diff = abs(lon1 - lon2) * 111 * math.cos(math.radians((lat1 + lat2) / 2))
-    return math.sqrt(lat_diff**2 + lon_diff**2)
+def points_index(points):
+    """Grid index over (ident, lat, lon) point tuples"""
+    return GeoGrid([lat for _, lat, _ in points], [lon for _, _, lon in points])
 
-def dms_to_decimal(dms_str):
-    """Convert DMS coordinate to decimal degrees"""
-    try:
-        if dms_str.startswith('N'):
-            clean_str = dms_str[1:]
-            parts = clean_str.split('.')
-            degrees = int(parts[0])
-            minutes = int(parts[1])
-            seconds = float(parts[2] + '.' + parts[3])
-            decimal = degrees + minutes/60 + seconds/3600
-            return decimal
-        elif dms_str.startswith('S'):
-            clean_str = dms_str[1:]
-            parts = clean_str.split('.')
-            degrees = int(parts[0])
-            minutes = int(parts[1])
-            seconds = float(parts[2] + '.' + parts[3])
-            decimal = -(degrees + minutes/60 + seconds/3600)
-            return decimal
-        elif dms_str.startswith('E'):
-            clean_str = dms_str[1:]
-            parts = clean_str.split('.')
-            degrees = int(parts[0])
-            minutes = int(parts[1])
-            seconds = float(parts[2] + '.' + parts[3])
-            decimal = degrees + minutes/60 + seconds/3600
-            return decimal
-        elif dms_str.startswith('W'):
-            clean_str = dms_str[1:]
-            parts = clean_str.split('.')
-            degrees = int(parts[0])
-            minutes = int(parts[1])
-            seconds = float(parts[2] + '.' + parts[3])
-            decimal = -(degrees + minutes/60 + seconds/3600)
-            return decimal
-        else:
-            return 0.0
-    except Exception as e:
-        return 0.0
+def points_in_range(index, points, center_lat, center_lon, max_distance):
+    """Yield the (ident, lat, lon) points within max_distance NM (great circle) of a centre, in their original order"""
+    rows, _ = index.radius(center_lat, center_lon, max_distance)
+    for row in rows.tolist():
+        yield points[row]
 
 def create_airports_ini(nav_data, output_dir):
     """Create airports.ini from parsed data"""
-    config = configparser.ConfigParser()
-    config.optionxform = str
-    
-    for airport in nav_data['airports']:
-        icao = airport['icao']
-        lat_dec = dms_to_decimal(airport['latitude'])
-        lon_dec = dms_to_decimal(airport['longitude'])
-        
-        config[icao] = {
-            'Name': f"Airport {icao}",
-            'Frequency': airport['frequency'],
-            'Latitude': f"{lat_dec:.6f}",
-            'Longitude': f"{lon_dec:.6f}",
-            'Elevation': '0',
-            'TransitionAltitude': '6000',
-            'Country': 'GB'
-        }
-    
-    with open(os.path.join(output_dir, "airports.ini"), 'w') as f:
-        config.write(f)
+    airports = nav_data['airports']
+    icaos = airports.text('icao')
+    frequencies = airports.text('frequency')
+    lats = airports.columns['lat'].tolist()
+    lons = airports.columns['lon'].tolist()
+    
+    rows, duplicates = unique_sections(icaos)
+    warn_duplicates("airport", duplicates)
+    
+    with open(os.path.join(output_dir, "airports.ini"), 'w') as f, IniWriter(f) as ini:
+        for row in rows:
+            icao = icaos[row]
+            ini.write_section(icao, (
+                ('Name', f"Airport {icao}"),
+                ('Frequency', frequencies[row]),
+                ('Latitude', f"{lats[row]:.6f}"),
+                ('Longitude', f"{lons[row]:.6f}"),
+                ('Elevation', '0'),
+                ('TransitionAltitude', '6000'),
+                ('Country', 'GB')
+            ))
     print(f"✅ Created airports.ini with {len(nav_data['airports'])} airports")
 
 def create_runways_ini(nav_data, output_dir):
-    """Create runways.ini from parsed data"""
-    config = configparser.ConfigParser()
-    config.optionxform = str
-    
-    for runway in nav_data['runways']:
-        airport = runway['airport']
-        rwy1 = runway['rwy1']
-        
-        section_name = f"{airport}_{rwy1}"
-        
-        lat1_dec = dms_to_decimal(runway['lat1'])
-        lon1_dec = dms_to_decimal(runway['lon1'])
-        lat2_dec = dms_to_decimal(runway['lat2'])
-        lon2_dec = dms_to_decimal(runway['lon2'])
-        
-        config[section_name] = {
-            'Airport': airport,
-            'Identifier': rwy1,
-            'Heading': runway['hdg1'],
-            'Latitude': f"{lat1_dec:.6f}",
-            'Longitude': f"{lon1_dec:.6f}",
-            'OppositeIdentifier': runway['rwy2'],
-            'OppositeHeading': runway['hdg2'],
-            'OppositeLatitude': f"{lat2_dec:.6f}",
-            'OppositeLongitude': f"{lon2_dec:.6f}",
-            'Length': '0',
-            'Width': '45'
-        }
-    
-    with open(os.path.join(output_dir, "runways.ini"), 'w') as f:
-        config.write(f)
+    """
+    Create runways.ini from parsed data. Length, true headings and the
+    midpoint come from the threshold coordinates; missing (000) headings are
+    filled with the derived magnetic heading. Threshold pairs listed against
+    their designator are swapped first, so each runway gets its own end.
+    """
+    runways = nav_data['runways']
+    text = {field: runways.text(field) for field in ('airport', 'rwy1', 'rwy2', 'hdg1', 'hdg2')}
+    geometry = table_geometry(runways, os.path.join(output_dir, RUNWAY_GEOMETRY_CACHE))
+    coords = {field: geometry[field].tolist() for field in THRESHOLD_FIELDS}
+    derived = {field: geometry[field].tolist() for field in ('length', 'true1', 'true2', 'magnetic1', 'magnetic2',
+                                                             'mid_lat', 'mid_lon')}
+    
+    section_names = [f"{airport}_{rwy1}" for airport, rwy1 in zip(text['airport'], text['rwy1'])]
+    rows, duplicates = unique_sections(section_names)
+    warn_duplicates("runway", duplicates)
+    swapped_rows = np.flatnonzero(geometry['swapped']).tolist()
+    if swapped_rows:
+        shown = ', '.join(section_names[row] for row in swapped_rows[:10])
+        print(f"⚠️ {len(swapped_rows)} runways whose thresholds run against their designator, swapped: {shown}")
+    
+    def heading(published, magnetic):
+        return published if published.strip('0 ') else f"{round(magnetic) % 360 or 360:03d}"
+    
+    with open(os.path.join(output_dir, "runways.ini"), 'w') as f, IniWriter(f) as ini:
+        for row in rows:
+            ini.write_section(section_names[row], (
+                ('Airport', text['airport'][row]),
+                ('Identifier', text['rwy1'][row]),
+                ('Heading', heading(text['hdg1'][row], derived['magnetic1'][row])),
+                ('TrueHeading', f"{derived['true1'][row]:.1f}"),
+                ('Latitude', f"{coords['lat1'][row]:.6f}"),
+                ('Longitude', f"{coords['lon1'][row]:.6f}"),
+                ('OppositeIdentifier', text['rwy2'][row]),
+                ('OppositeHeading', heading(text['hdg2'][row], derived['magnetic2'][row])),
+                ('OppositeTrueHeading', f"{derived['true2'][row]:.1f}"),
+                ('OppositeLatitude', f"{coords['lat2'][row]:.6f}"),
+                ('OppositeLongitude', f"{coords['lon2'][row]:.6f}"),
+                ('MidLatitude', f"{derived['mid_lat'][row]:.6f}"),
+                ('MidLongitude', f"{derived['mid_lon'][row]:.6f}"),
+                ('Length', f"{derived['length'][row]:.0f}"),
+                ('Width', '45')
+            ))
     print(f"✅ Created runways.ini with {len(nav_data['runways'])} runways")
 
 def create_navaids_ini(nav_data, output_dir):
     """Create navaids.ini from parsed VOR and NDB data"""
-    config = configparser.ConfigParser()
-    config.optionxform = str
-    
-    for vor in nav_data['vors']:
-        lat_dec = dms_to_decimal(vor['latitude'])
-        lon_dec = dms_to_decimal(vor['longitude'])
-        
-        config[vor['ident']] = {
-            'Type': 'VOR',
-            'Name': f"VOR {vor['ident']}",
-            'Frequency': vor['frequency'],
-            'Latitude': f"{lat_dec:.6f}",
-            'Longitude': f"{lon_dec:.6f}",
-            'Elevation': '0'
-        }
-    
-    for ndb in nav_data['ndbs']:
-        lat_dec = dms_to_decimal(ndb['latitude'])
-        lon_dec = dms_to_decimal(ndb['longitude'])
-        
-        config[ndb['ident']] = {
-            'Type': 'NDB',
-            'Name': f"NDB {ndb['ident']}",
-            'Frequency': ndb['frequency'],
-            'Latitude': f"{lat_dec:.6f}",
-            'Longitude': f"{lon_dec:.6f}",
-            'Elevation': '0'
-        }
-    
-    with open(os.path.join(output_dir, "navaids.ini"), 'w') as f:
-        config.write(f)
+    vors = nav_data['vors']
+    ndbs = nav_data['ndbs']
+    
+    # VORs then NDBs share one namespace of section names
+    navaids = []
+    for navaid_type, table in (('VOR', vors), ('NDB', ndbs)):
+        navaids.extend(zip([navaid_type] * len(table), table.text('ident'), table.text('frequency'),
+                           table.columns['lat'].tolist(), table.columns['lon'].tolist()))
+    
+    rows, duplicates = unique_sections([navaid[1] for navaid in navaids])
+    warn_duplicates("navaid", duplicates)
+    
+    with open(os.path.join(output_dir, "navaids.ini"), 'w') as f, IniWriter(f) as ini:
+        for row in rows:
+            navaid_type, ident, frequency, lat_dec, lon_dec = navaids[row]
+            ini.write_section(ident, (
+                ('Type', navaid_type),
+                ('Name', f"{navaid_type} {ident}"),
+                ('Frequency', frequency),
+                ('Latitude', f"{lat_dec:.6f}"),
+                ('Longitude', f"{lon_dec:.6f}"),
+                ('Elevation', '0')
+            ))
     print(f"✅ Created navaids.ini with {len(nav_data['vors'])} VORs and {len(nav_data['ndbs'])} NDBs")
 
 def create_fixes_ini(nav_data, output_dir):
     """Create fixes.ini from parsed data"""
-    config = configparser.ConfigParser()
-    config.optionxform = str
-    
-    for fix in nav_data['fixes']:
-        ident = fix['ident']
-        lat = fix['latitude']
-        lon = fix['longitude']
-        
-        if lat.startswith('N') or lat.startswith('S'):
-            lat_dec = dms_to_decimal(lat)
-            lon_dec = dms_to_decimal(lon)
-            
-            config[ident] = {
-                'Name': f"Fix {ident}",
-                'Latitude': f"{lat_dec:.6f}",
-                'Longitude': f"{lon_dec:.6f}",
-                'Type': 'WAYPOINT'
-            }
-    
-    with open(os.path.join(output_dir, "fixes.ini"), 'w') as f:
-        config.write(f)
+    fixes = nav_data['fixes']
+    
+    # Fixes without DMS coordinates are stored as NaN
+    valid = np.flatnonzero(~np.isnan(fixes.columns['lat']))
+    idents = np.array(fixes.text('ident'), dtype=object)[valid].tolist()
+    lats = fixes.columns['lat'][valid].tolist()
+    lons = fixes.columns['lon'][valid].tolist()
+    
+    rows, duplicates = unique_sections(idents)
+    warn_duplicates("fix", duplicates)
+    
+    with open(os.path.join(output_dir, "fixes.ini"), 'w') as f, IniWriter(f) as ini:
+        for row in rows:
+            ident = idents[row]
+            ini.write_section(ident, (
+                ('Name', f"Fix {ident}"),
+                ('Latitude', f"{lats[row]:.6f}"),
+                ('Longitude', f"{lons[row]:.6f}"),
+                ('Type', 'WAYPOINT')
+            ))
     print(f"✅ Created fixes.ini with {len(nav_data['fixes'])} fixes")
 
 def create_remaining_files(output_dir):
@@ -720,38 +618,154 @@ HandoffEnabled=true
     
     print("✅ Created all remaining configuration files")
 
-def main():
-    nav_data_dir = "nav_data"
-    adaptation_dir = "adaptation_files"
+def create_static_files(nav_data, output_dir):
+    """Build target wrapper for the files that do not use nav data"""
+    create_remaining_files(output_dir)
+
+# Generators, the nav_data files they read and the files they write
+BUILD_TARGETS = {
+    'airways': (create_airways_ini, ['fixes.txt', 'vors.txt', 'ndbs.txt', 'airports.txt', 'airways.txt'],
+                ['airways.ini']),
+    'maps': (create_comprehensive_maps, ['airports.txt', 'fixes.txt', 'vors.txt'],
+             ['maps.ini'] + [f"maps/{sector}.{ext}" for sector in SECTOR_MAPS for ext in ('ini', 'bin')]),
+    'airports': (create_airports_ini, ['airports.txt'], ['airports.ini']),
+    'runways': (create_runways_ini, ['runways.txt'], ['runways.ini']),
+    'navaids': (create_navaids_ini, ['vors.txt', 'ndbs.txt'], ['navaids.ini']),
+    'fixes': (create_fixes_ini, ['fixes.txt'], ['fixes.ini']),
+    'static': (create_static_files, [],
+               ['sectors.ini', 'settings.ini', 'colors.ini', 'voice.ini', 'plugins.ini',
+                'labels.ini', 'msaw.ini', 'radar.ini', 'coordination.ini'])
+}
+
+# Any change to the generator code invalidates every target
+GENERATOR_SOURCES = [
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "coordinates.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "nav_store.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "spatial_index.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ini_writer.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "map_sidecar.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "airway_graph.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "geodesy.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "runway_geometry.py")
+]
+
+# Nav data of a pool worker: inherited from the parent on fork, loaded once by
+# the initializer on spawn, so it is never pickled per task
+_worker_nav_data = None
+_worker_map_points = None
+
+def _init_worker(nav_data_dir, cache_dir=None):
+    """Pool initializer; loads the nav data unless it was inherited"""
+    global _worker_nav_data
+    if _worker_nav_data is None:
+        _worker_nav_data = load_nav_data(nav_data_dir, cache_dir=cache_dir)
+
+def _run_task(kind, name, adaptation_dir):
+    """Run one generator, or with kind 'map' one sector map, inside a worker"""
+    global _worker_map_points
+    if kind == 'map':
+        if _worker_map_points is None:
+            _worker_map_points = collect_map_points(_worker_nav_data)
+        create_sector_map(name, _worker_map_points, os.path.join(adaptation_dir, "maps"))
+    else:
+        BUILD_TARGETS[name][0](_worker_nav_data, adaptation_dir)
+    return kind, name
+
+def run_parallel(targets, nav_data, nav_data_dir, adaptation_dir, jobs, cache_dir=None):
+    """
+    Run independent generators on a process pool. The maps target is split
+    into one task per sector map plus maps.ini, written once they finish.
+    """
+    global _worker_nav_data
+    tasks = []
+    for target in targets:
+        if target == 'maps':
+            os.makedirs(os.path.join(adaptation_dir, "maps"), exist_ok=True)
+            tasks.extend(('map', sector) for sector in SECTOR_MAPS)
+        else:
+            tasks.append(('target', target))
     
-    print("🚀 STARTING COMPREHENSIVE ADAPTATION CREATION")
-    print("=" * 50)
+    # Set before the pool starts so forked workers share it copy-on-write
+    _worker_nav_data = nav_data
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(nav_data_dir, cache_dir)) as pool:
+            futures = [pool.submit(_run_task, kind, name, adaptation_dir) for kind, name in tasks]
+            for future in as_completed(futures):
+                future.result()
+    finally:
+        _worker_nav_data = None
+    
+    if 'maps' in targets:
+        create_maps_ini(adaptation_dir)
+        print(f"✅ Created {len(SECTOR_MAPS)} sector maps")
+
+def build_targets(nav_data_dir, adaptation_dir, incremental=False, jobs=1, cache_dir=None):
+    """
+    Run every generator, or with incremental only those whose inputs,
+    outputs or code changed since the last build. With jobs > 1 the
+    generators run concurrently on a process pool. cache_dir holds parsed
+    nav tables shared between builds. Returns the built targets.
+    """
+    manifest = build_manifest.load_manifest(adaptation_dir) if incremental else {'code': None, 'targets': {}}
+    code_hash = build_manifest.files_hash(GENERATOR_SOURCES)
+    if manifest['code'] != code_hash:
+        manifest = {'code': code_hash, 'targets': {}}
+    
+    stale = []
+    for target, (generator, inputs, outputs) in BUILD_TARGETS.items():
+        hashes = build_manifest.input_hashes(nav_data_dir, inputs)
+        if incremental and build_manifest.is_up_to_date(manifest, target, hashes, adaptation_dir, outputs):
+            print(f"⏭️  {target} is up to date")
+            continue
+        stale.append((target, generator, hashes, outputs))
     
-    # Parse ALL data from nav_data folder
-    nav_data = parse_nav_data(nav_data_dir)
+    if not stale:
+        print("✅ Everything is up to date")
+        return []
+    
+    # Parse ALL data from nav_data folder, only when a generator needs it
+    nav_data = None
+    if any(BUILD_TARGETS[target][1] for target, _, _, _ in stale):
+        nav_data = parse_nav_data(nav_data_dir, cache_dir)
+        
+        print(f"\n📊 DATA SUMMARY:")
+        print(f"   ✈️  Airports: {len(nav_data['airports'])}")
+        print(f"   🛣️  Runways: {len(nav_data['runways'])}")
+        print(f"   📡 VORs: {len(nav_data['vors'])}")
+        print(f"   📻 NDBs: {len(nav_data['ndbs'])}")
+        print(f"   📍 Fixes: {len(nav_data['fixes'])}")
+    
+    # Create ALL adaptation files using PARSED DATA
+    if jobs > 1 and len(stale) > 1:
+        print(f"⚙️  Running {len(stale)} generators on {jobs} workers")
+        run_parallel([target for target, _, _, _ in stale], nav_data, nav_data_dir, adaptation_dir, jobs,
+                     cache_dir)
+    else:
+        for target, generator, hashes, outputs in stale:
+            generator(nav_data, adaptation_dir)
     
-    print(f"\n📊 DATA SUMMARY:")
-    print(f"   ✈️  Airports: {len(nav_data['airports'])}")
-    print(f"   🛣️  Runways: {len(nav_data['runways'])}")
-    print(f"   📡 VORs: {len(nav_data['vors'])}")
-    print(f"   📻 NDBs: {len(nav_data['ndbs'])}")
-    print(f"   📍 Fixes: {len(nav_data['fixes'])}")
+    for target, generator, hashes, outputs in stale:
+        build_manifest.record_target(manifest, target, hashes, adaptation_dir, outputs)
+    
+    build_manifest.save_manifest(adaptation_dir, manifest)
+    return [target for target, _, _, _ in stale]
+
+def main(nav_data_dir="nav_data", adaptation_dir="adaptation_files", incremental=False, jobs=1, cache_dir=None):
+    print("🚀 STARTING COMPREHENSIVE ADAPTATION CREATION")
+    print("=" * 50)
     
     # Create output directory
     os.makedirs(adaptation_dir, exist_ok=True)
     
-    # Create ALL adaptation files using PARSED DATA
-    create_airways_ini(nav_data, adaptation_dir)
-    create_comprehensive_maps(nav_data, adaptation_dir)
-    create_airports_ini(nav_data, adaptation_dir)
-    create_runways_ini(nav_data, adaptation_dir)
-    create_navaids_ini(nav_data, adaptation_dir)
-    create_fixes_ini(nav_data, adaptation_dir)
-    create_remaining_files(adaptation_dir)
+    built = build_targets(nav_data_dir, adaptation_dir, incremental, jobs, cache_dir)
+    if incremental:
+        print(f"🔁 Rebuilt {len(built)} of {len(BUILD_TARGETS)} targets")
     
     # Final summary
-    files = os.listdir(adaptation_dir)
-    map_files = os.listdir(os.path.join(adaptation_dir, "maps"))
+    files = [name for name in os.listdir(adaptation_dir) if not name.startswith('.')]
+    map_files = [name for name in os.listdir(os.path.join(adaptation_dir, "maps")) if name.endswith('.ini')]
     
     print(f"\n🎉 SUCCESS! COMPREHENSIVE ADAPTATION CREATED!")
     print("=" * 50)
@@ -760,5 +774,13 @@ def main():
     print(f"💾 All files saved to: {adaptation_dir}")
     print("\nYour adaptation package is READY TO USE! 🎊")
 
+def parse_jobs(args):
+    """Worker count from --jobs N (0 means one per core), default 1"""
+    if "--jobs" not in args:
+        return 1
+    index = args.index("--jobs")
+    jobs = int(args[index + 1]) if index + 1 < len(args) else 0
+    return jobs or os.cpu_count() or 1
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(incremental="--incremental" in sys.argv[1:], jobs=parse_jobs(sys.argv[1:]))
@@ -0,0 +1,319 @@
+"""
+EuroScope .ese (sector extension) parser
+Builds a byte-offset index of the file's sections in one scan and parses a
+section only when it is first used: positions, SID/STAR routes, airspace
+sector lines and sectors, radar sites and free text.
+"""
+
+import mmap
+import os
+import sys
+import time
+from collections import namedtuple
+from itertools import chain
+from functools import cached_property
+
+import numpy as np
+
+from coordinates import parse_coordinate
+
+ESE_ENCODING = 'latin-1'
+
+Position = namedtuple('Position', [
+    'callsign', 'name', 'frequency', 'identifier', 'middle', 'prefix', 'suffix',
+    'squawk_start', 'squawk_end', 'visibility_centres'
+])
+Route = namedtuple('Route', ['kind', 'airport', 'runway', 'name', 'fixes'])
+SectorLine = namedtuple('SectorLine', ['id', 'coords', 'display'])
+CircleSectorLine = namedtuple('CircleSectorLine', ['id', 'lat', 'lon', 'radius'])
+Sector = namedtuple('Sector', [
+    'name', 'bottom', 'top', 'owners', 'alt_owners', 'borders', 'active',
+    'departure_airports', 'arrival_airports'
+])
+Airspace = namedtuple('Airspace', ['sector_lines', 'circles', 'sectors', 'copx'])
+RadarSite = namedtuple('RadarSite', ['name', 'lat', 'lon', 'psr', 'smode', 'cmode'])
+FreeText = namedtuple('FreeText', ['lat', 'lon', 'group', 'text'])
+
+
+def index_sections(path):
+    """
+    Scan a file once for [SECTION] headers.
+    Returns {name: [(start, end), ...]} byte ranges of each section body, in
+    file order, so a section whose header repeats keeps every body.
+    """
+    headers = []
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            position = 0
+            while position < size:
+                if data[position:position + 1] != b'[':
+                    found = data.find(b'\n[', position)
+                    if found == -1:
+                        break
+                    position = found + 1
+                line_end = data.find(b'\n', position)
+                if line_end == -1:
+                    line_end = size
+                close = data.find(b']', position, line_end)
+                if close != -1:
+                    name = data[position + 1:close].decode(ESE_ENCODING).strip().upper()
+                    headers.append((name, position, min(line_end + 1, size)))
+                position = line_end + 1
+
+    # Each body runs up to the start of the next header line
+    sections = {}
+    for i, (name, _, body_start) in enumerate(headers):
+        body_end = headers[i + 1][1] if i + 1 < len(headers) else size
+        sections.setdefault(name, []).append((body_start, body_end))
+    return sections
+
+
+def iter_section(path, byte_range):
+    """Yield the stripped, non-empty, non-comment lines of one section"""
+    start, end = byte_range
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            raw = f.readline(remaining)
+            if not raw:
+                break
+            remaining -= len(raw)
+            line = raw.decode(ESE_ENCODING).strip()
+            if line and not line.startswith(';'):
+                yield line
+
+
+def parse_positions(lines):
+    """
+    [POSITIONS] format:
+    CALLSIGN:Name:freq:id:middle:prefix:suffix:::squawk start:squawk end[:lat:lon...]
+    """
+    positions = []
+    for line in lines:
+        parts = line.split(':')
+        if len(parts) < 11:
+            continue
+        centres = []
+        for i in range(11, len(parts) - 1, 2):
+            lat = parse_coordinate(parts[i])
+            lon = parse_coordinate(parts[i + 1])
+            if lat is not None and lon is not None:
+                centres.append((lat, lon))
+        positions.append(Position(parts[0], parts[1], parts[2], parts[3], parts[4], parts[5],
+                                  parts[6], parts[9], parts[10], tuple(centres)))
+    return positions
+
+
+def parse_sidsstars(lines):
+    """[SIDSSTARS] format: SID|STAR:airport:runway:name:route"""
+    routes = []
+    for line in lines:
+        parts = line.split(':')
+        if len(parts) < 4 or parts[0] not in ('SID', 'STAR'):
+            continue
+        fixes = tuple(parts[4].split()) if len(parts) > 4 else ()
+        routes.append(Route(parts[0], parts[1], parts[2], parts[3], fixes))
+    return routes
+
+
+def parse_airspace(lines):
+    """
+    [AIRSPACE] lines: SECTORLINE/COORD/DISPLAY geometry, CIRCLE_SECTORLINE,
+    SECTOR blocks with OWNER/ALTOWNER/BORDER/ACTIVE/DEPAPT/ARRAPT and COPX lines.
+    """
+    sector_lines = {}
+    circles = {}
+    sectors = {}
+    copx = []
+
+    line_id = None
+    coords = []
+    display = []
+    sector = None
+
+    def finish_line():
+        if line_id is not None:
+            sector_lines[line_id] = SectorLine(line_id, np.array(coords, dtype=np.float64).reshape(-1, 2),
+                                               tuple(display))
+
+    for line in lines:
+        keyword, _, rest = line.partition(':')
+        if keyword == 'COORD':
+            lat_text, _, lon_text = rest.partition(':')
+            lat = parse_coordinate(lat_text)
+            lon = parse_coordinate(lon_text)
+            if lat is not None and lon is not None:
+                coords.append((lat, lon))
+        elif keyword == 'SECTORLINE':
+            finish_line()
+            line_id = rest
+            coords = []
+            display = []
+        elif keyword == 'DISPLAY':
+            display.append(tuple(rest.split(':')))
+        elif keyword == 'CIRCLE_SECTORLINE':
+            parts = rest.split(':')
+            if len(parts) >= 4:
+                lat = parse_coordinate(parts[1])
+                lon = parse_coordinate(parts[2])
+                if lat is not None and lon is not None:
+                    circles[parts[0]] = CircleSectorLine(parts[0], lat, lon, float(parts[3]))
+        elif keyword == 'SECTOR':
+            parts = rest.split(':')
+            if len(parts) >= 3:
+                sector = Sector(parts[0], int(parts[1]), int(parts[2]), [], [], [], [], [], [])
+                sectors[sector.name] = sector
+        elif keyword in ('COPX', 'FIR_COPX'):
+            copx.append((keyword,) + tuple(rest.split(':')))
+        elif sector is not None:
+            parts = rest.split(':')
+            if keyword == 'OWNER':
+                sector.owners.extend(parts)
+            elif keyword == 'ALTOWNER':
+                sector.alt_owners.append(tuple(parts))
+            elif keyword == 'BORDER':
+                sector.borders.extend(parts)
+            elif keyword == 'ACTIVE':
+                sector.active.append(tuple(parts))
+            elif keyword == 'DEPAPT':
+                sector.departure_airports.extend(parts)
+            elif keyword == 'ARRAPT':
+                sector.arrival_airports.extend(parts)
+    finish_line()
+
+    return Airspace(sector_lines, circles, sectors, copx)
+
+
+def parse_radar(lines):
+    """
+    [RADAR] format:
+    RADAR2:name:lat:lon:PSR range:PSR alt:PSR cone:S range:S alt:S cone:C range:C alt:C cone
+    psr, smode and cmode are (range NM, altitude ft, cone slope) tuples.
+    """
+    sites = []
+    for line in lines:
+        parts = line.split(':')
+        if len(parts) < 13 or parts[0] != 'RADAR2':
+            continue
+        lat = parse_coordinate(parts[2])
+        lon = parse_coordinate(parts[3])
+        if lat is None or lon is None:
+            continue
+        try:
+            values = [int(value or 0) for value in parts[4:13]]
+        except ValueError:
+            continue
+        sites.append(RadarSite(parts[1], lat, lon, tuple(values[0:3]), tuple(values[3:6]), tuple(values[6:9])))
+    return sites
+
+
+def parse_freetext(lines):
+    """[FREETEXT] format: lat:lon:group:text"""
+    labels = []
+    for line in lines:
+        parts = line.split(':', 3)
+        if len(parts) < 4:
+            continue
+        lat = parse_coordinate(parts[0])
+        lon = parse_coordinate(parts[1])
+        if lat is not None and lon is not None:
+            labels.append(FreeText(lat, lon, parts[2], parts[3]))
+    return labels
+
+
+class RouteIndex:
+    """SID/STAR lookup by airport and runway, or by procedure name"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.by_runway = {}
+        self.by_name = {}
+        for route in routes:
+            self.by_runway.setdefault((route.kind, route.airport, route.runway), []).append(route)
+            self.by_runway.setdefault((route.kind, route.airport, None), []).append(route)
+            self.by_name.setdefault((route.kind, route.airport, route.name), []).append(route)
+
+    def find(self, kind, airport, runway=None):
+        """Routes of one kind at an airport, optionally for one runway"""
+        return self.by_runway.get((kind, airport, runway), [])
+
+    def named(self, kind, airport, name):
+        """Routes of one kind at an airport with a given procedure name (one per runway)"""
+        return self.by_name.get((kind, airport, name), [])
+
+
+class EseFile:
+    """Lazily parsed .ese file backed by a section byte-offset index"""
+
+    def __init__(self, path):
+        self.path = path
+        self.sections = index_sections(path)
+
+    def lines(self, section):
+        """Data lines of one section, read straight from its byte ranges in file order"""
+        byte_ranges = self.sections.get(section.upper(), ())
+        return chain.from_iterable(iter_section(self.path, byte_range) for byte_range in byte_ranges)
+
+    @cached_property
+    def positions(self):
+        return parse_positions(self.lines('POSITIONS'))
+
+    @cached_property
+    def routes(self):
+        return RouteIndex(parse_sidsstars(self.lines('SIDSSTARS')))
+
+    @cached_property
+    def airspace(self):
+        return parse_airspace(self.lines('AIRSPACE'))
+
+    @cached_property
+    def radars(self):
+        return parse_radar(self.lines('RADAR'))
+
+    @cached_property
+    def freetext(self):
+        return parse_freetext(self.lines('FREETEXT'))
+
+    def sids(self, airport, runway=None):
+        return self.routes.find('SID', airport, runway)
+
+    def stars(self, airport, runway=None):
+        return self.routes.find('STAR', airport, runway)
+
+
+def main():
+    """Print a summary of an .ese file and time a STAR lookup"""
+    path = sys.argv[1] if len(sys.argv) > 1 else "FASA-Package_20251004101136-251001-0002.ese"
+
+    started = time.perf_counter()
+    ese = EseFile(path)
+    index_time = time.perf_counter() - started
+    print(f"📁 Indexed {len(ese.sections)} sections of {path} in {index_time * 1000:.2f} ms")
+    for name, byte_ranges in ese.sections.items():
+        print(f"   [{name}] bytes {', '.join(f'{start}-{end}' for start, end in byte_ranges)}")
+
+    started = time.perf_counter()
+    routes = ese.routes
+    print(f"🛫 {len(routes.routes)} SIDs/STARs parsed in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    repeat = 100000
+    started = time.perf_counter()
+    for _ in range(repeat):
+        stars = ese.stars('FACT', '19')
+    lookup_time = (time.perf_counter() - started) / repeat
+    print(f"🔍 STARs serving FACT 19: {', '.join(route.name for route in stars)}")
+    print(f"   Lookup: {lookup_time * 1e6:.3f} µs")
+
+    print(f"📡 {len(ese.positions)} positions, {len(ese.radars)} radar sites")
+    airspace = ese.airspace
+    print(f"🗺️ {len(airspace.sector_lines)} sector lines, {len(airspace.circles)} circle lines, "
+          f"{len(airspace.sectors)} sectors")
+    print(f"📝 {len(ese.freetext)} free text labels")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,9 @@ def parse_sector_file(filename):
         'RUNWAY': [],
         'VOR': [],
         'NDB': [],
-        'FIXES': []
+        'FIXES': [],
+        'HIGH AIRWAY': [],
+        'LOW AIRWAY': []
     }
     
     current_section = None
@@ -108,9 +110,19 @@ def write_nav_data(sections, output_dir="nav_data"):
                     f.write(f"{ident},{coords},\n")
                 else:
                     f.write(f"{ident},{coords},\n")
+    
+    # Write Airway segments; endpoints are coordinates or repeated fix names
+    with open(f"{output_dir}/airways.txt", "w") as f:
+        f.write("Airway,Level,Lat1,Lon1,Lat2,Lon2\n")
+        for level, section in (('HIGH', 'HIGH AIRWAY'), ('LOW', 'LOW AIRWAY')):
+            for line in sections[section]:
+                parts = line.split()
+                if len(parts) >= 5:
+                    airway = ' '.join(parts[:-4])
+                    lat1, lon1, lat2, lon2 = parts[-4:]
+                    f.write(f"{airway},{level},{lat1},{lon1},{lat2},{lon2}\n")
 
-def main():
-    input_file = "FASA-Package_20251004101136-251001-0002.sct"
+def main(input_file="FASA-Package_20251004101136-251001-0002.sct", output_dir="nav_data"):
     
     try:
         print("Parsing sector file...")
@@ -121,11 +133,12 @@ def main():
         print(f"Found {len(sections['VOR'])} VORs")
         print(f"Found {len(sections['NDB'])} NDBs")
         print(f"Found {len(sections['FIXES'])} fixes")
+        print(f"Found {len(sections['HIGH AIRWAY']) + len(sections['LOW AIRWAY'])} airway segments")
         
         print("Writing navigation data to files...")
-        write_nav_data(sections)
+        write_nav_data(sections, output_dir)
         
-        print("Done! Check the 'nav_data' folder for the output files.")
+        print(f"Done! Check the '{output_dir}' folder for the output files.")
         
     except Exception as e:
         print(f"Error: {e}")
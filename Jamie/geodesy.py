@@ -0,0 +1,375 @@
+"""
+Geodesy: distances, bearings and destination points on the sphere and on
+the WGS-84 ellipsoid
+Every function comes as a scalar version on plain floats (math only, fastest
+for one pair) and a vectorized _array version taking NumPy arrays of point
+pairs. Distances are in nautical miles, angles in degrees, bearings true.
+Great-circle formulas use the mean earth radius; the Vincenty ones are
+accurate to well under a metre.
+"""
+
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+EARTH_RADIUS_NM = 3440.065
+
+METRES_PER_NM = 1852.0
+
+# WGS-84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+# Vincenty iterations stop once the change drops below this (radians, ~0.06 mm)
+VINCENTY_TOLERANCE = 1e-12
+VINCENTY_MAX_ITERATIONS = 200
+
+# Matrix rows computed per block, which bounds the temporary arrays
+MATRIX_BLOCK_CELLS = 4_000_000
+
+
+def great_circle_nm(lat1, lon1, lat2, lon2):
+    """Haversine great-circle distance between two points"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_NM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def great_circle_nm_array(lat1, lon1, lat2, lon2):
+    """Haversine great-circle distances (scalars or broadcastable arrays)"""
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """Great-circle initial true bearing from the first point to the second, 0-360"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dlon = math.radians(lon2 - lon1)
+    y = math.sin(dlon) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlon)
+    return math.degrees(math.atan2(y, x)) % 360
+
+
+def initial_bearing_array(lat1, lon1, lat2, lon2):
+    """Great-circle initial true bearings, 0-360 (scalars or broadcastable arrays)"""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dlon = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    y = np.sin(dlon) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlon)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+
+def destination(lat, lon, bearing, distance_nm):
+    """(lat, lon) reached by following a great circle from a point on an initial bearing"""
+    phi1 = math.radians(lat)
+    theta = math.radians(bearing)
+    delta = distance_nm / EARTH_RADIUS_NM
+    phi2 = math.asin(math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta))
+    lon2 = math.radians(lon) + math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi1),
+                                          math.cos(delta) - math.sin(phi1) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lon2) + 540) % 360 - 180
+
+
+def destination_array(lat, lon, bearing, distance_nm):
+    """(lats, lons) reached along great circles from points on initial bearings (broadcastable arrays)"""
+    phi1 = np.radians(lat)
+    theta = np.radians(bearing)
+    delta = np.asarray(distance_nm, dtype=np.float64) / EARTH_RADIUS_NM
+    phi2 = np.arcsin(np.sin(phi1) * np.cos(delta) + np.cos(phi1) * np.sin(delta) * np.cos(theta))
+    lon2 = np.radians(lon) + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(phi1),
+                                        np.cos(delta) - np.sin(phi1) * np.sin(phi2))
+    return np.degrees(phi2), (np.degrees(lon2) + 540) % 360 - 180
+
+
+def _sigma_correction(B, sin_sigma, cos_sigma, cos_2sigma_m):
+    return B * sin_sigma * (cos_2sigma_m + B / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+        - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+
+
+def _series(cos_sq_alpha):
+    """Vincenty's A and B coefficients"""
+    u_sq = cos_sq_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    return A, B
+
+
+def vincenty_inverse(lat1, lon1, lat2, lon2):
+    """
+    (distance NM, initial bearing, final bearing) on the WGS-84 ellipsoid.
+    Nearly antipodal points, where the iteration does not converge, fall
+    back to the great circle.
+    """
+    L = math.radians(lon2 - lon1)
+    U1 = math.atan((1 - WGS84_F) * math.tan(math.radians(lat1)))
+    U2 = math.atan((1 - WGS84_F) * math.tan(math.radians(lat2)))
+    sin_U1, cos_U1 = math.sin(U1), math.cos(U1)
+    sin_U2, cos_U2 = math.sin(U2), math.cos(U2)
+
+    lam = L
+    for _ in range(VINCENTY_MAX_ITERATIONS):
+        sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+        sin_sigma = math.hypot(cos_U2 * sin_lam, cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lam)
+        if sin_sigma == 0:
+            return 0.0, 0.0, 0.0
+        cos_sigma = sin_U1 * sin_U2 + cos_U1 * cos_U2 * cos_lam
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = cos_U1 * cos_U2 * sin_lam / sin_sigma
+        cos_sq_alpha = 1 - sin_alpha ** 2
+        cos_2sigma_m = cos_sigma - 2 * sin_U1 * sin_U2 / cos_sq_alpha if cos_sq_alpha else 0.0
+        C = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+        previous = lam
+        lam = L + (1 - C) * WGS84_F * sin_alpha * (
+            sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+        if abs(lam - previous) < VINCENTY_TOLERANCE:
+            break
+    else:
+        return (great_circle_nm(lat1, lon1, lat2, lon2), initial_bearing(lat1, lon1, lat2, lon2),
+                (initial_bearing(lat2, lon2, lat1, lon1) + 180) % 360)
+
+    A, B = _series(cos_sq_alpha)
+    distance = WGS84_B * A * (sigma - _sigma_correction(B, sin_sigma, cos_sigma, cos_2sigma_m))
+    sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+    forward = math.atan2(cos_U2 * sin_lam, cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lam)
+    final = math.atan2(cos_U1 * sin_lam, -sin_U1 * cos_U2 + cos_U1 * sin_U2 * cos_lam)
+    return distance / METRES_PER_NM, math.degrees(forward) % 360, math.degrees(final) % 360
+
+
+def vincenty_inverse_array(lat1, lon1, lat2, lon2):
+    """
+    Arrays of (distance NM, initial bearing, final bearing) on the WGS-84
+    ellipsoid. Pairs iterate until they converge; the few that never do
+    (nearly antipodal) fall back to the great circle.
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64)
+                                                   for value in (lat1, lon1, lat2, lon2)))
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat2)))
+    sin_U1, cos_U1 = np.sin(U1), np.cos(U1)
+    sin_U2, cos_U2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    # Flat indices still iterating; converged pairs drop out of the work arrays
+    active = np.arange(L.size)
+    flat = [values.reshape(-1) for values in (L, sin_U1, cos_U1, sin_U2, cos_U2)]
+    lam_flat = lam.reshape(-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(VINCENTY_MAX_ITERATIONS):
+            L_a, sin_U1_a, cos_U1_a, sin_U2_a, cos_U2_a = (values[active] for values in flat)
+            lam_a = lam_flat[active]
+            sin_lam, cos_lam = np.sin(lam_a), np.cos(lam_a)
+            sin_sigma = np.hypot(cos_U2_a * sin_lam, cos_U1_a * sin_U2_a - sin_U1_a * cos_U2_a * cos_lam)
+            cos_sigma = sin_U1_a * sin_U2_a + cos_U1_a * cos_U2_a * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_U1_a * cos_U2_a * sin_lam / sin_sigma)
+            cos_sq_alpha = 1 - sin_alpha ** 2
+            cos_2sigma_m = np.where(cos_sq_alpha == 0, 0.0, cos_sigma - 2 * sin_U1_a * sin_U2_a / cos_sq_alpha)
+            C = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+            updated = L_a + (1 - C) * WGS84_F * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            moving = np.abs(updated - lam_a) >= VINCENTY_TOLERANCE
+            lam_flat[active] = updated
+            active = active[moving]
+            if not len(active):
+                break
+        unconverged = np.zeros(L.shape, dtype=bool)
+        unconverged.reshape(-1)[active] = True
+
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cos_U2 * sin_lam, cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lam)
+        cos_sigma = sin_U1 * sin_U2 + cos_U1 * cos_U2 * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        sin_alpha = np.where(sin_sigma == 0, 0.0, cos_U1 * cos_U2 * sin_lam / sin_sigma)
+        cos_sq_alpha = 1 - sin_alpha ** 2
+        cos_2sigma_m = np.where(cos_sq_alpha == 0, 0.0, cos_sigma - 2 * sin_U1 * sin_U2 / cos_sq_alpha)
+
+    A, B = _series(cos_sq_alpha)
+    distance = WGS84_B * A * (sigma - _sigma_correction(B, sin_sigma, cos_sigma, cos_2sigma_m)) / METRES_PER_NM
+    forward = np.degrees(np.arctan2(cos_U2 * sin_lam, cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lam)) % 360
+    final = np.degrees(np.arctan2(cos_U1 * sin_lam, -sin_U1 * cos_U2 + cos_U1 * sin_U2 * cos_lam)) % 360
+
+    same = sin_sigma == 0
+    distance, forward, final = (np.where(same, 0.0, values) for values in (distance, forward, final))
+    if unconverged.any():
+        distance = np.where(unconverged, great_circle_nm_array(lat1, lon1, lat2, lon2), distance)
+        forward = np.where(unconverged, initial_bearing_array(lat1, lon1, lat2, lon2), forward)
+        final = np.where(unconverged, (initial_bearing_array(lat2, lon2, lat1, lon1) + 180) % 360, final)
+    return distance, forward, final
+
+
+def vincenty_direct(lat, lon, bearing, distance_nm):
+    """(lat, lon, final bearing) reached along the WGS-84 geodesic from a point"""
+    alpha1 = math.radians(bearing)
+    sin_alpha1, cos_alpha1 = math.sin(alpha1), math.cos(alpha1)
+    tan_U1 = (1 - WGS84_F) * math.tan(math.radians(lat))
+    cos_U1 = 1 / math.sqrt(1 + tan_U1 ** 2)
+    sin_U1 = tan_U1 * cos_U1
+    sigma1 = math.atan2(tan_U1, cos_alpha1)
+    sin_alpha = cos_U1 * sin_alpha1
+    cos_sq_alpha = 1 - sin_alpha ** 2
+    A, B = _series(cos_sq_alpha)
+
+    start = distance_nm * METRES_PER_NM / (WGS84_B * A)
+    sigma = start
+    for _ in range(VINCENTY_MAX_ITERATIONS):
+        cos_2sigma_m = math.cos(2 * sigma1 + sigma)
+        sin_sigma, cos_sigma = math.sin(sigma), math.cos(sigma)
+        previous = sigma
+        sigma = start + _sigma_correction(B, sin_sigma, cos_sigma, cos_2sigma_m)
+        if abs(sigma - previous) < VINCENTY_TOLERANCE:
+            break
+    sin_sigma, cos_sigma = math.sin(sigma), math.cos(sigma)
+    cos_2sigma_m = math.cos(2 * sigma1 + sigma)
+
+    x = sin_U1 * sin_sigma - cos_U1 * cos_sigma * cos_alpha1
+    lat2 = math.atan2(sin_U1 * cos_sigma + cos_U1 * sin_sigma * cos_alpha1,
+                      (1 - WGS84_F) * math.hypot(sin_alpha, x))
+    lam = math.atan2(sin_sigma * sin_alpha1, cos_U1 * cos_sigma - sin_U1 * sin_sigma * cos_alpha1)
+    C = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+    L = lam - (1 - C) * WGS84_F * sin_alpha * (
+        sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+    lon2 = (lon + math.degrees(L) + 540) % 360 - 180
+    return math.degrees(lat2), lon2, math.degrees(math.atan2(sin_alpha, -x)) % 360
+
+
+def vincenty_direct_array(lat, lon, bearing, distance_nm):
+    """(lats, lons, final bearings) reached along WGS-84 geodesics from points (broadcastable arrays)"""
+    lat, lon, bearing, distance_nm = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64)
+                                                           for value in (lat, lon, bearing, distance_nm)))
+    alpha1 = np.radians(bearing)
+    sin_alpha1, cos_alpha1 = np.sin(alpha1), np.cos(alpha1)
+    tan_U1 = (1 - WGS84_F) * np.tan(np.radians(lat))
+    cos_U1 = 1 / np.sqrt(1 + tan_U1 ** 2)
+    sin_U1 = tan_U1 * cos_U1
+    sigma1 = np.arctan2(tan_U1, cos_alpha1)
+    sin_alpha = cos_U1 * sin_alpha1
+    cos_sq_alpha = 1 - sin_alpha ** 2
+    A, B = _series(cos_sq_alpha)
+
+    start = distance_nm * METRES_PER_NM / (WGS84_B * A)
+    sigma = start.copy()
+    for _ in range(VINCENTY_MAX_ITERATIONS):
+        cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+        updated = start + _sigma_correction(B, np.sin(sigma), np.cos(sigma), cos_2sigma_m)
+        converged = np.all(np.abs(updated - sigma) < VINCENTY_TOLERANCE)
+        sigma = updated
+        if converged:
+            break
+    sin_sigma, cos_sigma = np.sin(sigma), np.cos(sigma)
+    cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+
+    x = sin_U1 * sin_sigma - cos_U1 * cos_sigma * cos_alpha1
+    lat2 = np.arctan2(sin_U1 * cos_sigma + cos_U1 * sin_sigma * cos_alpha1,
+                      (1 - WGS84_F) * np.hypot(sin_alpha, x))
+    lam = np.arctan2(sin_sigma * sin_alpha1, cos_U1 * cos_sigma - sin_U1 * sin_sigma * cos_alpha1)
+    C = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+    L = lam - (1 - C) * WGS84_F * sin_alpha * (
+        sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+    lon2 = (lon + np.degrees(L) + 540) % 360 - 180
+    return np.degrees(lat2), lon2, np.degrees(np.arctan2(sin_alpha, -x)) % 360
+
+
+def distance_matrix(lats1, lons1, lats2, lons2, ellipsoid=False):
+    """
+    (n, m) distances in NM from every first point to every second point,
+    great circle or WGS-84, computed in row blocks to bound memory
+    """
+    lats1 = np.asarray(lats1, dtype=np.float64)
+    lons1 = np.asarray(lons1, dtype=np.float64)
+    lats2 = np.asarray(lats2, dtype=np.float64)
+    lons2 = np.asarray(lons2, dtype=np.float64)
+    matrix = np.empty((len(lats1), len(lats2)), dtype=np.float64)
+    block = max(1, MATRIX_BLOCK_CELLS // max(len(lats2), 1))
+    for start in range(0, len(lats1), block):
+        rows = slice(start, start + block)
+        if ellipsoid:
+            matrix[rows] = vincenty_inverse_array(lats1[rows, None], lons1[rows, None],
+                                                  lats2[None, :], lons2[None, :])[0]
+        else:
+            matrix[rows] = great_circle_nm_array(lats1[rows, None], lons1[rows, None],
+                                                 lats2[None, :], lons2[None, :])
+    return matrix
+
+
+def _throughput(label, count, scalar, batch):
+    started = time.perf_counter()
+    scalar()
+    scalar_time = time.perf_counter() - started
+    started = time.perf_counter()
+    batch()
+    batch_time = time.perf_counter() - started
+    print(f"   {label:<18} scalar {count / scalar_time:>12,.0f}/s   batch {count / batch_time:>13,.0f}/s "
+          f"({scalar_time / batch_time:.0f}x)")
+
+
+def benchmark(count=200000):
+    """Scalar loops against batch calls, accuracy checks and a VOR x airport matrix"""
+    rng = np.random.default_rng(0)
+    lat1 = rng.uniform(-60, 60, count)
+    lon1 = rng.uniform(-180, 180, count)
+    lat2 = np.clip(lat1 + rng.uniform(-20, 20, count), -89, 89)
+    lon2 = lon1 + rng.uniform(-20, 20, count)
+    bearings = rng.uniform(0, 360, count)
+    distances = rng.uniform(0, 1000, count)
+    pairs = list(zip(lat1.tolist(), lon1.tolist(), lat2.tolist(), lon2.tolist()))
+    moves = list(zip(lat1.tolist(), lon1.tolist(), bearings.tolist(), distances.tolist()))
+
+    print(f"🌍 {count} point pairs")
+    _throughput("great circle", count, lambda: [great_circle_nm(*pair) for pair in pairs],
+                lambda: great_circle_nm_array(lat1, lon1, lat2, lon2))
+    _throughput("initial bearing", count, lambda: [initial_bearing(*pair) for pair in pairs],
+                lambda: initial_bearing_array(lat1, lon1, lat2, lon2))
+    _throughput("destination", count, lambda: [destination(*move) for move in moves],
+                lambda: destination_array(lat1, lon1, bearings, distances))
+    _throughput("vincenty inverse", count, lambda: [vincenty_inverse(*pair) for pair in pairs],
+                lambda: vincenty_inverse_array(lat1, lon1, lat2, lon2))
+    _throughput("vincenty direct", count, lambda: [vincenty_direct(*move) for move in moves],
+                lambda: vincenty_direct_array(lat1, lon1, bearings, distances))
+
+    # Scalar and batch agree, and the direct problem inverts the inverse one
+    sample = 2000
+    scalar = np.array([vincenty_inverse(*pair) for pair in pairs[:sample]])
+    batch = np.column_stack(vincenty_inverse_array(lat1[:sample], lon1[:sample], lat2[:sample], lon2[:sample]))
+    back_lat, back_lon, _ = vincenty_direct_array(lat1[:sample], lon1[:sample], batch[:, 1], batch[:, 0])
+    round_trip = great_circle_nm_array(back_lat, back_lon, lat2[:sample], lon2[:sample]) * METRES_PER_NM
+    sphere = great_circle_nm_array(lat1, lon1, lat2, lon2)
+    ellipsoid = vincenty_inverse_array(lat1, lon1, lat2, lon2)[0]
+    print(f"✅ Scalar vs batch Vincenty: {np.abs(scalar - batch).max():.2e} max difference, "
+          f"direct/inverse round trip within {round_trip.max() * 1000:.3f} mm")
+    print(f"   Sphere vs ellipsoid: {np.abs(sphere - ellipsoid).max():.2f} NM worst, "
+          f"{np.median(np.abs(sphere - ellipsoid) / np.maximum(ellipsoid, 1e-9)):.3%} median")
+
+    # Every VOR against every airport of the world airport database
+    from nav_store import load_icao_airports, load_nav_data
+    vors = load_nav_data("nav_data").tables['vors'].columns
+    airports = load_icao_airports(os.path.join("FASA", "NavData", "icao.txt")).tables['world_airports'].columns
+    for ellipsoidal in (False, True):
+        started = time.perf_counter()
+        matrix = distance_matrix(vors['lat'], vors['lon'], airports['lat'], airports['lon'], ellipsoidal)
+        elapsed = time.perf_counter() - started
+        print(f"📐 {matrix.shape[0]} VORs x {matrix.shape[1]} airports "
+              f"{'WGS-84' if ellipsoidal else 'great circle'} matrix in {elapsed * 1000:.0f} ms "
+              f"({matrix.size / elapsed:,.0f} pairs/s)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    benchmark(count)
+
+
+if __name__ == "__main__":
+    main()
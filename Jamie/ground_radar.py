@@ -0,0 +1,428 @@
+"""
+GroundRadar plugin maps and stands reader
+(FASA/Plugins/GroundRadar/GRpluginMaps.txt and GRpluginStands.txt)
+One regex pre-pass over each memory-mapped file records the byte ranges of
+every airport's MAP blocks and STAND entries; an airport's maps and stands are
+only parsed when it is first asked for and then kept in an LRU cache bounded
+by a memory budget.
+"""
+
+import mmap
+import os
+import re
+import sys
+import time
+from collections import OrderedDict, namedtuple
+from functools import cached_property
+
+import numpy as np
+
+from coordinates import parse_coordinate
+from topsky_maps import ShapeColumns, Shape, read_point
+
+GROUND_RADAR_DIR = os.path.join("FASA", "Plugins", "GroundRadar")
+GROUND_RADAR_ENCODING = 'latin-1'
+
+# Default memory budget of the parsed airport cache
+CACHE_BUDGET = 16 * 1024 * 1024
+
+# Shape kinds of a ground map; 'region' is a run of COORD lines
+SHAPE_KINDS = ('region', 'line', 'text', 'symbol', 'circle')
+REGION, LINE, TEXT, SYMBOL, CIRCLE = range(len(SHAPE_KINDS))
+
+# Block headers of the maps file; anything outside a MAP block is shared by every airport
+BLOCK_PATTERN = re.compile(rb'^(MAP|SYMBOLDEF):', re.M)
+AIRPORT_PATTERN = re.compile(rb'^AIRPORT:([^\r\n]*)', re.M)
+STAND_PATTERN = re.compile(rb'^STAND:([^:\r\n]*):', re.M)
+
+Stand = namedtuple('Stand', ['airport', 'name', 'lat', 'lon', 'radius', 'use', 'wtc', 'properties'])
+GroundMap = namedtuple('GroundMap', ['name', 'folder', 'properties', 'first', 'last'])
+
+
+def _map_file(path):
+    f = open(path, 'rb')
+    if os.fstat(f.fileno()).st_size == 0:
+        f.close()
+        return None, b''
+    return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def index_maps(path):
+    """
+    Byte ranges of the maps file: ({airport: [(start, end), ...]}, [shared ranges]).
+    Shared ranges hold the COLORDEF header and SYMBOLDEF blocks.
+    """
+    airports = {}
+    shared = []
+    f, data = _map_file(path)
+    try:
+        size = len(data)
+        starts = [(match.start(), match.group(1)) for match in BLOCK_PATTERN.finditer(data)]
+        shared.append((0, starts[0][0] if starts else size))
+        for i, (start, kind) in enumerate(starts):
+            end = starts[i + 1][0] if i + 1 < len(starts) else size
+            if kind == b'SYMBOLDEF':
+                shared.append((start, end))
+                continue
+            airport = AIRPORT_PATTERN.search(data, start, end)
+            icao = airport.group(1).decode(GROUND_RADAR_ENCODING).strip().upper() if airport else ''
+            ranges = airports.setdefault(icao, [])
+            # Neighbouring blocks of one airport are merged into one read
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+    finally:
+        if f is not None:
+            data.close()
+            f.close()
+    return airports, shared
+
+
+def index_stands(path):
+    """Byte ranges of every airport's STAND entries: {airport: [(start, end), ...]}"""
+    airports = {}
+    f, data = _map_file(path)
+    try:
+        size = len(data)
+        starts = [(match.start(), match.group(1)) for match in STAND_PATTERN.finditer(data)]
+        for i, (start, icao) in enumerate(starts):
+            end = starts[i + 1][0] if i + 1 < len(starts) else size
+            ranges = airports.setdefault(icao.decode(GROUND_RADAR_ENCODING).strip().upper(), [])
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+    finally:
+        if f is not None:
+            data.close()
+            f.close()
+    return airports
+
+
+def read_ranges(path, ranges):
+    """Yield the stripped, non-comment lines of some byte ranges of a file"""
+    with open(path, 'rb') as f:
+        for start, end in ranges:
+            f.seek(start)
+            for raw in f.read(end - start).decode(GROUND_RADAR_ENCODING).splitlines():
+                line = raw.strip()
+                if line and line[0] not in ';/':
+                    yield line
+
+
+class GroundLayout:
+    """One airport's ground maps with all coordinates in packed arrays"""
+
+    def __init__(self, airport, maps, arrays, strings, shape_kinds, shape_colors, shape_params):
+        self.airport = airport
+        self.maps = maps
+        self.coords = arrays['coords']
+        self.refs = arrays['refs']
+        self.starts = arrays['starts']
+        self.strings = strings
+        self.shape_kinds = shape_kinds
+        self.shape_colors = shape_colors
+        self.shape_params = shape_params
+
+    def __len__(self):
+        return len(self.maps)
+
+    def shape(self, index):
+        start = self.starts[index]
+        end = self.starts[index + 1]
+        strings = self.strings
+        return Shape(SHAPE_KINDS[self.shape_kinds[index]], self.coords[start:end],
+                     [strings[ref] for ref in self.refs[start:end].tolist()],
+                     strings[self.shape_colors[index]], strings[self.shape_params[index]])
+
+    def shapes(self, ground_map, kind=None):
+        """Shapes of one GroundMap; Shape.text holds the colour of each shape"""
+        code = SHAPE_KINDS.index(kind) if kind is not None else None
+        for index in range(ground_map.first, ground_map.last):
+            if code is None or self.shape_kinds[index] == code:
+                yield self.shape(index)
+
+    def nbytes(self):
+        arrays = (self.coords, self.refs, self.starts, self.shape_kinds, self.shape_colors, self.shape_params)
+        return sum(values.nbytes for values in arrays) + self.strings.nbytes() + 200 * len(self.maps)
+
+
+def parse_layout(airport, lines):
+    """
+    Parse the MAP blocks of one airport. COORD runs become regions, closed
+    by COORDTYPE, COLOR or any other keyword; LINE, TEXT, SYMBOL and CIRCLE
+    lines become one shape each.
+    """
+    columns = ShapeColumns()
+    strings = columns.strings
+    kinds = []
+    colors = []
+    params = []
+    maps = []
+    current = None
+    color = ''
+    coordtype = ''
+    pending = 0
+
+    def add_shape(kind, param=''):
+        columns.close_shape()
+        kinds.append(kind)
+        colors.append(strings.intern(color))
+        params.append(strings.intern(param))
+
+    def close_region():
+        nonlocal pending
+        if pending:
+            add_shape(REGION, coordtype)
+            pending = 0
+
+    def finish_map():
+        if current is not None:
+            close_region()
+            maps.append(GroundMap(current[0], current[1], tuple(current[2]), current[3], len(kinds)))
+
+    for line in lines:
+        keyword, _, rest = line.partition(':')
+        keyword = keyword.upper()
+        fields = rest.split(':')
+        if keyword == 'COORD':
+            lat, lon, ref, _ = read_point(fields, 0)
+            columns.add_vertex(lat, lon, ref)
+            pending += 1
+            continue
+        if keyword == 'MAP':
+            finish_map()
+            current = [rest, '', [], len(kinds)]
+            color = ''
+            coordtype = ''
+            continue
+        if current is None:
+            continue
+        close_region()
+        if keyword == 'COLOR':
+            color = rest
+        elif keyword == 'COORDTYPE':
+            coordtype = rest
+        elif keyword == 'FOLDER':
+            current[1] = rest
+        elif keyword == 'LINE':
+            lat, lon, ref, index = read_point(fields, 0)
+            columns.add_vertex(lat, lon, ref)
+            lat, lon, ref, index = read_point(fields, index)
+            columns.add_vertex(lat, lon, ref)
+            add_shape(LINE, coordtype)
+        elif keyword == 'TEXT':
+            lat, lon, ref, index = read_point(fields, 0)
+            columns.add_vertex(lat, lon, ref)
+            add_shape(TEXT, ':'.join(fields[index:]))
+        elif keyword == 'SYMBOL' and len(fields) >= 2:
+            lat, lon, ref, index = read_point(fields, 1)
+            columns.add_vertex(lat, lon, ref)
+            add_shape(SYMBOL, ':'.join([fields[0]] + fields[index:]))
+        elif keyword == 'CIRCLE':
+            lat, lon, ref, index = read_point(fields, 0)
+            columns.add_vertex(lat, lon, ref)
+            add_shape(CIRCLE, ':'.join(fields[index:]))
+        else:
+            current[2].append((keyword, rest))
+    finish_map()
+
+    strings.freeze()
+    return GroundLayout(airport, maps, columns.arrays(), strings, np.asarray(kinds, dtype=np.uint8),
+                        np.asarray(colors, dtype=np.int32), np.asarray(params, dtype=np.int32))
+
+
+def parse_stands(lines):
+    """
+    Parse STAND entries: STAND:airport:name:lat:lon:radius followed by
+    USE, WTC and other property lines (BLOCKS, ADEP, CALLSIGN, PRIORITY, ...).
+    """
+    stands = []
+    current = None
+
+    def finish_stand():
+        if current is not None:
+            properties = tuple(current[7])
+            use = next((value for key, value in properties if key == 'USE'), '')
+            wtc = next((value for key, value in properties if key == 'WTC'), '')
+            stands.append(Stand(*current[:5], use, wtc, properties))
+
+    for line in lines:
+        keyword, _, rest = line.partition(':')
+        keyword = keyword.upper()
+        if keyword == 'STAND':
+            finish_stand()
+            parts = rest.split(':')
+            if len(parts) < 5:
+                current = None
+                continue
+            lat = parse_coordinate(parts[2])
+            lon = parse_coordinate(parts[3])
+            try:
+                radius = float(parts[4])
+            except ValueError:
+                radius = 0.0
+            current = [parts[0], parts[1], lat, lon, radius, '', '', []]
+        elif current is not None:
+            current[7].append((keyword, rest))
+    finish_stand()
+    return stands
+
+
+class AirportGround:
+    """Parsed ground layout and stands of one airport"""
+    __slots__ = ('airport', 'layout', 'stands', '_stand_index')
+
+    def __init__(self, airport, layout, stands):
+        self.airport = airport
+        self.layout = layout
+        self.stands = stands
+        self._stand_index = {stand.name: stand for stand in stands}
+
+    def stand(self, name):
+        return self._stand_index.get(name)
+
+    def stand_coords(self):
+        """(n, 2) array of stand positions"""
+        return np.array([(stand.lat, stand.lon) for stand in self.stands], dtype=np.float64).reshape(-1, 2)
+
+    def nbytes(self):
+        """Approximate memory held, used against the cache budget"""
+        return self.layout.nbytes() + sum(sys.getsizeof(stand) + 64 * len(stand.properties)
+                                          for stand in self.stands)
+
+
+class LruCache:
+    """Least-recently-used cache evicting entries once their nbytes() exceed a budget"""
+
+    def __init__(self, budget=CACHE_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.total -= self.sizes.pop(key)
+            del self.entries[key]
+        size = value.nbytes()
+        self.entries[key] = value
+        self.sizes[key] = size
+        self.total += size
+        # The newest entry always stays, even if it alone is over budget
+        while self.total > self.budget and len(self.entries) > 1:
+            old_key, _ = self.entries.popitem(last=False)
+            self.total -= self.sizes.pop(old_key)
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class GroundRadarData:
+    """Per-airport lazy access to the GroundRadar maps and stands files"""
+
+    def __init__(self, directory=GROUND_RADAR_DIR, budget=CACHE_BUDGET):
+        self.maps_path = os.path.join(directory, "GRpluginMaps.txt")
+        self.stands_path = os.path.join(directory, "GRpluginStands.txt")
+        self.map_ranges, self.shared_ranges = index_maps(self.maps_path)
+        self.stand_ranges = index_stands(self.stands_path) if os.path.exists(self.stands_path) else {}
+        self.cache = LruCache(budget)
+
+    def airports(self):
+        """Airports with maps or stands"""
+        return sorted((set(self.map_ranges) | set(self.stand_ranges)) - {''})
+
+    @cached_property
+    def colors(self):
+        """COLORDEF name -> (r, g, b) from the shared part of the maps file"""
+        colors = {}
+        for line in read_ranges(self.maps_path, self.shared_ranges):
+            parts = line.split(':')
+            if parts[0].upper() == 'COLORDEF' and len(parts) >= 5:
+                colors[parts[1]] = tuple(int(value) for value in parts[2:5])
+        return colors
+
+    @cached_property
+    def symbols(self):
+        """SYMBOLDEF name -> list of drawing command lines"""
+        symbols = {}
+        current = None
+        for line in read_ranges(self.maps_path, self.shared_ranges):
+            keyword, _, rest = line.partition(':')
+            if keyword.upper() == 'SYMBOLDEF':
+                current = symbols.setdefault(rest, [])
+            elif current is not None and keyword.upper() != 'COLORDEF':
+                current.append(line)
+        return symbols
+
+    def airport(self, icao):
+        """AirportGround of one airport, parsed on first use and then cached"""
+        icao = icao.upper()
+        ground = self.cache.get(icao)
+        if ground is None:
+            layout = parse_layout(icao, read_ranges(self.maps_path, self.map_ranges.get(icao, [])))
+            stands = parse_stands(read_ranges(self.stands_path, self.stand_ranges.get(icao, [])))
+            ground = AirportGround(icao, layout, stands)
+            self.cache.put(icao, ground)
+        return ground
+
+    def layout(self, icao):
+        return self.airport(icao).layout
+
+    def stands(self, icao):
+        return self.airport(icao).stands
+
+
+def main():
+    """Time the index pre-pass, one airport cold and warm, and every airport under a small budget"""
+    directory = sys.argv[1] if len(sys.argv) > 1 else GROUND_RADAR_DIR
+    icao = sys.argv[2] if len(sys.argv) > 2 else "FACT"
+
+    started = time.perf_counter()
+    data = GroundRadarData(directory)
+    index_time = time.perf_counter() - started
+    print(f"📁 Indexed {len(data.airports())} airports in {index_time * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    ground = data.airport(icao)
+    cold_time = time.perf_counter() - started
+    started = time.perf_counter()
+    data.airport(icao)
+    warm_time = time.perf_counter() - started
+    print(f"🛬 {icao}: {len(ground.layout)} maps, {len(ground.layout.coords)} points, {len(ground.stands)} stands "
+          f"({ground.nbytes() / 1024:.0f} KiB)")
+    print(f"   Cold: {cold_time * 1000:.2f} ms, cached: {warm_time * 1e6:.1f} µs")
+
+    started = time.perf_counter()
+    full = parse_layout('', read_ranges(data.maps_path, [(0, os.path.getsize(data.maps_path))]))
+    full_time = time.perf_counter() - started
+    print(f"   Whole file parse for comparison: {full_time * 1000:.1f} ms, {len(full.coords)} points")
+
+    small = GroundRadarData(directory, budget=512 * 1024)
+    started = time.perf_counter()
+    for airport in small.airports():
+        small.airport(airport)
+    sweep_time = time.perf_counter() - started
+    print(f"🔁 All airports under a 512 KiB budget in {sweep_time * 1000:.1f} ms: {len(small.cache)} cached "
+          f"({small.cache.total / 1024:.0f} KiB), {small.cache.evictions} evicted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Memory-mapped lookups into the world airport files
+(FASA/NavData/icao.txt and FASA/ICAO/ICAO_Airports.txt)
+A sorted ICAO code -> byte offset index is built once and cached next to the
+source file (invalidated by its mtime and size); rows are only decoded when
+asked for. Fuzzy name search runs over a trigram index built on first use.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from npz_cache import CACHE_ERRORS, save_npz
+
+ICAO_ENCODING = 'latin-1'
+
+# Column layouts of the two world airport files
+NAVDATA_COLUMNS = ('icao', 'lat', 'lon', 'name')
+AIRPORTS_COLUMNS = ('icao', 'name', 'country')
+
+# Magic, source mtime_ns and size, row count and key width
+INDEX_MAGIC = b'ICAOIDX2'
+INDEX_HEADER = struct.Struct('<8sqqII')
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _scan_rows(data):
+    """(key, line offset) for every data line of a mapped file"""
+    keys = []
+    offsets = []
+    position = 0
+    size = len(data)
+    while position < size:
+        line_end = data.find(b'\n', position)
+        if line_end == -1:
+            line_end = size
+        first = data[position:position + 1]
+        if first not in (b';', b'\n', b'\r', b''):
+            tab = data.find(b'\t', position, line_end)
+            if tab != -1:
+                keys.append(data[position:tab])
+                offsets.append(position)
+        position = line_end + 1
+    return keys, offsets
+
+
+def _trigrams(text):
+    """Trigram codes of a name, padded so short words still match"""
+    encoded = f"  {text.upper()} ".encode(ICAO_ENCODING, 'replace')
+    return {(encoded[i] << 16) | (encoded[i + 1] << 8) | encoded[i + 2] for i in range(len(encoded) - 2)}
+
+
+class IcaoDatabase:
+    """ICAO code lookup and name search over one tab-separated airport file"""
+
+    def __init__(self, path, columns=NAVDATA_COLUMNS, cache=True):
+        self.path = path
+        self.columns = columns
+        self.cache = cache
+        self.cache_path = path + ".idx"
+        self.trigram_cache_path = path + ".tri.npz"
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.keys, self.offsets = self._load_index(cache)
+        self.width = self.keys.dtype.itemsize
+        self._trigram_index = None
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _load_index(self, cache):
+        """
+        Sorted keys and offsets, from the cache file when it is current.
+        Keys are sized to the longest code in the file so none are truncated.
+        """
+        stamp = _source_stamp(self.path)
+        if cache and os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'rb') as f:
+                    magic, mtime_ns, size, count, width = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+                if magic == INDEX_MAGIC and (mtime_ns, size) == stamp:
+                    keys = np.memmap(self.cache_path, dtype=f'S{width}', mode='r',
+                                     offset=INDEX_HEADER.size, shape=(count,))
+                    offsets = np.memmap(self.cache_path, dtype='<i8', mode='r',
+                                        offset=INDEX_HEADER.size + width * count, shape=(count,))
+                    return keys, offsets
+            except (OSError, struct.error, ValueError):
+                pass
+
+        keys, offsets = _scan_rows(self._data)
+        keys = np.array(keys, dtype=f'S{max([len(key) for key in keys] + [1])}')
+        offsets = np.array(offsets, dtype='<i8')
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        offsets = offsets[order]
+
+        if cache:
+            temporary = f"{self.cache_path}.{os.getpid()}.tmp"
+            try:
+                with open(temporary, 'wb') as f:
+                    f.write(INDEX_HEADER.pack(INDEX_MAGIC, stamp[0], stamp[1], len(keys), keys.dtype.itemsize))
+                    f.write(keys.tobytes())
+                    f.write(offsets.tobytes())
+                os.replace(temporary, self.cache_path)
+            except OSError:
+                # Read-only data directories just rebuild the index every time
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+        return keys, offsets
+
+    def _row(self, offset):
+        """Decode the fields of the line starting at offset"""
+        line_end = self._data.find(b'\n', offset)
+        if line_end == -1:
+            line_end = len(self._data)
+        line = self._data[offset:line_end].decode(ICAO_ENCODING).rstrip('\r')
+        return dict(zip(self.columns, line.split('\t')))
+
+    def get(self, icao):
+        """Row for one ICAO code as a dict of columns, or None"""
+        key = icao.upper().encode(ICAO_ENCODING)
+        if len(key) > self.width:
+            return None
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and self.keys[position] == key:
+            return self._row(int(self.offsets[position]))
+        return None
+
+    def _load_trigram_index(self):
+        """Trigram index from its cache file when current, else built and cached"""
+        stamp = np.array(_source_stamp(self.path), dtype=np.int64)
+        if self.cache and os.path.exists(self.trigram_cache_path):
+            try:
+                with np.load(self.trigram_cache_path) as cached:
+                    if np.array_equal(cached['stamp'], stamp):
+                        return (cached['unique'], cached['starts'], cached['postings'], cached['counts'])
+            except CACHE_ERRORS:
+                pass
+        index = self._build_trigram_index()
+        if self.cache:
+            save_npz(self.trigram_cache_path, stamp=stamp, unique=index[0], starts=index[1], postings=index[2],
+                     counts=index[3])
+        return index
+
+    def _build_trigram_index(self):
+        """CSR trigram -> row postings and per-row trigram counts"""
+        name_column = self.columns.index('name')
+        codes = []
+        rows = []
+        counts = np.zeros(len(self.keys), dtype=np.int32)
+        for row, offset in enumerate(self.offsets.tolist()):
+            fields = self._row(offset)
+            grams = _trigrams(fields.get(self.columns[name_column], ''))
+            counts[row] = len(grams)
+            codes.extend(grams)
+            rows.extend([row] * len(grams))
+        codes = np.array(codes, dtype=np.uint32)
+        rows = np.array(rows, dtype=np.int32)
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        postings = rows[order]
+        unique, starts = np.unique(codes, return_index=True)
+        starts = np.append(starts, len(codes))
+        return unique, starts, postings, counts
+
+    def search(self, name, limit=10):
+        """
+        Fuzzy name search; returns up to limit (score, row dict) pairs,
+        best first, scored by trigram Jaccard similarity.
+        """
+        if self._trigram_index is None:
+            self._trigram_index = self._load_trigram_index()
+        unique, starts, postings, counts = self._trigram_index
+        query = np.array(sorted(_trigrams(name)), dtype=np.uint32)
+        if not len(query):
+            return []
+        positions = np.searchsorted(unique, query)
+        found = positions < len(unique)
+        found[found] = unique[positions[found]] == query[found]
+        positions = positions[found]
+        if not len(positions):
+            return []
+        hits = np.concatenate([postings[starts[p]:starts[p + 1]] for p in positions.tolist()])
+        shared = np.bincount(hits, minlength=len(counts))
+        candidates = np.flatnonzero(shared)
+        scores = shared[candidates] / (len(query) + counts[candidates] - shared[candidates])
+        best = np.argsort(-scores, kind='stable')[:limit]
+        return [(float(scores[i]), self._row(int(self.offsets[candidates[i]]))) for i in best]
+
+
+def main():
+    """Time a cold ICAO lookup and a name search"""
+    path = os.path.join("FASA", "NavData", "icao.txt")
+    icao = sys.argv[1] if len(sys.argv) > 1 else "FACT"
+    query = sys.argv[2] if len(sys.argv) > 2 else "CAPE TOWN"
+
+    started = time.perf_counter()
+    database = IcaoDatabase(path)
+    row = database.get(icao)
+    cold_time = time.perf_counter() - started
+    print(f"✈️  {icao}: {row}")
+    print(f"   Open + lookup: {cold_time * 1000:.3f} ms over {len(database)} airports")
+
+    started = time.perf_counter()
+    results = database.search(query)
+    search_time = time.perf_counter() - started
+    print(f"🔍 '{query}' ({search_time * 1000:.1f} ms including trigram index load):")
+    for score, match in results[:5]:
+        print(f"   {score:.2f} {match['icao']} {match['name']}")
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
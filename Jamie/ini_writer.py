@@ -0,0 +1,75 @@
+"""
+Streaming INI writer for the large adaptation outputs
+Formats sections straight into a buffered file handle with output that is
+byte-identical to ConfigParser.write() (optionxform=str, default delimiters),
+without building a ConfigParser section object per entry.
+"""
+
+from configparser import DuplicateSectionError
+
+# Sections are joined and written in batches of this many
+FLUSH_SECTIONS = 1024
+
+
+def unique_sections(names):
+    """
+    Resolve repeated section names the way ConfigParser item assignment does:
+    each name keeps the position of its first occurrence and the values of its
+    last. Returns (row indices to emit, sorted list of duplicated names).
+    """
+    last_row = {}
+    duplicates = set()
+    for row, name in enumerate(names):
+        if name in last_row:
+            duplicates.add(name)
+        # Re-assigning a key keeps its original dict position
+        last_row[name] = row
+    return list(last_row.values()), sorted(duplicates)
+
+
+class IniWriter:
+    """Streams sections to an open text file in ConfigParser format"""
+
+    def __init__(self, file):
+        self.file = file
+        self.sections = set()
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.flush()
+
+    def write_section(self, name, options):
+        """
+        Write one section; options is a dict or iterable of (key, value) pairs.
+        Raises DuplicateSectionError if the name was already written.
+        """
+        if name in self.sections:
+            raise DuplicateSectionError(name)
+        self.sections.add(name)
+        if isinstance(options, dict):
+            options = options.items()
+        lines = [f"[{name}]\n"]
+        for key, value in options:
+            value = str(value).replace('\n', '\n\t')
+            lines.append(f"{key} = {value}\n")
+        lines.append("\n")
+        self._pending.append(''.join(lines))
+        if len(self._pending) >= FLUSH_SECTIONS:
+            self.flush()
+
+    def flush(self):
+        """Write out buffered sections"""
+        if self._pending:
+            self.file.write(''.join(self._pending))
+            self._pending.clear()
+
+
+def warn_duplicates(kind, duplicates):
+    """Report duplicated section names that were collapsed to their last definition"""
+    if duplicates:
+        shown = ', '.join(duplicates[:10])
+        more = f" and {len(duplicates) - 10} more" if len(duplicates) > 10 else ""
+        print(f"⚠️ {len(duplicates)} duplicate {kind} names, keeping the last definition: {shown}{more}")
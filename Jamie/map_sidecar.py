@@ -0,0 +1,87 @@
+"""
+Compact binary sidecar for sector position maps
+Written next to each maps/<sector>.ini so a radar client can mmap the points
+instead of re-parsing the INI. All values are little-endian:
+
+    offset  size        field
+    0       8           magic b'LCMAP01\\0'
+    8       4           uint32 point count n
+    12      4           uint32 ident blob length m
+    16      4n          float32 latitudes
+    16+4n   4n          float32 longitudes
+    16+8n   4(n+1)      uint32 ident offsets into the blob
+    20+12n  n           uint8 point kind (see KIND_CODES)
+    20+13n  m           UTF-8 ident blob
+"""
+
+import struct
+from array import array
+import sys
+
+import numpy as np
+
+MAGIC = b'LCMAP01\0'
+HEADER = struct.Struct('<8sII')
+
+# Point kind codes, in the order the map sections are written
+KIND_CODES = {'airports': 0, 'fixes': 1, 'vors': 2}
+
+
+class MapSidecarWriter:
+    """Accumulates map points in packed arrays and writes the sidecar file"""
+
+    def __init__(self):
+        self.lats = array('f')
+        self.lons = array('f')
+        self.kinds = array('B')
+        self.offsets = array('I', [0])
+        self.blob = bytearray()
+
+    def add(self, kind, ident, lat, lon):
+        self.lats.append(lat)
+        self.lons.append(lon)
+        self.kinds.append(KIND_CODES[kind])
+        self.blob += ident.encode('utf-8')
+        self.offsets.append(len(self.blob))
+
+    def write(self, path):
+        arrays = [self.lats, self.lons, self.offsets]
+        if sys.byteorder != 'little':
+            arrays = [array(values.typecode, values) for values in arrays]
+            for values in arrays:
+                values.byteswap()
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(self.lats), len(self.blob)))
+            for values in arrays:
+                f.write(values.tobytes())
+            f.write(self.kinds.tobytes())
+            f.write(self.blob)
+
+
+def read_map_sidecar(path):
+    """
+    Memory-map a sidecar file.
+    Returns a dict of numpy views: lats, lons, kinds, offsets and blob;
+    use sidecar_ident(sidecar, i) to decode an ident.
+    """
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    magic, count, blob_length = HEADER.unpack(raw[:HEADER.size].tobytes())
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a map sidecar file")
+    position = HEADER.size
+    lats = raw[position:position + 4 * count].view('<f4')
+    position += 4 * count
+    lons = raw[position:position + 4 * count].view('<f4')
+    position += 4 * count
+    offsets = raw[position:position + 4 * (count + 1)].view('<u4')
+    position += 4 * (count + 1)
+    kinds = raw[position:position + count]
+    position += count
+    blob = raw[position:position + blob_length]
+    return {'lats': lats, 'lons': lons, 'kinds': kinds, 'offsets': offsets, 'blob': blob}
+
+
+def sidecar_ident(sidecar, index):
+    """Decode the ident of one sidecar point"""
+    offsets = sidecar['offsets']
+    return sidecar['blob'][offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
@@ -0,0 +1,347 @@
+"""
+Minimum safe altitude warning raster from FASA/Plugins/TopSky/TopSkyMSAW.txt
+The MSA sectors (S:lat:lon:bearing1:bearing2:inner:outer:altitude, bearings
+true and distances in NM) and the grid MORA rows (L:lat:lon:lat size:lon
+size:count:altitudes..., from the south-west corner eastwards) are painted
+into one lat/lon grid of minimum altitudes in feet: grid rows first, then
+the sectors in file order, so later and more specific areas win. An
+altitude of 0 inhibits MSAW; cells outside every area hold NO_MINIMUM.
+msaw.ini's WarningAltitude is read as a warning margin: an aircraft is
+reported once it is less than that many feet above its minimum, so the
+alert comes before the minimum is broken.
+
+The raster is stored compressed as <file>.msaw.npz, keyed by a hash of the
+source and grid settings, and unpacked once into <file>.msaw.npy which is
+memory-mapped on load. Checking a trajectory is a single gather into it.
+"""
+
+import configparser
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from coordinates import parse_coordinate
+from geodesy import great_circle_nm_array, initial_bearing_array
+from npz_cache import load_mapped, save_mapped
+from topsky_maps import TOPSKY_DIR, iter_topsky_lines
+
+MSAW_FILE = os.path.join(TOPSKY_DIR, "TopSkyMSAW.txt")
+MSAW_INI = os.path.join("adaptation_files", "msaw.ini")
+
+RASTER_SUFFIX = ".msaw.npz"
+MMAP_SUFFIX = ".msaw.npy"
+
+# Grid spacing in degrees (half an arc minute, about 0.5 NM north-south)
+CELL_SIZE = 1 / 120
+
+# Minimum of cells outside every MSAW area
+NO_MINIMUM = -1
+
+Sector = namedtuple('Sector', ['lat', 'lon', 'bearing1', 'bearing2', 'inner_nm', 'outer_nm', 'altitude'])
+GridRow = namedtuple('GridRow', ['lat', 'lon', 'lat_size', 'lon_size', 'altitudes'])
+Infringement = namedtuple('Infringement', ['callsign', 'start_time', 'end_time', 'lat', 'lon',
+                                           'altitude', 'minimum', 'samples'])
+
+
+def parse_msaw(path=MSAW_FILE):
+    """
+    (sectors, grid rows) of an MSAW file. Approach path monitoring (APM)
+    entries are not minimum altitudes and are skipped with the others.
+    """
+    sectors = []
+    rows = []
+    skipped = {}
+    for keyword, fields, line in iter_topsky_lines(path):
+        try:
+            if keyword == 'S' and len(fields) >= 7:
+                sectors.append(Sector(parse_coordinate(fields[0]), parse_coordinate(fields[1]),
+                                      float(fields[2]), float(fields[3]), float(fields[4]), float(fields[5]),
+                                      int(float(fields[6]))))
+                continue
+            if keyword == 'L' and len(fields) >= 5:
+                count = int(fields[4])
+                altitudes = [int(float(value)) for value in fields[5:5 + count]]
+                if len(altitudes) == count:
+                    rows.append(GridRow(parse_coordinate(fields[0]), parse_coordinate(fields[1]),
+                                        float(fields[2]), float(fields[3]), altitudes))
+                    continue
+        except (TypeError, ValueError):
+            pass
+        skipped[keyword] = skipped.get(keyword, 0) + 1
+    if skipped:
+        summary = ', '.join(f"{count} {keyword}" for keyword, count in sorted(skipped.items()))
+        print(f"⚠️ Skipped MSAW lines: {summary}")
+    return sectors, rows
+
+
+def msaw_settings(path=MSAW_INI):
+    """(enabled, warning altitude in feet) from msaw.ini, defaults when it is missing"""
+    config = configparser.ConfigParser()
+    config.read(path, encoding='utf-8')
+    if not config.has_section('MSAW'):
+        return True, 0
+    return (config.getboolean('MSAW', 'Enabled', fallback=True),
+            config.getint('MSAW', 'WarningAltitude', fallback=0))
+
+
+def raster_bounds(sectors, rows):
+    """(south, west, north, east) enclosing every grid box and sector circle"""
+    south, west, north, east = math.inf, math.inf, -math.inf, -math.inf
+    for row in rows:
+        south, west = min(south, row.lat), min(west, row.lon)
+        north = max(north, row.lat + row.lat_size)
+        east = max(east, row.lon + row.lon_size * len(row.altitudes))
+    for sector in sectors:
+        reach_lat = sector.outer_nm / 60
+        reach_lon = reach_lat / max(math.cos(math.radians(abs(sector.lat) + reach_lat)), 0.01)
+        south, north = min(south, sector.lat - reach_lat), max(north, sector.lat + reach_lat)
+        west, east = min(west, sector.lon - reach_lon), max(east, sector.lon + reach_lon)
+    return [south, west, north, east]
+
+
+def _cell_span(low, high, origin, cell_size, count):
+    """Indices of the cells whose centres lie in [low, high)"""
+    first = max(0, math.ceil((low - origin) / cell_size - 0.5))
+    last = min(count, math.ceil((high - origin) / cell_size - 0.5))
+    return first, last
+
+
+def build_raster(sectors, rows, bounds, cell_size=CELL_SIZE):
+    """
+    (row, col) int16 minimum altitudes over bounds (south, west, north,
+    east), evaluated at cell centres
+    """
+    south, west, north, east = bounds
+    height = max(1, math.ceil((north - south) / cell_size))
+    width = max(1, math.ceil((east - west) / cell_size))
+    raster = np.full((height, width), NO_MINIMUM, dtype=np.int16)
+
+    for row in rows:
+        top, bottom = _cell_span(row.lat, row.lat + row.lat_size, south, cell_size, height)
+        for box, altitude in enumerate(row.altitudes):
+            left, right = _cell_span(row.lon + box * row.lon_size, row.lon + (box + 1) * row.lon_size,
+                                     west, cell_size, width)
+            raster[top:bottom, left:right] = altitude
+
+    for sector in sectors:
+        reach_lat = sector.outer_nm / 60
+        reach_lon = reach_lat / max(math.cos(math.radians(abs(sector.lat) + reach_lat)), 0.01)
+        top, bottom = _cell_span(sector.lat - reach_lat, sector.lat + reach_lat, south, cell_size, height)
+        left, right = _cell_span(sector.lon - reach_lon, sector.lon + reach_lon, west, cell_size, width)
+        if top >= bottom or left >= right:
+            continue
+        lats = (south + (np.arange(top, bottom) + 0.5) * cell_size)[:, None]
+        lons = (west + (np.arange(left, right) + 0.5) * cell_size)[None, :]
+        inside = sector_contains(sector, lats, lons)
+        raster[top:bottom, left:right][inside] = sector.altitude
+    return raster
+
+
+def sector_contains(sector, lats, lons):
+    """True where positions lie in the sector; from bearing1 clockwise to bearing2, full when they match"""
+    distances = great_circle_nm_array(sector.lat, sector.lon, lats, lons)
+    inside = (distances >= sector.inner_nm) & (distances < sector.outer_nm)
+    span = (sector.bearing2 - sector.bearing1) % 360
+    if span:
+        bearings = initial_bearing_array(sector.lat, sector.lon, lats, lons)
+        inside &= (bearings - sector.bearing1) % 360 < span
+    return inside
+
+
+def _reference_minimum(sectors, rows, lat, lon):
+    """Minimum altitude of one position by testing every area in turn, for checking the raster"""
+    minimum = NO_MINIMUM
+    for row in rows:
+        if row.lat <= lat < row.lat + row.lat_size:
+            box = math.floor((lon - row.lon) / row.lon_size)
+            if 0 <= box < len(row.altitudes):
+                minimum = row.altitudes[box]
+    for sector in sectors:
+        if sector_contains(sector, np.array(lat), np.array(lon)):
+            minimum = sector.altitude
+    return minimum
+
+
+class MsawRaster:
+    """Minimum altitudes (feet) on a regular lat/lon grid"""
+
+    def __init__(self, minimums, meta):
+        self.minimums = minimums
+        self.south, self.west, self.north, self.east = meta['bounds']
+        self.cell_size = meta['cell_size']
+
+    @property
+    def shape(self):
+        return self.minimums.shape
+
+    def minimum_at(self, lats, lons):
+        """Minimum altitudes of arrays of positions; NO_MINIMUM outside every area"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        rows = np.floor((lats - self.south) / self.cell_size).astype(np.int64)
+        cols = np.floor((lons - self.west) / self.cell_size).astype(np.int64)
+        valid = (rows >= 0) & (rows < self.minimums.shape[0]) & (cols >= 0) & (cols < self.minimums.shape[1])
+        minimums = self.minimums[np.where(valid, rows, 0), np.where(valid, cols, 0)]
+        return np.where(valid, minimums, NO_MINIMUM)
+
+    def below(self, lats, lons, altitudes, margin=0):
+        """True where a position is less than margin feet above its minimum; 0 minimums inhibit"""
+        minimums = self.minimum_at(lats, lons)
+        return (minimums > 0) & (np.asarray(altitudes) < minimums + margin)
+
+    def check(self, tracks, times, lats, lons, altitudes, callsigns=None, margin=0):
+        """
+        Infringements of trajectories sorted by track and time (as read by
+        restricted_areas.read_replay): each run of consecutive samples of
+        one track less than margin feet above its minimum, with its lowest
+        point against it
+        """
+        minimums = self.minimum_at(lats, lons)
+        below = (minimums > 0) & (altitudes < minimums + margin)
+        samples = np.flatnonzero(below)
+        if not len(samples):
+            return []
+        breaks = np.flatnonzero((np.diff(samples) != 1) | (tracks[samples[1:]] != tracks[samples[:-1]])) + 1
+        starts = np.concatenate([[0], breaks])
+        ends = np.concatenate([breaks, [len(samples)]])
+        margins = altitudes[samples] - minimums[samples]
+
+        infringements = []
+        for start, end in zip(starts, ends):
+            run = samples[start:end]
+            lowest = run[np.argmin(margins[start:end])]
+            track = int(tracks[run[0]])
+            infringements.append(Infringement(callsigns[track] if callsigns is not None else track,
+                                              float(times[run[0]]), float(times[run[-1]]),
+                                              float(lats[lowest]), float(lons[lowest]),
+                                              float(altitudes[lowest]), int(minimums[lowest]), len(run)))
+        return infringements
+
+
+def msaw_hash(path, cell_size):
+    """SHA-256 over the MSAW file and the grid spacing"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    digest.update(json.dumps([cell_size]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def save_raster(path, minimums, meta, source_hash):
+    """Compressed .npz with the minimums, the source hash and JSON metadata"""
+    save_mapped(path, 'minimums', minimums, meta, source_hash)
+
+
+def load_raster(path, source_hash=None):
+    """
+    MsawRaster from a compressed raster, or None when it is missing,
+    unreadable or was built for another hash. The minimums are memory-mapped
+    from a sibling .npy unpacked from it.
+    """
+    mmap_path = path[:-len(RASTER_SUFFIX)] + MMAP_SUFFIX if path.endswith(RASTER_SUFFIX) else path + '.npy'
+    loaded = load_mapped(path, 'minimums', mmap_path, source_hash)
+    return MsawRaster(*loaded) if loaded is not None else None
+
+
+def msaw_raster(path=MSAW_FILE, cell_size=CELL_SIZE, cache=True):
+    """MsawRaster of an MSAW file: the stored raster when it matches the file and spacing, else built and stored"""
+    source_hash = msaw_hash(path, cell_size)
+    raster_path = path + RASTER_SUFFIX
+    if cache:
+        raster = load_raster(raster_path, source_hash)
+        if raster is not None:
+            return raster
+
+    sectors, rows = parse_msaw(path)
+    bounds = raster_bounds(sectors, rows)
+    minimums = build_raster(sectors, rows, bounds, cell_size)
+    meta = {'bounds': bounds, 'cell_size': cell_size, 'sectors': len(sectors), 'grid_rows': len(rows)}
+    if cache:
+        save_raster(raster_path, minimums, meta, source_hash)
+        raster = load_raster(raster_path, source_hash)
+        if raster is not None:
+            return raster
+    return MsawRaster(minimums, meta)
+
+
+def synthetic_descents(raster, aircraft, samples, step=5.0, seed=0):
+    """Straight descending tracks over the raster, many of them ending below the minimum altitudes"""
+    rng = np.random.default_rng(seed)
+    start_lat = rng.uniform(raster.south, raster.north, aircraft)
+    start_lon = rng.uniform(raster.west, raster.east, aircraft)
+    bearings = np.radians(rng.uniform(0, 360, aircraft))
+    reach = samples * step * 250 / 3600 / 60
+    fraction = np.tile(np.linspace(0, 1, samples), aircraft)
+    tracks = np.repeat(np.arange(aircraft, dtype=np.int32), samples)
+    times = np.tile(np.arange(samples) * step, aircraft)
+    lats = start_lat[tracks] + fraction * (reach * np.cos(bearings))[tracks]
+    lons = start_lon[tracks] + fraction * (reach * np.sin(bearings))[tracks]
+    altitudes = rng.uniform(8000, 20000, aircraft)[tracks] * (1 - 0.9 * fraction)
+    return tracks, times, lats, lons, altitudes
+
+
+def main():
+    """
+    Usage: python msaw.py [replay.csv] [--msaw TopSkyMSAW.txt]
+    Builds (or loads) the raster, checks the replay (or synthetic descents)
+    and compares the raster against area-by-area tests.
+    """
+    args = sys.argv[1:]
+    path = args[args.index("--msaw") + 1] if "--msaw" in args else MSAW_FILE
+    enabled, margin = msaw_settings()
+    print(f"⛰️ MSAW {'enabled' if enabled else 'disabled'} in {MSAW_INI}, warning margin {margin} ft")
+    if not enabled:
+        print("   No tracks checked while MSAW is disabled")
+        return
+
+    started = time.perf_counter()
+    raster = msaw_raster(path, cache=False)
+    build_time = time.perf_counter() - started
+    rows, cols = raster.shape
+    print(f"🗺️ {rows}x{cols} cells of {raster.cell_size * 60:.1f}' built in {build_time:.2f} s, "
+          f"{np.count_nonzero(raster.minimums > 0) / raster.minimums.size:.0%} with a minimum")
+
+    msaw_raster(path)
+    started = time.perf_counter()
+    raster = msaw_raster(path)
+    print(f"💾 {os.path.getsize(path + RASTER_SUFFIX) / 1024:.0f} KB compressed, "
+          f"warm load {(time.perf_counter() - started) * 1000:.1f} ms (memory-mapped)")
+
+    replay = [arg for index, arg in enumerate(args)
+              if not arg.startswith("--") and (index == 0 or args[index - 1] != "--msaw")]
+    if replay:
+        from restricted_areas import read_replay
+        tracks, times, lats, lons, altitudes, callsigns = read_replay(replay[0])
+    else:
+        tracks, times, lats, lons, altitudes = synthetic_descents(raster, 20000, 100)
+        callsigns = None
+    started = time.perf_counter()
+    infringements = raster.check(tracks, times, lats, lons, altitudes, callsigns, margin)
+    elapsed = time.perf_counter() - started
+    print(f"🔎 {len(tracks)} samples checked in {elapsed * 1000:.1f} ms ({len(tracks) / elapsed:,.0f} per second), "
+          f"{len(infringements)} infringements")
+    for infringement in infringements[:5]:
+        print(f"   {infringement.callsign}: {infringement.altitude:.0f} ft against {infringement.minimum} ft "
+              f"at {infringement.lat:.3f}, {infringement.lon:.3f} for {infringement.samples} samples")
+
+    # At cell centres the raster and the area-by-area test must agree exactly
+    sectors, grid_rows = parse_msaw(path)
+    sample = 2000
+    centre_lats = raster.south + (np.floor((lats[:sample] - raster.south) / raster.cell_size) + 0.5) * raster.cell_size
+    centre_lons = raster.west + (np.floor((lons[:sample] - raster.west) / raster.cell_size) + 0.5) * raster.cell_size
+    started = time.perf_counter()
+    reference = [_reference_minimum(sectors, grid_rows, lat, lon) for lat, lon in zip(centre_lats, centre_lons)]
+    per_point = (time.perf_counter() - started) / sample
+    mismatches = np.count_nonzero(raster.minimum_at(centre_lats, centre_lons) != np.array(reference))
+    print(f"✅ Area-by-area check on {sample} positions: {mismatches} mismatches, "
+          f"{per_point * 1e6:.0f} µs per point against {elapsed / len(tracks) * 1e6:.2f} µs from the raster")
+
+
+if __name__ == "__main__":
+    main()
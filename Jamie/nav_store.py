@@ -0,0 +1,396 @@
+"""
+Columnar navigation data store
+Each entity type (airports, runways, VORs, NDBs, fixes, airway segments) is held as a
+struct-of-arrays: idents and other text fields are interned in one shared
+string table and coordinates are converted once into float64 arrays.
+"""
+
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+from array import array
+
+import numpy as np
+
+from coordinates import dms_array_to_decimal
+
+# Bump whenever table parsing, coordinate conversion or the cached columns
+# change, so shared parsed-table caches are rebuilt instead of reused
+TABLE_CACHE_VERSION = 1
+
+
+class StringTable:
+    """Interned strings packed into a single UTF-8 buffer"""
+    __slots__ = ('_index', '_pending', '_blob', '_offsets')
+
+    def __init__(self):
+        self._index = {'': 0}
+        self._pending = ['']
+        self._blob = b''
+        self._offsets = np.zeros(1, dtype=np.uint32)
+
+    def intern(self, value):
+        """Return the id of value, adding it to the table if needed"""
+        if self._index is None:
+            raise RuntimeError("String table is frozen")
+        string_id = self._index.get(value)
+        if string_id is None:
+            string_id = len(self._pending)
+            self._index[value] = string_id
+            self._pending.append(value)
+        return string_id
+
+    def freeze(self):
+        """Pack all interned strings into one buffer and drop the build index"""
+        if self._index is None:
+            return
+        encoded = [value.encode('utf-8') for value in self._pending]
+        lengths = np.fromiter((len(value) for value in encoded), dtype=np.uint32, count=len(encoded))
+        self._offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.uint32)
+        self._blob = b''.join(encoded)
+        self._index = None
+        self._pending = None
+
+    @classmethod
+    def from_packed(cls, blob, offsets):
+        """Frozen table over an existing packed buffer, e.g. loaded from a cache file"""
+        table = cls()
+        table._index = None
+        table._pending = None
+        table._blob = bytes(blob)
+        table._offsets = np.asarray(offsets, dtype=np.uint32)
+        return table
+
+    def packed(self):
+        """(blob, offsets) of a frozen table, for writing to a cache file"""
+        self.freeze()
+        return self._blob, self._offsets
+
+    def __getitem__(self, string_id):
+        if self._pending is not None:
+            return self._pending[string_id]
+        return self._blob[self._offsets[string_id]:self._offsets[string_id + 1]].decode('utf-8')
+
+    def __len__(self):
+        if self._pending is not None:
+            return len(self._pending)
+        return len(self._offsets) - 1
+
+    def nbytes(self):
+        """Approximate memory held by the packed table"""
+        return len(self._blob) + self._offsets.nbytes
+
+
+class NavRecord:
+    """Row view into an EntityTable, usable like the old per-row dicts"""
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, field):
+        return self._table.value(field, self._row)
+
+    def __getattr__(self, field):
+        try:
+            return self._table.value(field, self._row)
+        except KeyError:
+            raise AttributeError(field) from None
+
+    def get(self, field, default=None):
+        try:
+            return self._table.value(field, self._row)
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self._table.fields
+
+    def __repr__(self):
+        values = ', '.join(f"{field}={self[field]!r}" for field in self._table.fields)
+        return f"{self._table.name}[{self._row}]({values})"
+
+
+class EntityTable:
+    """Struct-of-arrays storage for one entity type"""
+    __slots__ = ('name', 'strings', 'fields', 'string_fields', 'columns')
+
+    def __init__(self, name, strings, string_columns, float_columns):
+        self.name = name
+        self.strings = strings
+        self.string_fields = tuple(string_columns)
+        self.fields = self.string_fields + tuple(float_columns)
+        self.columns = {}
+        for field, values in string_columns.items():
+            self.columns[field] = np.fromiter((strings.intern(value) for value in values),
+                                              dtype=np.int32, count=len(values))
+        for field, values in float_columns.items():
+            self.columns[field] = np.asarray(values, dtype=np.float64)
+
+    def __len__(self):
+        first = self.fields[0] if self.fields else None
+        return len(self.columns[first]) if first else 0
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return NavRecord(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield NavRecord(self, row)
+
+    def value(self, field, row):
+        """Decoded value of one field in one row"""
+        column = self.columns[field]
+        if field in self.string_fields:
+            return self.strings[column[row]]
+        return float(column[row])
+
+    def text(self, field):
+        """Decoded list of every value in a string column"""
+        strings = self.strings
+        return [strings[string_id] for string_id in self.columns[field].tolist()]
+
+    def nbytes(self):
+        """Memory held by the column arrays"""
+        return sum(column.nbytes for column in self.columns.values())
+
+
+class NavStore:
+    """All navigation entity tables sharing one string table"""
+    __slots__ = ('strings', 'tables')
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.tables = {}
+
+    def add_table(self, name, string_columns, float_columns):
+        table = EntityTable(name, self.strings, string_columns, float_columns)
+        self.tables[name] = table
+        return table
+
+    def freeze(self):
+        """Finish loading; packs the string table"""
+        self.strings.freeze()
+        return self
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+    def __contains__(self, name):
+        return name in self.tables
+
+    def nbytes(self):
+        """Memory held by all tables and the string table"""
+        return self.strings.nbytes() + sum(table.nbytes() for table in self.tables.values())
+
+
+# Layout of the nav_data CSV files:
+# name: (file, minimum columns, [(field, column)], [(lat field, column, lon field, column)], dms only)
+NAV_DATA_FILES = {
+    'airports': ('airports.txt', 5,
+                 [('icao', 0), ('frequency', 1), ('type', 4)],
+                 [('lat', 2, 'lon', 3)], False),
+    'runways': ('runways.txt', 9,
+                [('rwy1', 0), ('rwy2', 1), ('hdg1', 2), ('hdg2', 3), ('airport', 8)],
+                [('lat1', 4, 'lon1', 5), ('lat2', 6, 'lon2', 7)], False),
+    'vors': ('vors.txt', 4,
+             [('ident', 0), ('frequency', 1)],
+             [('lat', 2, 'lon', 3)], False),
+    'ndbs': ('ndbs.txt', 4,
+             [('ident', 0), ('frequency', 1)],
+             [('lat', 2, 'lon', 3)], False),
+    'fixes': ('fixes.txt', 3,
+              [('ident', 0)],
+              [('lat', 1, 'lon', 2)], True),
+    # Airway endpoints are DMS coordinates or point names, so they stay text
+    'airways': ('airways.txt', 6,
+                [('airway', 0), ('level', 1), ('lat1', 2), ('lon1', 3), ('lat2', 4), ('lon2', 5)],
+                [], False)
+}
+
+
+def _parse_nav_table(lines, min_parts, string_fields, coordinate_fields, dms_only):
+    """(string columns, float columns) of the data lines of one nav_data CSV file"""
+    raw = {field: [] for field, _ in string_fields}
+    raw_coords = {}
+    for lat_field, lat_col, lon_field, lon_col in coordinate_fields:
+        raw_coords[lat_field] = (lat_col, [])
+        raw_coords[lon_field] = (lon_col, [])
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(',')
+        if len(parts) >= min_parts:
+            for field, column in string_fields:
+                raw[field].append(parts[column])
+            for column, values in raw_coords.values():
+                values.append(parts[column])
+
+    # Coordinates are converted once here; the DMS strings are dropped
+    float_columns = {}
+    for field, (column, values) in raw_coords.items():
+        float_columns[field] = dms_array_to_decimal(values)
+    if dms_only:
+        for lat_field, lat_col, lon_field, lon_col in coordinate_fields:
+            missing = np.array([not value.startswith(('N', 'S')) for value in raw_coords[lat_field][1]],
+                               dtype=bool)
+            float_columns[lat_field][missing] = np.nan
+            float_columns[lon_field][missing] = np.nan
+    return raw, float_columns
+
+
+def _load_table_cache(path, string_fields):
+    """(string columns, float columns) from a parsed table cache, or None"""
+    try:
+        with np.load(path) as cached:
+            raw = {}
+            for field, _ in string_fields:
+                text = cached['text_' + field].tobytes().decode('utf-8')
+                raw[field] = text.split('\n') if int(cached['rows']) else []
+            float_columns = {name[len('float_'):]: cached[name] for name in cached.files if name.startswith('float_')}
+    except (OSError, KeyError, ValueError):
+        return None
+    return raw, float_columns
+
+
+def _save_table_cache(path, raw, float_columns):
+    """Write a parsed table atomically, so concurrent builds never read half a file"""
+    rows = len(next(iter(raw.values()))) if raw else 0
+    arrays = {'text_' + field: np.frombuffer('\n'.join(values).encode('utf-8'), dtype=np.uint8)
+              for field, values in raw.items()}
+    arrays.update({'float_' + field: values for field, values in float_columns.items()})
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as f:
+            np.savez(f, rows=np.array(rows), **arrays)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_nav_table(store, name, filename, min_parts, string_fields, coordinate_fields, dms_only, cache_dir=None):
+    """
+    Read one nav_data CSV file into a table of the store.
+    With dms_only, rows whose latitude is not a N/S DMS string get NaN coordinates.
+    With cache_dir the parsed columns are kept there under the SHA-256 of the
+    file and TABLE_CACHE_VERSION, so identical tables (other packages, rebuilds) skip parsing and
+    coordinate conversion.
+    """
+    with open(filename, 'rb') as f:
+        content = f.read()
+    cache_path = None
+    if cache_dir:
+        digest = hashlib.sha256(content)
+        digest.update(repr((TABLE_CACHE_VERSION, name, min_parts, string_fields, coordinate_fields,
+                            dms_only)).encode('utf-8'))
+        cache_path = os.path.join(cache_dir, f"{name}-{digest.hexdigest()[:32]}.npz")
+        cached = _load_table_cache(cache_path, string_fields)
+        if cached is not None:
+            return store.add_table(name, *cached)
+
+    # Universal newlines, as reading the file in text mode would give
+    lines = content.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n').split('\n')[1:]
+    raw, float_columns = _parse_nav_table(lines, min_parts, string_fields, coordinate_fields, dms_only)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        _save_table_cache(cache_path, raw, float_columns)
+    return store.add_table(name, raw, float_columns)
+
+
+def load_nav_data(nav_data_dir, store=None, cache_dir=None):
+    """Load every nav_data file that exists into a NavStore, through a parsed table cache if given"""
+    store = store or NavStore()
+    for name, (filename, min_parts, string_fields, coordinate_fields, dms_only) in NAV_DATA_FILES.items():
+        path = os.path.join(nav_data_dir, filename)
+        if os.path.exists(path):
+            print(f"📁 Reading {path}")
+            read_nav_table(store, name, path, min_parts, string_fields, coordinate_fields, dms_only, cache_dir)
+        else:
+            store.add_table(name, {field: [] for field, _ in string_fields},
+                            {field: [] for fields in coordinate_fields for field in fields[::2]})
+    return store.freeze()
+
+
+def load_icao_airports(filename, store=None):
+    """
+    Load the world airport database (FASA/NavData/icao.txt) into a NavStore.
+    Format: ICAO<TAB>latitude<TAB>longitude<TAB>name, decimal degrees
+    """
+    store = store or NavStore()
+    icaos = []
+    names = []
+    lats = array('d')
+    lons = array('d')
+    with open(filename, 'r', encoding='latin-1') as f:
+        for line in f:
+            if line.startswith(';'):
+                continue
+            parts = line.rstrip('\r\n').split('\t')
+            if len(parts) < 4:
+                continue
+            try:
+                lat = float(parts[1])
+                lon = float(parts[2])
+            except ValueError:
+                continue
+            icaos.append(parts[0])
+            names.append(parts[3])
+            lats.append(lat)
+            lons.append(lon)
+    store.add_table('world_airports', {'icao': icaos, 'name': names},
+                    {'lat': np.frombuffer(lats, dtype=np.float64),
+                     'lon': np.frombuffer(lons, dtype=np.float64)})
+    return store.freeze()
+
+
+def _load_icao_dicts(filename):
+    """Per-row dict loader, kept for memory comparison only"""
+    rows = []
+    with open(filename, 'r', encoding='latin-1') as f:
+        for line in f:
+            if line.startswith(';'):
+                continue
+            parts = line.rstrip('\r\n').split('\t')
+            if len(parts) >= 4:
+                rows.append({'icao': parts[0], 'latitude': parts[1],
+                             'longitude': parts[2], 'name': parts[3]})
+    return rows
+
+
+def compare_memory(filename):
+    """Compare resident memory of per-row dicts against the columnar store"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = _load_icao_dicts(filename)
+    dict_time = time.perf_counter() - started
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    del rows
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = load_icao_airports(filename)
+    store_time = time.perf_counter() - started
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"📊 {len(store['world_airports'])} airports from {filename}")
+    print(f"   Per-row dicts: {dict_bytes / 1024:.0f} KiB in {dict_time * 1000:.1f} ms")
+    print(f"   NavStore:      {store_bytes / 1024:.0f} KiB in {store_time * 1000:.1f} ms")
+    print(f"   Reduction: {dict_bytes / store_bytes:.1f}x")
+    return dict_bytes, store_bytes
+
+
+if __name__ == "__main__":
+    icao_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join("FASA", "NavData", "icao.txt")
+    compare_memory(icao_file)
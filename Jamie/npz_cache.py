@@ -0,0 +1,71 @@
+"""
+Shared helpers for the .npz caches the generators and tools keep next to
+their sources. Caches are written to a temporary file and renamed into place,
+so an interrupted run never leaves a half-written cache behind, and loaders
+treat any unreadable cache as missing and rebuild it.
+
+Rasters are stored as a compressed .npz holding the array, its source hash
+and JSON metadata, and unpacked once into a sibling .npy that is
+memory-mapped on load.
+"""
+
+import json
+import os
+import zipfile
+
+import numpy as np
+
+# Everything np.load raises on a missing, truncated or foreign cache file
+CACHE_ERRORS = (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile)
+
+
+def _write_atomically(path, write):
+    """Call write on a temporary file and rename it over path; False when the directory is not writable"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as f:
+            write(f)
+        os.replace(temporary, path)
+        return True
+    except OSError:
+        # Read-only packages just rebuild on every run
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return False
+
+
+def save_npz(path, compressed=False, **arrays):
+    """Write arrays to an .npz atomically; returns False when the directory is not writable"""
+    return _write_atomically(path, lambda f: (np.savez_compressed if compressed else np.savez)(f, **arrays))
+
+
+def save_mapped(path, name, array, meta, source_hash):
+    """Compressed .npz with one array under name, the source hash and JSON metadata"""
+    return save_npz(path, compressed=True, **{name: array},
+                    source_hash=np.frombuffer(bytes.fromhex(source_hash), dtype=np.uint8),
+                    meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8))
+
+
+def load_mapped(path, name, mmap_path, source_hash=None):
+    """
+    (array, meta) from a save_mapped .npz, or None when it is missing,
+    unreadable or was built for another hash. The array is unpacked once into
+    mmap_path (again whenever the .npz is newer or the .npy is unreadable)
+    and memory-mapped from there; it stays in memory when that cannot be written.
+    """
+    try:
+        with np.load(path) as stored:
+            if source_hash is not None and stored['source_hash'].tobytes().hex() != source_hash:
+                return None
+            meta = json.loads(stored['meta'].tobytes().decode('utf-8'))
+            try:
+                if os.path.getmtime(mmap_path) >= os.path.getmtime(path):
+                    return np.load(mmap_path, mmap_mode='r'), meta
+            except CACHE_ERRORS:
+                pass
+            array = stored[name]
+        if not _write_atomically(mmap_path, lambda f: np.save(f, array)):
+            return array, meta
+        return np.load(mmap_path, mmap_mode='r'), meta
+    except CACHE_ERRORS:
+        return None
@@ -0,0 +1,226 @@
+"""
+SID and STAR geometry from the .ese [SIDSSTARS] routes
+Every procedure is resolved against the nav data into a polyline that starts
+at its runway threshold (SID) or ends there (STAR). All polylines are packed
+CSR-style into flat vertex arrays with the cumulative along-track distance
+of each vertex, so positions and remaining distances of any number of
+aircraft along any mix of procedures are interpolated in one vectorized pass.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from airway_graph import NavPoints
+from geodesy import great_circle_nm_array, initial_bearing_array
+from runway_geometry import runway_ends
+
+KINDS = ('SID', 'STAR')
+SID, STAR = range(len(KINDS))
+
+
+def parse_active_runways(path):
+    """
+    (airport, runway, departures) of every ACTIVE_RUNWAY line of a .rwy
+    file; the flag is 1 for departures and 0 for arrivals
+    """
+    active = []
+    with open(path, 'r', encoding='latin-1') as f:
+        for line in f:
+            parts = line.strip().split(':')
+            if len(parts) >= 4 and parts[0] == 'ACTIVE_RUNWAY':
+                active.append((parts[1], parts[2], parts[3].strip() == '1'))
+    return active
+
+
+class ProcedurePaths:
+    """Packed SID/STAR polylines with cumulative along-track distances (NM)"""
+
+    def __init__(self, kinds, airports, runways, names, starts, lats, lons, idents=None):
+        self.kinds = np.asarray(kinds, dtype=np.int8)
+        self.airports = list(airports)
+        self.runways = list(runways)
+        self.names = list(names)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.idents = list(idents) if idents is not None else [''] * len(self.lats)
+
+        owners = np.repeat(np.arange(len(self)), np.diff(self.starts))
+        last = np.zeros(len(self.lats), dtype=bool)
+        last[self.starts[1:] - 1] = True
+        legs = np.zeros(len(self.lats))
+        bearings = np.zeros(len(self.lats))
+        if len(self.lats) > 1:
+            legs[1:] = great_circle_nm_array(self.lats[:-1], self.lons[:-1], self.lats[1:], self.lons[1:])
+            bearings[:-1] = initial_bearing_array(self.lats[:-1], self.lons[:-1], self.lats[1:], self.lons[1:])
+        legs[self.starts[:-1]] = 0
+        # A route's final vertex keeps the bearing of its last leg
+        bearings[last] = bearings[np.maximum(np.flatnonzero(last) - 1, 0)]
+        cumulative = np.cumsum(legs)
+        self.distances = cumulative - cumulative[self.starts[:-1]][owners]
+        self.lengths = self.distances[self.starts[1:] - 1]
+        self.bearings = bearings
+        # Offsets that make the concatenated distances strictly increasing
+        # across routes, so one searchsorted places any (route, distance)
+        self.bases = np.concatenate([[0.0], np.cumsum(self.lengths + 1.0)[:-1]])
+        self.keys = self.distances + self.bases[owners]
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def select(self, kind=None, airport=None, runway=None):
+        """Indices of the procedures of one kind, airport and runway (None matches any)"""
+        kind = KINDS.index(kind) if isinstance(kind, str) else kind
+        return np.array([route for route in range(len(self))
+                         if (kind is None or self.kinds[route] == kind)
+                         and (airport is None or self.airports[route] == airport)
+                         and (runway is None or self.runways[route] == runway)], dtype=np.int64)
+
+    def vertex_at(self, routes, along):
+        """Index of the leg start vertex and the fraction along that leg"""
+        routes = np.asarray(routes, dtype=np.int64)
+        along = np.clip(along, 0, self.lengths[routes])
+        keys = self.bases[routes] + along
+        vertices = np.searchsorted(self.keys, keys, side='right') - 1
+        vertices = np.clip(vertices, self.starts[routes],
+                           np.maximum(self.starts[routes + 1] - 2, self.starts[routes]))
+        following = np.minimum(vertices + 1, self.starts[routes + 1] - 1)
+        leg = self.keys[following] - self.keys[vertices]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(leg > 0, (keys - self.keys[vertices]) / leg, 0.0)
+        return vertices, following, fraction
+
+    def position(self, routes, along):
+        """(lats, lons, tracks) at distances along procedures"""
+        vertices, following, fraction = self.vertex_at(routes, along)
+        lats = self.lats[vertices] + fraction * (self.lats[following] - self.lats[vertices])
+        lons = self.lons[vertices] + fraction * (self.lons[following] - self.lons[vertices])
+        return lats, lons, self.bearings[vertices]
+
+    def remaining(self, routes, along):
+        """Distance (NM) still to fly to the end of each procedure"""
+        return self.lengths[routes] - np.asarray(along)
+
+    def fix_distance(self, route, ident):
+        """Distance along a procedure of its first vertex named ident, NaN when it does not pass it"""
+        for vertex in range(self.starts[route], self.starts[route + 1]):
+            if self.idents[vertex] == ident:
+                return float(self.distances[vertex])
+        return np.nan
+
+    def project(self, routes, lats, lons):
+        """
+        Distance along each position's procedure of the closest point on it,
+        and how far (NM) the position is from that point. Every leg of every
+        procedure is tested at once in a local flat frame around the position.
+        """
+        routes = np.asarray(routes, dtype=np.int64)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        counts = self.starts[routes + 1] - self.starts[routes] - 1
+        offsets = np.cumsum(counts) - counts
+        owners = np.repeat(np.arange(len(routes)), counts)
+        legs = self.starts[routes][owners] + np.arange(counts.sum()) - offsets[owners]
+
+        scale = 60 * np.cos(np.radians(lats[owners]))
+        ax = (self.lons[legs] - lons[owners]) * scale
+        ay = (self.lats[legs] - lats[owners]) * 60
+        bx = (self.lons[legs + 1] - lons[owners]) * scale
+        by = (self.lats[legs + 1] - lats[owners]) * 60
+        dx, dy = bx - ax, by - ay
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.clip(np.nan_to_num(-(ax * dx + ay * dy) / (dx * dx + dy * dy)), 0, 1)
+        off = np.hypot(ax + fraction * dx, ay + fraction * dy)
+
+        nearest = np.minimum.reduceat(off, offsets)
+        candidates = np.flatnonzero(off == nearest[owners])
+        _, first = np.unique(owners[candidates], return_index=True)
+        best = candidates[first]
+        legs = legs[best]
+        along = self.distances[legs] + fraction[best] * (self.distances[legs + 1] - self.distances[legs])
+        return along, off[best]
+
+
+def build_procedure_paths(routes, nav_data):
+    """
+    ProcedurePaths of .ese Route tuples and the idents that could not be
+    resolved. Runways missing from the nav data fall back to the airport
+    reference point; procedures with fewer than two points are dropped.
+    """
+    points = NavPoints(nav_data)
+    ends = runway_ends(nav_data['runways']) if 'runways' in nav_data else {}
+    kinds, airports, runways, names = [], [], [], []
+    starts = [0]
+    lats, lons, idents = [], [], []
+    unresolved = set()
+    for route in routes:
+        end = ends.get((route.airport, route.runway))
+        anchor = (end.lat, end.lon) if end is not None else None
+        if anchor is None:
+            airport = points.resolve(route.airport)
+            if airport is not None:
+                anchor = (float(points.lats[airport]), float(points.lons[airport]))
+        sequence = []
+        near = anchor
+        for ident in route.fixes:
+            point = points.resolve(ident, near)
+            if point is None:
+                unresolved.add(ident)
+                continue
+            near = (float(points.lats[point]), float(points.lons[point]))
+            if not sequence or sequence[-1][:2] != near:
+                sequence.append(near + (ident,))
+        if anchor is not None:
+            anchor = anchor + (f"RW{route.runway}",)
+            if route.kind == 'SID':
+                sequence.insert(0, anchor)
+            else:
+                sequence.append(anchor)
+        if len(sequence) < 2:
+            continue
+        kinds.append(KINDS.index(route.kind))
+        airports.append(route.airport)
+        runways.append(route.runway)
+        names.append(route.name)
+        lats.extend(lat for lat, _, _ in sequence)
+        lons.extend(lon for _, lon, _ in sequence)
+        idents.extend(ident for _, _, ident in sequence)
+        starts.append(len(lats))
+    return ProcedurePaths(kinds, airports, runways, names, starts, lats, lons, idents), unresolved
+
+
+def load_procedure_paths(ese_path, nav_data_dir="nav_data"):
+    """ProcedurePaths of every SID and STAR in an .ese file"""
+    from ese_parser import EseFile
+    from nav_store import load_nav_data
+    paths, unresolved = build_procedure_paths(EseFile(ese_path).routes.routes, load_nav_data(nav_data_dir))
+    if unresolved:
+        print(f"⚠️ {len(unresolved)} procedure fixes not in the nav data: {', '.join(sorted(unresolved))}")
+    return paths
+
+
+def main():
+    """Resolve the procedures of an .ese file and time batched positions along them"""
+    ese_path = sys.argv[1] if len(sys.argv) > 1 else "FASA-Package_20251004101136-251001-0002.ese"
+    started = time.perf_counter()
+    paths = load_procedure_paths(ese_path)
+    print(f"🛫 {np.count_nonzero(paths.kinds == SID)} SIDs and {np.count_nonzero(paths.kinds == STAR)} STARs, "
+          f"{len(paths.lats)} vertices, in {(time.perf_counter() - started) * 1000:.1f} ms")
+    for route in np.argsort(-paths.lengths)[:3]:
+        print(f"   {KINDS[paths.kinds[route]]} {paths.airports[route]} {paths.runways[route]} "
+              f"{paths.names[route]}: {paths.lengths[route]:.1f} NM")
+
+    count = 1000000
+    rng = np.random.default_rng(0)
+    routes = rng.integers(0, len(paths), count)
+    along = rng.uniform(0, 1, count) * paths.lengths[routes]
+    started = time.perf_counter()
+    paths.position(routes, along)
+    elapsed = time.perf_counter() - started
+    print(f"📍 {count} positions along procedures in {elapsed * 1000:.1f} ms ({count / elapsed:,.0f} per second)")
+
+
+if __name__ == "__main__":
+    main()
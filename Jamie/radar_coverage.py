@@ -0,0 +1,285 @@
+"""
+Radar coverage rasters from the .ese [RADAR] section
+Every RADAR2 site's primary and secondary (S/C mode) coverage is evaluated
+over a lat/lon grid spanning the FIR for each flight level band, with NumPy
+broadcasting over all sites at once. Each cell holds a bitmask of the sites
+covering it throughout the band, so a coverage query is one array lookup.
+
+The rasters are stored compressed as <ese>.radar.npz, keyed by a hash of the
+[RADAR] lines and grid settings, and unpacked once into <ese>.radar.npy which
+is memory-mapped on load.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from ese_parser import EseFile
+from geodesy import great_circle_nm_array
+from npz_cache import load_mapped, save_mapped
+from sector_lookup import SectorIndex
+
+RASTER_SUFFIX = ".radar.npz"
+MMAP_SUFFIX = ".radar.npy"
+
+# Grid spacing in degrees (about 3 NM north-south)
+CELL_SIZE = 0.05
+
+# (bottom, top) flight level bands; a cell is covered in a band when it is
+# covered at every level of it
+FLIGHT_LEVEL_BANDS = tuple((level, level + 50) for level in range(0, 450, 50))
+
+# Coverage kinds, the first axis of the mask array
+KINDS = ('primary', 'secondary')
+
+FEET_PER_NM = 6076.12
+
+# Radio horizon in NM is this factor times sqrt(height in feet), 4/3 earth radius
+RADIO_HORIZON = 1.23
+
+
+def site_beams(sites):
+    """
+    (site, kind, lat, lon, range NM, antenna ft, cone degrees) rows for
+    every mode a site has a range for. S and C mode are both secondary.
+    """
+    beams = []
+    for number, site in enumerate(sites):
+        for kind, (coverage, antenna, cone) in ((0, site.psr), (1, site.smode), (1, site.cmode)):
+            if coverage > 0:
+                beams.append((number, kind, site.lat, site.lon, coverage, antenna, cone))
+    return np.array(beams, dtype=np.float64).reshape(-1, 7)
+
+
+def beam_coverage(distances, beams, bottom_ft, top_ft):
+    """
+    Boolean (beam, ...) coverage from (beam, ...) distances in NM for a
+    vertical band: within range, above the radio horizon at the band's
+    bottom and outside the cone of silence at its top. Cone slopes of 0 or
+    90 degrees and more mean no cone.
+    """
+    shape = (-1,) + (1,) * (distances.ndim - 1)
+    coverage, antenna, cone = (beams[:, column].reshape(shape) for column in (4, 5, 6))
+    horizon = RADIO_HORIZON * (np.sqrt(np.maximum(antenna, 0)) + math.sqrt(max(bottom_ft, 0)))
+    covered = (distances <= coverage) & (distances <= horizon)
+    has_cone = (cone > 0) & (cone < 90)
+    cone_floor = distances * FEET_PER_NM * np.tan(np.radians(np.where(has_cone, cone, 45)))
+    return covered & (~has_cone | (top_ft - antenna <= cone_floor))
+
+
+def build_masks(sites, bounds, cell_size=CELL_SIZE, bands=FLIGHT_LEVEL_BANDS):
+    """
+    (kind, band, row, col) bitmask array over bounds (south, west, north,
+    east); bit n is site n. Cells are evaluated at their centres.
+    """
+    if len(sites) > 64:
+        raise ValueError(f"{len(sites)} radar sites do not fit a 64-bit coverage mask")
+    dtype = next(dtype for dtype in (np.uint8, np.uint16, np.uint32, np.uint64)
+                 if np.dtype(dtype).itemsize * 8 >= len(sites))
+    south, west, north, east = bounds
+    rows = max(1, math.ceil((north - south) / cell_size))
+    cols = max(1, math.ceil((east - west) / cell_size))
+    lats = south + (np.arange(rows) + 0.5) * cell_size
+    lons = west + (np.arange(cols) + 0.5) * cell_size
+
+    beams = site_beams(sites)
+    # (beam, row, col) great-circle distances to every cell centre at once
+    distances = great_circle_nm_array(beams[:, 2, None, None], beams[:, 3, None, None],
+                             lats[None, :, None], lons[None, None, :])
+    bits = np.left_shift(np.ones(len(beams), dtype=dtype), beams[:, 0].astype(dtype)).reshape(-1, 1, 1)
+    zero = dtype(0)
+
+    masks = np.zeros((len(KINDS), len(bands), rows, cols), dtype=dtype)
+    for band, (bottom, top) in enumerate(bands):
+        covered = beam_coverage(distances, beams, bottom * 100, top * 100)
+        for kind in range(len(KINDS)):
+            selected = beams[:, 1] == kind
+            if selected.any():
+                masks[kind, band] = np.bitwise_or.reduce(np.where(covered[selected], bits[selected], zero), axis=0)
+    return masks
+
+
+class RadarCoverage:
+    """Per-band coverage bitmasks on a regular lat/lon grid"""
+
+    def __init__(self, masks, meta):
+        self.masks = masks
+        self.sites = meta['sites']
+        self.south, self.west, self.north, self.east = meta['bounds']
+        self.cell_size = meta['cell_size']
+        self.bands = [tuple(band) for band in meta['bands']]
+        self.band_bottoms = np.array([bottom for bottom, _ in self.bands], dtype=np.float64)
+        self.band_tops = np.array([top for _, top in self.bands], dtype=np.float64)
+
+    @property
+    def shape(self):
+        return self.masks.shape
+
+    def mask_at(self, lats, lons, flight_levels, kind=None):
+        """
+        Coverage bitmasks for arrays of positions (flight levels in hundreds
+        of feet): primary, secondary or by default both. Positions outside
+        the grid or the bands have no coverage.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        levels = np.broadcast_to(np.asarray(flight_levels, dtype=np.float64), lats.shape)
+        rows = np.floor((lats - self.south) / self.cell_size).astype(np.int64)
+        cols = np.floor((lons - self.west) / self.cell_size).astype(np.int64)
+        bands = np.searchsorted(self.band_bottoms, levels, side='right') - 1
+        valid = ((rows >= 0) & (rows < self.masks.shape[2]) & (cols >= 0) & (cols < self.masks.shape[3])
+                 & (bands >= 0) & (levels <= self.band_tops[np.maximum(bands, 0)]))
+        rows, cols, bands = (np.where(valid, values, 0) for values in (rows, cols, bands))
+        if kind is None:
+            masks = self.masks[0, bands, rows, cols] | self.masks[1, bands, rows, cols]
+        else:
+            masks = self.masks[KINDS.index(kind), bands, rows, cols]
+        return np.where(valid, masks, 0)
+
+    def sites_at(self, lat, lon, flight_level, kind=None):
+        """Names of the sites covering one position"""
+        mask = int(self.mask_at(lat, lon, flight_level, kind))
+        return [name for number, name in enumerate(self.sites) if mask >> number & 1]
+
+    def covered(self, lats, lons, flight_levels, kind=None):
+        """True where at least one site covers the position"""
+        return self.mask_at(lats, lons, flight_levels, kind) != 0
+
+
+def radar_hash(ese, bounds, cell_size, bands):
+    """
+    SHA-256 over the [RADAR] lines and the grid settings a raster was built
+    with; without explicit bounds the [AIRSPACE] lines they come from count too
+    """
+    digest = hashlib.sha256()
+    for section in ('RADAR',) if bounds is not None else ('RADAR', 'AIRSPACE'):
+        for line in ese.lines(section):
+            digest.update(line.encode('utf-8'))
+            digest.update(b'\n')
+    digest.update(json.dumps([bounds, cell_size, [list(band) for band in bands]]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def grid_bounds(ese):
+    """
+    (south, west, north, east) of the FIR's sector polygons, cut down to the
+    box the radar ranges can reach, since cells beyond it are never covered
+    """
+    boxes = SectorIndex(ese.airspace).rings.boxes
+    beams = site_beams(ese.radars)
+    if not len(beams):
+        return (float(boxes[:, 0].min()), float(boxes[:, 1].min()),
+                float(boxes[:, 2].max()), float(boxes[:, 3].max()))
+    reach_lat = beams[:, 4] / 60
+    reach_lon = reach_lat / np.maximum(np.cos(np.radians(np.abs(beams[:, 2]) + reach_lat)), 0.01)
+    return (float(max(boxes[:, 0].min(), (beams[:, 2] - reach_lat).min())),
+            float(max(boxes[:, 1].min(), (beams[:, 3] - reach_lon).min())),
+            float(min(boxes[:, 2].max(), (beams[:, 2] + reach_lat).max())),
+            float(min(boxes[:, 3].max(), (beams[:, 3] + reach_lon).max())))
+
+
+def save_raster(path, masks, meta, source_hash):
+    """Compressed .npz with the masks, the source hash and JSON metadata"""
+    save_mapped(path, 'masks', masks, meta, source_hash)
+
+
+def load_raster(path, source_hash=None):
+    """
+    RadarCoverage from a compressed raster, or None when it is missing,
+    unreadable or was built for another hash. The masks are memory-mapped
+    from a sibling .npy unpacked from it.
+    """
+    mmap_path = path[:-len(RASTER_SUFFIX)] + MMAP_SUFFIX if path.endswith(RASTER_SUFFIX) else path + '.npy'
+    loaded = load_mapped(path, 'masks', mmap_path, source_hash)
+    return RadarCoverage(*loaded) if loaded is not None else None
+
+
+def radar_coverage(ese_path, cell_size=CELL_SIZE, bands=FLIGHT_LEVEL_BANDS, bounds=None, cache=True):
+    """
+    RadarCoverage for an .ese file: the stored raster when it matches the
+    [RADAR] section and settings, else built (over grid_bounds unless
+    bounds are given) and stored.
+    """
+    ese = EseFile(ese_path)
+    bounds = list(bounds) if bounds is not None else None
+    source_hash = radar_hash(ese, bounds, cell_size, bands)
+    path = ese_path + RASTER_SUFFIX
+    if cache:
+        coverage = load_raster(path, source_hash)
+        if coverage is not None:
+            return coverage
+
+    sites = ese.radars
+    bounds = bounds or list(grid_bounds(ese))
+    masks = build_masks(sites, bounds, cell_size, bands)
+    meta = {'sites': [site.name for site in sites], 'bounds': bounds,
+            'cell_size': cell_size, 'bands': [list(band) for band in bands]}
+    if cache:
+        save_raster(path, masks, meta, source_hash)
+        coverage = load_raster(path, source_hash)
+        if coverage is not None:
+            return coverage
+    return RadarCoverage(masks, meta)
+
+
+def _site_loop(sites, lat, lon, flight_level, bands):
+    """Reference coverage mask of one position, site by site"""
+    band = next(number for number, (bottom, top) in enumerate(bands) if bottom <= flight_level < top)
+    bottom, top = bands[band]
+    mask = 0
+    for number, site in enumerate(sites):
+        beams = site_beams([site])
+        distances = great_circle_nm_array(beams[:, 2], beams[:, 3], lat, lon)
+        if beam_coverage(distances, beams, bottom * 100, top * 100).any():
+            mask |= 1 << number
+    return mask
+
+
+def main():
+    """Build (or load) the coverage raster of an .ese file and time lookups"""
+    path = sys.argv[1] if len(sys.argv) > 1 else "FASA-Package_20251004101136-251001-0002.ese"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    started = time.perf_counter()
+    coverage = radar_coverage(path, cache=False)
+    build_time = time.perf_counter() - started
+    _, bands, rows, cols = coverage.shape
+    print(f"📡 {len(coverage.sites)} radar sites, {bands} bands of {rows}x{cols} cells "
+          f"({coverage.masks.dtype}) built in {build_time:.2f} s")
+
+    radar_coverage(path)
+    started = time.perf_counter()
+    coverage = radar_coverage(path)
+    load_time = time.perf_counter() - started
+    stored = os.path.getsize(path + RASTER_SUFFIX)
+    print(f"💾 {stored / 1024:.0f} KB compressed ({coverage.masks.nbytes / 1024:.0f} KB unpacked), "
+          f"warm load {load_time * 1000:.1f} ms (memory-mapped)")
+
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(coverage.south, coverage.north, count)
+    lons = rng.uniform(coverage.west, coverage.east, count)
+    levels = rng.uniform(0, 450, count)
+    started = time.perf_counter()
+    masks = coverage.mask_at(lats, lons, levels)
+    elapsed = time.perf_counter() - started
+    print(f"🔎 {count} coverage lookups in {elapsed * 1000:.1f} ms ({count / elapsed:,.0f} per second), "
+          f"{np.count_nonzero(masks) / count:.0%} covered")
+
+    # At cell centres the raster and a per-site evaluation must agree exactly
+    sites = EseFile(path).radars
+    sample = 500
+    centre_lats = coverage.south + (np.floor((lats[:sample] - coverage.south) / coverage.cell_size) + 0.5) * coverage.cell_size
+    centre_lons = coverage.west + (np.floor((lons[:sample] - coverage.west) / coverage.cell_size) + 0.5) * coverage.cell_size
+    mismatches = sum(int(masks[i]) != _site_loop(sites, centre_lats[i], centre_lons[i], levels[i], coverage.bands)
+                     for i in range(sample))
+    print(f"✅ Site-by-site check on {sample} positions: {mismatches} mismatches")
+    print(f"   FAOR at FL100: {', '.join(coverage.sites_at(-26.13, 28.24, 100))}")
+
+
+if __name__ == "__main__":
+    main()
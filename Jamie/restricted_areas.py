@@ -0,0 +1,405 @@
+"""
+Restricted, danger and prohibited area incursions over TopSkyAreas.txt
+Trajectories are arrays of time, lat, lon and altitude (feet) samples, one or
+many aircraft at once. Every segment between two samples is prefiltered
+against the area outlines with a packed R-tree and the vertical LIMITS, then
+split at its exact polygon edge and level crossings with vectorized segment
+intersection, so whole replay files are checked without a Python loop per
+sample. Entries and exits are reported with interpolated times and positions.
+"""
+
+import csv
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from sector_lookup import PackedRTree, PolygonRings
+from topsky_maps import TOPSKY_DIR, load_areas
+
+# Segments handled per vectorized batch, which bounds the (segment, edge) work arrays
+SEGMENT_CHUNK = 20000
+
+# Replay CSV columns; time is seconds (epoch or replay relative) or an ISO 8601 timestamp
+REPLAY_FIELDS = ('callsign', 'time', 'lat', 'lon', 'altitude')
+
+Incursion = namedtuple('Incursion', ['callsign', 'area', 'category', 'entry_time', 'exit_time',
+                                     'entry_lat', 'entry_lon', 'entry_altitude',
+                                     'exit_lat', 'exit_lon', 'exit_altitude'])
+
+
+def parse_time(value):
+    """Seconds from a number or an ISO 8601 timestamp (UTC unless it says otherwise)"""
+    try:
+        return float(value)
+    except ValueError:
+        stamp = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=timezone.utc)
+        return stamp.timestamp()
+
+
+def _schedule_windows(fields, start, end):
+    """
+    Active (from, to) windows between start and end of an
+    ACTIVE:startdate:enddate:weekdays:starttime:endtime line: dates YYMMDD
+    (0 for open), weekdays 0 for every day or digits 1 (Monday) to 7,
+    times HHMM UTC.
+    """
+    first_date, last_date, weekdays, from_time, to_time = fields[:5]
+    windows = []
+    day = datetime.fromtimestamp(start, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    day -= timedelta(days=1)
+    while day.timestamp() <= end:
+        stamp = day.strftime('%y%m%d')
+        if ((first_date == '0' or stamp >= first_date) and (last_date == '0' or stamp <= last_date)
+                and (weekdays == '0' or str(day.isoweekday()) in weekdays)):
+            opens = day + timedelta(hours=int(from_time[:2]), minutes=int(from_time[2:4]))
+            closes = day + timedelta(hours=int(to_time[:2]), minutes=int(to_time[2:4]))
+            if closes <= opens:
+                closes += timedelta(days=1)
+            windows.append((opens.timestamp(), closes.timestamp()))
+        day += timedelta(days=1)
+    return windows
+
+
+def active_windows(area, start, end):
+    """
+    (from, to) windows in which an area is active between start and end
+    seconds (UTC epoch). ACTIVE:1 is always active and ACTIVE:0 never;
+    schedules are expanded day by day. NOTAM, AUP and runway conditions
+    cannot be known after the session and count as active.
+    """
+    windows = []
+    for text in area.active or ['1']:
+        fields = text.split(':')
+        if fields[0] == '0' and len(fields) == 1:
+            continue
+        if len(fields) >= 5 and all(field.isdigit() for field in fields[:5]):
+            windows.extend(_schedule_windows(fields, start, end))
+        else:
+            return [(-np.inf, np.inf)]
+    return windows
+
+
+class AreaIndex:
+    """TopSky areas with their outlines, vertical limits and an R-tree over them"""
+
+    def __init__(self, areas, categories=None):
+        self.areas = []
+        rings = []
+        for area in areas:
+            if categories is not None and area.category not in categories:
+                continue
+            ring = area.coords
+            ring = ring[~np.isnan(ring).any(axis=1)]
+            # The closing point repeats the first; the ring edges close it anyway
+            if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                ring = ring[:-1]
+            if len(ring) >= 3:
+                self.areas.append(area)
+                rings.append(ring)
+
+        self.names = [area.name for area in self.areas]
+        self.lowers = np.array([area.lower * 100 for area in self.areas], dtype=np.float64)
+        self.uppers = np.array([area.upper * 100 for area in self.areas], dtype=np.float64)
+        self.rings = PolygonRings(rings)
+        self.tree = PackedRTree(self.rings.boxes)
+
+    def __len__(self):
+        return len(self.areas)
+
+    def _crossings(self, pairs, segments, areas, lats, lons):
+        """
+        (pair, fraction) of every polygon edge crossing of each candidate
+        (segment, area) pair, with the fraction along the segment in (0, 1].
+        """
+        edges, _, counts = self.rings.expand(areas)
+        pair_of_edge = np.repeat(pairs, counts)
+        segment = np.repeat(segments, counts)
+        lat0 = lats[segment]
+        lon0 = lons[segment]
+        d_lat = lats[segment + 1] - lat0
+        d_lon = lons[segment + 1] - lon0
+        e_lat = self.rings.lat2[edges] - self.rings.lat1[edges]
+        e_lon = self.rings.lon2[edges] - self.rings.lon1[edges]
+        q_lat = self.rings.lat1[edges] - lat0
+        q_lon = self.rings.lon1[edges] - lon0
+        denominator = d_lat * e_lon - d_lon * e_lat
+        with np.errstate(divide='ignore', invalid='ignore'):
+            along_segment = (q_lat * e_lon - q_lon * e_lat) / denominator
+            along_edge = (q_lat * d_lon - q_lon * d_lat) / denominator
+        crossing = ((denominator != 0) & (along_segment > 0) & (along_segment <= 1)
+                    & (along_edge >= 0) & (along_edge < 1))
+        return pair_of_edge[crossing], along_segment[crossing]
+
+    def segment_intervals(self, tracks, lats, lons, altitudes, offset=0):
+        """
+        (segment, area, start fraction, end fraction) of every stretch of a
+        segment inside an area, for the segments offset up to offset + n - 1
+        of the sample arrays (n being the length of the slices passed in).
+        Segments join consecutive samples of the same track.
+        """
+        segments = np.flatnonzero(tracks[:-1] == tracks[1:])
+        if not len(segments):
+            return (np.zeros(0, dtype=np.int64),) * 2 + (np.zeros(0),) * 2
+        lat0, lat1 = lats[segments], lats[segments + 1]
+        lon0, lon1 = lons[segments], lons[segments + 1]
+        alt0, alt1 = altitudes[segments], altitudes[segments + 1]
+
+        found, areas = self.tree.query_boxes(np.minimum(lat0, lat1), np.minimum(lon0, lon1),
+                                             np.maximum(lat0, lat1), np.maximum(lon0, lon1))
+        level_ok = ((np.minimum(alt0, alt1)[found] <= self.uppers[areas])
+                    & (np.maximum(alt0, alt1)[found] >= self.lowers[areas]))
+        found = found[level_ok]
+        areas = areas[level_ok]
+        segments = segments[found]
+        pairs = np.arange(len(segments))
+        if not len(pairs):
+            return (np.zeros(0, dtype=np.int64),) * 2 + (np.zeros(0),) * 2
+
+        inside_at_start = self.rings.contains(segments, areas, lats, lons)
+        crossing_pairs, crossing_fractions = self._crossings(pairs, segments, areas, lats, lons)
+
+        # Fractions where the altitude passes the lower or upper limit
+        climb = altitudes[segments + 1] - altitudes[segments]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            to_lower = (self.lowers[areas] - altitudes[segments]) / climb
+            to_upper = (self.uppers[areas] - altitudes[segments]) / climb
+        level_pairs = []
+        level_fractions = []
+        for fractions in (to_lower, to_upper):
+            passes = (fractions > 0) & (fractions < 1)
+            level_pairs.append(pairs[passes])
+            level_fractions.append(fractions[passes])
+
+        # Every breakpoint of every pair, with the segment ends as sentinels;
+        # only polygon crossings flip the horizontal state
+        pair_of = np.concatenate([pairs, pairs, crossing_pairs] + level_pairs)
+        fraction = np.concatenate([np.zeros(len(pairs)), np.ones(len(pairs)), crossing_fractions] + level_fractions)
+        flips = np.concatenate([np.zeros(2 * len(pairs), dtype=np.int32),
+                                np.ones(len(crossing_pairs), dtype=np.int32),
+                                np.zeros(sum(len(p) for p in level_pairs), dtype=np.int32)])
+        is_end = np.concatenate([np.zeros(len(pairs), dtype=bool), np.ones(len(pairs), dtype=bool),
+                                 np.zeros(len(fraction) - 2 * len(pairs), dtype=bool)])
+        order = np.lexsort((is_end, fraction, pair_of))
+        pair_of = pair_of[order]
+        fraction = fraction[order]
+        flips = np.cumsum(flips[order])
+        group_start = np.flatnonzero(np.r_[True, pair_of[1:] != pair_of[:-1]])
+        flips -= np.repeat(flips[group_start], np.diff(np.r_[group_start, len(pair_of)]))
+
+        # Stretches between consecutive breakpoints of the same pair
+        left = np.flatnonzero(pair_of[:-1] == pair_of[1:])
+        stretch_pairs = pair_of[left]
+        start = fraction[left]
+        end = fraction[left + 1]
+        horizontal = inside_at_start[stretch_pairs] ^ (flips[left] % 2 == 1)
+        middle = altitudes[segments[stretch_pairs]] + (start + end) / 2 * climb[stretch_pairs]
+        vertical = (self.lowers[areas[stretch_pairs]] <= middle) & (middle <= self.uppers[areas[stretch_pairs]])
+        keep = horizontal & vertical & (end > start)
+        stretch_pairs = stretch_pairs[keep]
+        return segments[stretch_pairs] + offset, areas[stretch_pairs], start[keep], end[keep]
+
+    def check(self, tracks, times, lats, lons, altitudes, callsigns=None, schedules=True):
+        """
+        Incursions of sampled trajectories, sorted by entry time. Samples of
+        one track must be consecutive and in time order; tracks are integer
+        ids (callsigns[id] names them). An aircraft inside an area at its
+        first or last sample enters or exits at that sample. With schedules
+        the times are UTC epoch seconds and only active periods count.
+        """
+        tracks = np.asarray(tracks)
+        times = np.asarray(times, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        altitudes = np.asarray(altitudes, dtype=np.float64)
+
+        found = [[], [], [], []]
+        for start in range(0, max(len(times) - 1, 0), SEGMENT_CHUNK):
+            # One sample of overlap so the last segment of the chunk is included
+            end = start + SEGMENT_CHUNK + 1
+            for column, values in zip(found, self.segment_intervals(
+                    tracks[start:end], lats[start:end], lons[start:end],
+                    altitudes[start:end], start)):
+                column.append(values)
+        if not found[0]:
+            return []
+        segments, areas, start_fraction, end_fraction = (np.concatenate(column) for column in found)
+        if not len(segments):
+            return []
+
+        # Join stretches of the same track and area that meet at a sample
+        segment_time = times[segments + 1] - times[segments]
+        entry = times[segments] + start_fraction * segment_time
+        exit_ = times[segments] + end_fraction * segment_time
+        order = np.lexsort((entry, areas, tracks[segments]))
+        segments, areas, entry, exit_ = segments[order], areas[order], entry[order], exit_[order]
+        start_fraction, end_fraction = start_fraction[order], end_fraction[order]
+        continues = ((areas[1:] == areas[:-1]) & (tracks[segments[1:]] == tracks[segments[:-1]])
+                     & (start_fraction[1:] == 0) & (end_fraction[:-1] == 1)
+                     & (segments[1:] == segments[:-1] + 1))
+        first = np.flatnonzero(np.r_[True, ~continues])
+        last = np.r_[first[1:] - 1, len(segments) - 1]
+
+        def position(segment, fraction):
+            return tuple(float(values[segment] + fraction * (values[segment + 1] - values[segment]))
+                         for values in (lats, lons, altitudes))
+
+        incursions = []
+        for head, tail in zip(first, last):
+            area = self.areas[areas[head]]
+            windows = (active_windows(area, entry[head], exit_[tail]) if schedules
+                       else [(-np.inf, np.inf)])
+            for opens, closes in windows:
+                entry_time = max(entry[head], opens)
+                exit_time = min(exit_[tail], closes)
+                if entry_time >= exit_time:
+                    continue
+                entry_segment = segments[head + min(np.searchsorted(exit_[head:tail + 1], entry_time), tail - head)]
+                exit_segment = segments[head + min(np.searchsorted(exit_[head:tail + 1], exit_time), tail - head)]
+                track = tracks[segments[head]]
+                incursions.append(Incursion(
+                    callsigns[track] if callsigns is not None else track.item(),
+                    area.name, area.category, float(entry_time), float(exit_time),
+                    *position(entry_segment, _fraction(times, entry_segment, entry_time)),
+                    *position(exit_segment, _fraction(times, exit_segment, exit_time))
+                ))
+        incursions.sort(key=lambda incursion: incursion.entry_time)
+        return incursions
+
+    def check_trajectory(self, times, lats, lons, altitudes, callsign='', schedules=True):
+        """Incursions of a single aircraft's trajectory"""
+        return self.check(np.zeros(len(times), dtype=np.int32), times, lats, lons, altitudes,
+                          [callsign], schedules)
+
+
+def _fraction(times, segment, moment):
+    span = times[segment + 1] - times[segment]
+    return (moment - times[segment]) / span if span else 0.0
+
+
+def read_replay(path):
+    """
+    Replay CSV (callsign, time, lat, lon, altitude with a header) as
+    (tracks, times, lats, lons, altitudes, callsigns) sorted by track and time
+    """
+    callsigns = {}
+    columns = ([], [], [], [], [])
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            columns[0].append(callsigns.setdefault(row['callsign'], len(callsigns)))
+            columns[1].append(parse_time(row['time']))
+            columns[2].append(float(row['lat']))
+            columns[3].append(float(row['lon']))
+            columns[4].append(float(row['altitude']))
+    tracks = np.asarray(columns[0], dtype=np.int32)
+    times, lats, lons, altitudes = (np.asarray(column, dtype=np.float64) for column in columns[1:])
+    order = np.lexsort((times, tracks))
+    return (tracks[order], times[order], lats[order], lons[order], altitudes[order],
+            list(callsigns))
+
+
+def synthetic_replay(index, aircraft, samples, step=5.0, seed=0):
+    """Straight climbing, cruising or descending tracks across the areas' extent"""
+    rng = np.random.default_rng(seed)
+    boxes = index.rings.boxes
+    south, west = boxes[:, 0].min(), boxes[:, 1].min()
+    north, east = boxes[:, 2].max(), boxes[:, 3].max()
+    start_lat = rng.uniform(south, north, aircraft)
+    start_lon = rng.uniform(west, east, aircraft)
+    end_lat = rng.uniform(south, north, aircraft)
+    end_lon = rng.uniform(west, east, aircraft)
+    start_alt = rng.uniform(0, 40000, aircraft)
+    end_alt = rng.uniform(0, 40000, aircraft)
+
+    fraction = np.tile(np.linspace(0, 1, samples), aircraft)
+    tracks = np.repeat(np.arange(aircraft, dtype=np.int32), samples)
+    times = 1.759e9 + np.tile(np.arange(samples) * step, aircraft)
+    lats = start_lat[tracks] + fraction * (end_lat - start_lat)[tracks]
+    lons = start_lon[tracks] + fraction * (end_lon - start_lon)[tracks]
+    altitudes = start_alt[tracks] + fraction * (end_alt - start_alt)[tracks]
+    return tracks, times, lats, lons, altitudes
+
+
+def _dense_inside_time(index, tracks, times, lats, lons, altitudes, steps=200):
+    """Reference seconds inside any area per (track, area) from densely resampled segments"""
+    totals = {}
+    for segment in np.flatnonzero(tracks[:-1] == tracks[1:]):
+        fractions = (np.arange(steps) + 0.5) / steps
+        lat = lats[segment] + fractions * (lats[segment + 1] - lats[segment])
+        lon = lons[segment] + fractions * (lons[segment + 1] - lons[segment])
+        alt = altitudes[segment] + fractions * (altitudes[segment + 1] - altitudes[segment])
+        points, areas = index.tree.query_points(lat, lon)
+        inside = index.rings.contains(points, areas, lat, lon)
+        inside &= (index.lowers[areas] <= alt[points]) & (alt[points] <= index.uppers[areas])
+        for area in areas[inside]:
+            key = (int(tracks[segment]), int(area))
+            totals[key] = totals.get(key, 0.0) + (times[segment + 1] - times[segment]) / steps
+    return totals
+
+
+def benchmark(aircraft=2000, samples=500):
+    """Time incursion checks of a synthetic replay and compare with dense sampling"""
+    started = time.perf_counter()
+    index = AreaIndex(load_areas(os.path.join(TOPSKY_DIR, "TopSkyAreas.txt")))
+    print(f"🛑 {len(index)} areas, {len(index.rings.lat1)} edges in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    replay = synthetic_replay(index, aircraft, samples)
+    started = time.perf_counter()
+    incursions = index.check(*replay)
+    elapsed = time.perf_counter() - started
+    count = len(replay[0])
+    print(f"✈️ {aircraft} tracks, {count} samples in {elapsed:.2f} s "
+          f"({count / elapsed:,.0f} samples per second), {len(incursions)} incursions")
+
+    check_tracks = 20
+    sample = replay[0] < check_tracks
+    tracks, times, lats, lons, altitudes = (column[sample] for column in replay)
+    expected = _dense_inside_time(index, tracks, times, lats, lons, altitudes)
+    found = {}
+    for incursion in index.check(tracks, times, lats, lons, altitudes, schedules=False):
+        key = (incursion.callsign, incursion.area)
+        found[key] = found.get(key, 0.0) + incursion.exit_time - incursion.entry_time
+    expected_by_name = {}
+    for (track, area), seconds in expected.items():
+        key = (track, index.names[area])
+        expected_by_name[key] = expected_by_name.get(key, 0.0) + seconds
+    worst = max([abs(found.get(key, 0.0) - expected_by_name.get(key, 0.0))
+                 for key in set(found) | set(expected_by_name)] or [0.0])
+    print(f"✅ Dense sampling check on {check_tracks} tracks: worst difference {worst:.3f} s inside")
+
+
+def main():
+    """
+    Usage: python restricted_areas.py replay.csv [--categories RESTRIC,DANGER] [--no-schedules]
+           python restricted_areas.py --benchmark [aircraft] [samples]
+    """
+    args = sys.argv[1:]
+    if not args or args[0] == "--benchmark":
+        numbers = [int(arg) for arg in args[1:] if arg.isdigit()]
+        benchmark(*numbers)
+        return
+
+    categories = None
+    if "--categories" in args:
+        position = args.index("--categories")
+        categories = set(args[position + 1].split(',')) if position + 1 < len(args) else None
+    index = AreaIndex(load_areas(os.path.join(TOPSKY_DIR, "TopSkyAreas.txt")), categories)
+    started = time.perf_counter()
+    tracks, times, lats, lons, altitudes, callsigns = read_replay(args[0])
+    incursions = index.check(tracks, times, lats, lons, altitudes, callsigns,
+                             schedules="--no-schedules" not in args)
+    for incursion in incursions:
+        print(f"⚠️ {incursion.callsign} {incursion.area} ({incursion.category}) "
+              f"{incursion.entry_time:.0f}-{incursion.exit_time:.0f} "
+              f"entered at {incursion.entry_altitude:.0f} ft")
+    print(f"✅ {len(times)} samples of {len(callsigns)} aircraft checked in "
+          f"{time.perf_counter() - started:.2f} s: {len(incursions)} incursions")
+
+
+if __name__ == "__main__":
+    main()
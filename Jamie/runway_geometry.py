@@ -0,0 +1,225 @@
+"""
+Runway geometry from threshold coordinates (nav_data/runways.txt)
+Length, true bearings of both directions, geodesic midpoint and magnetic
+bearings are computed for every runway in one vectorized WGS-84 pass. There
+is no magnetic model in the tree, so the magnetic variation is derived from
+the runways that do publish a heading: the median per airport, or the
+nearest airport's where an airport has none.
+
+Threshold pairs listed against their designator are swapped before any of
+this, so every runway end gets its own threshold. Results are cached as an
+.npz keyed by a hash of the input columns, so repeated builds with unchanged
+runways skip the computation.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from geodesy import METRES_PER_NM, initial_bearing_array, vincenty_direct_array, vincenty_inverse_array
+from npz_cache import CACHE_ERRORS, save_npz
+from spatial_index import GeoGrid
+
+GEOMETRY_FIELDS = ('length', 'true1', 'true2', 'magnetic1', 'magnetic2', 'variation', 'mid_lat', 'mid_lon')
+THRESHOLD_FIELDS = ('lat1', 'lon1', 'lat2', 'lon2')
+
+RunwayEnd = namedtuple('RunwayEnd', ['lat', 'lon', 'true_bearing'])
+
+# Published headings further than this from the true bearing are data errors,
+# not magnetic variation
+MAX_VARIATION = 30.0
+
+
+def wrap_degrees(values):
+    """Angles folded into (-180, 180]"""
+    return 180 - (180 - np.asarray(values, dtype=np.float64)) % 360
+
+
+def published_headings(headings):
+    """Float array of text headings; '000', blanks and junk become NaN"""
+    values = np.full(len(headings), np.nan)
+    for row, heading in enumerate(headings):
+        heading = heading.strip()
+        if heading.isdigit() and 0 < int(heading) <= 360:
+            values[row] = int(heading)
+    return values
+
+
+def designator_headings(designators):
+    """Nominal magnetic heading of runway designators ('09L' is 90), NaN without a number"""
+    values = np.full(len(designators), np.nan)
+    for row, designator in enumerate(designators):
+        digits = designator.strip()[:2].rstrip('LRCGS')
+        if digits.isdigit() and 1 <= int(digits) <= 36:
+            values[row] = int(digits) * 10
+    return values
+
+
+def reversed_thresholds(magnetic1, designators):
+    """True where the first threshold's bearing points the opposite way to its designator"""
+    nominal = designator_headings(designators)
+    with np.errstate(invalid='ignore'):
+        return np.abs(wrap_degrees(magnetic1 - nominal)) > 90
+
+
+def oriented_thresholds(lat1, lon1, lat2, lon2, designators):
+    """
+    Threshold columns with each pair swapped where the first threshold's true
+    bearing runs against its designator (variation is far below the 90°
+    this allows), and the mask of swapped rows
+    """
+    swapped = reversed_thresholds(initial_bearing_array(lat1, lon1, lat2, lon2), designators)
+    return (np.where(swapped, lat2, lat1), np.where(swapped, lon2, lon1),
+            np.where(swapped, lat1, lat2), np.where(swapped, lon1, lon2), swapped)
+
+
+def runway_variation(true1, true2, heading1, heading2, airports, mid_lats, mid_lons):
+    """
+    Magnetic variation (east positive) for every runway: the median of the
+    true-minus-published differences of its airport's runways, else that of
+    the nearest airport which has one, else 0.
+    """
+    differences = np.concatenate([wrap_degrees(true1 - heading1), wrap_degrees(true2 - heading2)])
+    owners = np.concatenate([airports, airports])
+    usable = ~np.isnan(differences) & (np.abs(differences) <= MAX_VARIATION)
+
+    known = {}
+    for airport in np.unique(owners[usable]):
+        known[airport] = float(np.median(differences[usable & (owners == airport)]))
+    variation = np.array([known.get(airport, np.nan) for airport in airports])
+
+    missing = np.flatnonzero(np.isnan(variation))
+    if len(missing) and known:
+        have = np.flatnonzero(~np.isnan(variation))
+        grid = GeoGrid(mid_lats[have], mid_lons[have])
+        for row in missing:
+            nearest, _ = grid.nearest(mid_lats[row], mid_lons[row])
+            variation[row] = variation[have[nearest[0]]]
+    return np.nan_to_num(variation)
+
+
+def compute_geometry(lat1, lon1, lat2, lon2, heading1, heading2, airports):
+    """
+    Arrays of length (metres), true and magnetic bearings of both
+    directions, the variation used and the geodesic midpoint
+    """
+    distance, forward, final = vincenty_inverse_array(lat1, lon1, lat2, lon2)
+    true1 = forward
+    true2 = (final + 180) % 360
+    mid_lat, mid_lon, _ = vincenty_direct_array(lat1, lon1, forward, distance / 2)
+    variation = runway_variation(true1, true2, published_headings(heading1), published_headings(heading2),
+                                 np.asarray(airports), mid_lat, mid_lon)
+    return {
+        'length': distance * METRES_PER_NM,
+        'true1': true1,
+        'true2': true2,
+        'magnetic1': (true1 - variation) % 360,
+        'magnetic2': (true2 - variation) % 360,
+        'variation': variation,
+        'mid_lat': mid_lat,
+        'mid_lon': mid_lon
+    }
+
+
+def input_hash(lat1, lon1, lat2, lon2, heading1, heading2, airports):
+    """SHA-256 over the coordinate columns and the heading and airport text"""
+    digest = hashlib.sha256()
+    for column in (lat1, lon1, lat2, lon2):
+        digest.update(np.ascontiguousarray(column, dtype=np.float64).tobytes())
+    for column in (heading1, heading2, airports):
+        digest.update('\0'.join(column).encode('utf-8'))
+        digest.update(b'\1')
+    return digest.hexdigest()
+
+
+def runway_geometry(lat1, lon1, lat2, lon2, heading1, heading2, airports, cache_path=None):
+    """
+    Geometry arrays (GEOMETRY_FIELDS) for runway threshold pairs, read from
+    cache_path when it was written for the same inputs
+    """
+    source_hash = input_hash(lat1, lon1, lat2, lon2, heading1, heading2, airports)
+    if cache_path:
+        try:
+            with np.load(cache_path) as cached:
+                if cached['source_hash'].tobytes().hex() == source_hash:
+                    return {field: cached[field] for field in GEOMETRY_FIELDS}
+        except CACHE_ERRORS:
+            pass
+
+    geometry = compute_geometry(lat1, lon1, lat2, lon2, heading1, heading2, airports)
+    if cache_path:
+        save_npz(cache_path, source_hash=np.frombuffer(bytes.fromhex(source_hash), dtype=np.uint8), **geometry)
+    return geometry
+
+
+def table_geometry(runways, cache_path=None):
+    """
+    runway_geometry() for a nav_store 'runways' table after orienting its
+    thresholds, plus the oriented THRESHOLD_FIELDS and the 'swapped' mask
+    """
+    columns = runways.columns
+    *thresholds, swapped = oriented_thresholds(columns['lat1'], columns['lon1'], columns['lat2'], columns['lon2'],
+                                               runways.text('rwy1'))
+    geometry = runway_geometry(*thresholds, runways.text('hdg1'), runways.text('hdg2'), runways.text('airport'),
+                               cache_path)
+    return dict(geometry, **dict(zip(THRESHOLD_FIELDS, thresholds)), swapped=swapped)
+
+
+def runway_ends(runways, geometry=None):
+    """(airport, runway designator) -> RunwayEnd at its threshold, from a nav_store 'runways' table"""
+    if geometry is None:
+        geometry = table_geometry(runways)
+    lat1, lon1, lat2, lon2 = (geometry[field].tolist() for field in THRESHOLD_FIELDS)
+    true1, true2 = geometry['true1'].tolist(), geometry['true2'].tolist()
+    ends = {}
+    for row, (airport, rwy1, rwy2) in enumerate(zip(runways.text('airport'), runways.text('rwy1'),
+                                                    runways.text('rwy2'))):
+        ends[(airport, rwy1)] = RunwayEnd(lat1[row], lon1[row], true1[row])
+        ends[(airport, rwy2)] = RunwayEnd(lat2[row], lon2[row], true2[row])
+    return ends
+
+
+def main():
+    """Compute runway geometry for nav_data, time it cold and cached, and list the derived headings"""
+    from nav_store import load_nav_data
+    nav_data_dir = sys.argv[1] if len(sys.argv) > 1 else "nav_data"
+    runways = load_nav_data(nav_data_dir)['runways']
+    columns = runways.columns
+    heading1, heading2, airports = runways.text('hdg1'), runways.text('hdg2'), runways.text('airport')
+    rwy1 = runways.text('rwy1')
+    *thresholds, swapped = oriented_thresholds(columns['lat1'], columns['lon1'], columns['lat2'], columns['lon2'],
+                                               rwy1)
+    inputs = (*thresholds, heading1, heading2, airports)
+
+    started = time.perf_counter()
+    geometry = compute_geometry(*inputs)
+    elapsed = time.perf_counter() - started
+    print(f"🛬 {len(runways)} runways in {elapsed * 1000:.1f} ms, "
+          f"median length {np.median(geometry['length']):.0f} m")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "runway_geometry.cache.npz")
+        runway_geometry(*inputs, cache_path=cache_path)
+        started = time.perf_counter()
+        runway_geometry(*inputs, cache_path=cache_path)
+        print(f"💾 Cached load in {(time.perf_counter() - started) * 1000:.1f} ms (hash included)")
+
+    published = published_headings(heading1)
+    derived = np.isnan(published)
+    print(f"🧭 Magnetic variation {geometry['variation'].min():.1f}° to {geometry['variation'].max():.1f}° "
+          f"from {np.count_nonzero(~derived)} published headings; {np.count_nonzero(derived)} headings derived")
+    swapped_rows = np.flatnonzero(swapped)
+    print(f"⚠️ {len(swapped_rows)} runways with thresholds listed against their designator, swapped: "
+          f"{', '.join(f'{airports[row]} {rwy1[row]}' for row in swapped_rows[:10])}")
+    for row in np.flatnonzero(derived)[:5]:
+        print(f"   {airports[row]} {rwy1[row]}: {geometry['magnetic1'][row]:05.1f}° magnetic, "
+              f"{geometry['true1'][row]:05.1f}° true, {geometry['length'][row]:.0f} m")
+
+
+if __name__ == "__main__":
+    main()
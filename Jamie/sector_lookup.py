@@ -0,0 +1,329 @@
+"""
+Sector lookup over the .ese [AIRSPACE] geometry
+Each SECTOR's BORDER lines (SECTORLINE coordinates or CIRCLE_SECTORLINE
+circles) are chained into one polygon ring. A packed bounding-box R-tree over
+the rings narrows every query to a few candidates, which are then tested by
+vectorized even-odd ray casting, so whole batches of positions are attributed
+to sectors without a Python loop per point.
+"""
+
+import math
+import sys
+import time
+
+import numpy as np
+
+from ese_parser import EseFile
+from geodesy import destination_array
+
+# Points per circle when a CIRCLE_SECTORLINE is turned into a polygon
+CIRCLE_POINTS = 72
+
+# Children per R-tree node
+NODE_CAPACITY = 8
+
+# Points handled per vectorized batch, which bounds the (point, edge) work arrays
+LOOKUP_CHUNK = 20000
+
+
+def circle_ring(lat, lon, radius_nm, points=CIRCLE_POINTS):
+    """Polygon approximating a circle of radius_nm around lat/lon"""
+    lats, lons = destination_array(lat, lon, np.arange(points) * 360.0 / points, radius_nm)
+    return np.column_stack([lats, lons])
+
+
+def assemble_ring(border, airspace):
+    """
+    Chain a sector's BORDER line ids into one (n, 2) lat/lon ring. Each line
+    is reversed when that puts its start nearer the end of the ring so far;
+    the first line is reversed when that puts its end nearer the second.
+    """
+    ring = None
+    first = False
+    for line_id in border:
+        if line_id in airspace.sector_lines:
+            coords = airspace.sector_lines[line_id].coords
+        elif line_id in airspace.circles:
+            circle = airspace.circles[line_id]
+            coords = circle_ring(circle.lat, circle.lon, circle.radius)
+        else:
+            continue
+        if not len(coords):
+            continue
+        if ring is None:
+            ring = coords
+            first = True
+            continue
+        if first:
+            first = False
+            forward = min(np.abs(coords[0] - ring[-1]).sum(), np.abs(coords[-1] - ring[-1]).sum())
+            backward = min(np.abs(coords[0] - ring[0]).sum(), np.abs(coords[-1] - ring[0]).sum())
+            if backward < forward:
+                ring = ring[::-1]
+        end = ring[-1]
+        if np.abs(coords[-1] - end).sum() < np.abs(coords[0] - end).sum():
+            coords = coords[::-1]
+        # Drop the shared joint point
+        if np.array_equal(coords[0], end):
+            coords = coords[1:]
+        ring = np.concatenate([ring, coords])
+    return ring if ring is not None else np.zeros((0, 2))
+
+
+def polygon_area(ring):
+    """Planar area of a lat/lon ring in square degrees (shoelace), used to rank overlaps"""
+    if len(ring) < 3:
+        return 0.0
+    lats = ring[:, 0]
+    lons = ring[:, 1]
+    return abs(float(np.dot(lons, np.roll(lats, -1)) - np.dot(lats, np.roll(lons, -1)))) / 2
+
+
+class PackedRTree:
+    """
+    Static R-tree built by Sort-Tile-Recursive packing. Level 0 holds the
+    item boxes in packed order; the children of node j on the level above
+    are entries j * capacity up to (j + 1) * capacity of the level below.
+    """
+
+    def __init__(self, boxes, capacity=NODE_CAPACITY):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.capacity = capacity
+        count = len(boxes)
+
+        # Sort-Tile-Recursive: vertical slices by longitude, then latitude inside a slice
+        centres_lat = (boxes[:, 0] + boxes[:, 2]) / 2
+        centres_lon = (boxes[:, 1] + boxes[:, 3]) / 2
+        leaves = max(1, math.ceil(count / capacity))
+        slices = max(1, math.ceil(math.sqrt(leaves)))
+        per_slice = slices * capacity
+        by_lon = np.argsort(centres_lon, kind='stable')
+        order = []
+        for start in range(0, count, per_slice):
+            members = by_lon[start:start + per_slice]
+            order.append(members[np.argsort(centres_lat[members], kind='stable')])
+        self.items = np.concatenate(order) if order else np.zeros(0, dtype=np.int64)
+
+        # levels[0] are the leaf entries, levels[-1] the root level
+        self.levels = [boxes[self.items]]
+        while len(self.levels[-1]) > capacity:
+            below = self.levels[-1]
+            groups = np.arange(0, len(below), capacity)
+            self.levels.append(np.column_stack([
+                np.minimum.reduceat(below[:, 0], groups), np.minimum.reduceat(below[:, 1], groups),
+                np.maximum.reduceat(below[:, 2], groups), np.maximum.reduceat(below[:, 3], groups)
+            ]))
+
+    def __len__(self):
+        return len(self.items)
+
+    def query_boxes(self, min_lats, min_lons, max_lats, max_lons):
+        """
+        Candidate (query index, item index) pairs for arrays of query boxes:
+        every item whose box overlaps the query box. One vectorized step per
+        tree level.
+        """
+        min_lats = np.asarray(min_lats, dtype=np.float64)
+        min_lons = np.asarray(min_lons, dtype=np.float64)
+        max_lats = np.asarray(max_lats, dtype=np.float64)
+        max_lons = np.asarray(max_lons, dtype=np.float64)
+        top = len(self.levels) - 1
+        nodes_per_query = len(self.levels[top])
+        queries = np.repeat(np.arange(len(min_lats)), nodes_per_query)
+        nodes = np.tile(np.arange(nodes_per_query), len(min_lats))
+
+        for level in range(top, -1, -1):
+            boxes = self.levels[level][nodes]
+            overlap = ((boxes[:, 0] <= max_lats[queries]) & (min_lats[queries] <= boxes[:, 2]) &
+                       (boxes[:, 1] <= max_lons[queries]) & (min_lons[queries] <= boxes[:, 3]))
+            queries = queries[overlap]
+            nodes = nodes[overlap]
+            if level == 0:
+                break
+            # Expand each surviving node into its children on the level below
+            below = len(self.levels[level - 1])
+            first = nodes * self.capacity
+            counts = np.minimum(first + self.capacity, below) - first
+            queries = np.repeat(queries, counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            nodes = np.repeat(first, counts) + offsets
+        return queries, self.items[nodes]
+
+    def query_points(self, lats, lons):
+        """Candidate (point index, item index) pairs: every item whose box contains the point"""
+        return self.query_boxes(lats, lons, lats, lons)
+
+
+class PolygonRings:
+    """
+    Closed lat/lon rings with their edges in one CSR layout: the edges of
+    ring r are edge_starts[r] up to edge_starts[r + 1].
+    """
+
+    def __init__(self, rings):
+        counts = np.array([len(ring) for ring in rings], dtype=np.int64)
+        self.edge_starts = np.concatenate(([0], np.cumsum(counts)))
+        starts = np.concatenate(rings) if rings else np.zeros((0, 2))
+        ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings]) if rings else np.zeros((0, 2))
+        self.lat1 = starts[:, 0]
+        self.lon1 = starts[:, 1]
+        self.lat2 = ends[:, 0]
+        self.lon2 = ends[:, 1]
+        self.boxes = np.array([(ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max())
+                               for ring in rings], dtype=np.float64).reshape(-1, 4)
+        self.areas = np.array([polygon_area(ring) for ring in rings], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.edge_starts) - 1
+
+    def expand(self, rings):
+        """
+        (edge index, first entry of each pair, edge count) for every edge of
+        every ring in an array of ring indices, pairs laid out one after another.
+        """
+        counts = self.edge_starts[rings + 1] - self.edge_starts[rings]
+        pair_starts = np.cumsum(counts) - counts
+        edges = np.repeat(self.edge_starts[rings] - pair_starts, counts) + np.arange(counts.sum())
+        return edges, pair_starts, counts
+
+    def contains(self, points, rings, lats, lons):
+        """Even-odd ray casting of every (point, ring) pair at once"""
+        if not len(points):
+            return np.zeros(0, dtype=bool)
+        edges, pair_starts, counts = self.expand(rings)
+        lat = np.repeat(lats[points], counts)
+        lon = np.repeat(lons[points], counts)
+        lat1 = self.lat1[edges]
+        lat2 = self.lat2[edges]
+        spans = (lat1 > lat) != (lat2 > lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing_lon = self.lon1[edges] + (lat - lat1) * (self.lon2[edges] - self.lon1[edges]) / (lat2 - lat1)
+        crossings = spans & (lon < crossing_lon)
+        return np.add.reduceat(crossings.astype(np.int32), pair_starts) % 2 == 1
+
+
+class SectorIndex:
+    """Sector polygons of an .ese file with batch point-in-sector lookups"""
+
+    def __init__(self, airspace):
+        self.sectors = []
+        rings = []
+        for sector in airspace.sectors.values():
+            ring = assemble_ring(sector.borders, airspace)
+            if len(ring) >= 3:
+                self.sectors.append(sector)
+                rings.append(ring)
+
+        self.names = [sector.name for sector in self.sectors]
+        self.bottoms = np.array([sector.bottom for sector in self.sectors], dtype=np.float64)
+        self.tops = np.array([sector.top for sector in self.sectors], dtype=np.float64)
+        self.rings = PolygonRings(rings)
+        self.areas = self.rings.areas
+        self.tree = PackedRTree(self.rings.boxes)
+
+    def __len__(self):
+        return len(self.sectors)
+
+    def candidates(self, lats, lons, altitudes):
+        """(point index, sector index) pairs containing each point, any overlap kept"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        altitudes = np.asarray(altitudes, dtype=np.float64)
+        points, sectors = self.tree.query_points(lats, lons)
+        level_ok = (self.bottoms[sectors] <= altitudes[points]) & (altitudes[points] < self.tops[sectors])
+        points = points[level_ok]
+        sectors = sectors[level_ok]
+        inside = self.rings.contains(points, sectors, lats, lons)
+        return points[inside], sectors[inside]
+
+    def locate(self, lats, lons, flight_levels):
+        """
+        Sector index for every point (-1 where none), with flight levels in
+        hundreds of feet. Where sectors overlap the smallest one wins.
+        """
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        altitudes = np.broadcast_to(np.asarray(flight_levels, dtype=np.float64) * 100, lats.shape)
+        result = np.full(len(lats), -1, dtype=np.int32)
+        for start in range(0, len(lats), LOOKUP_CHUNK):
+            end = start + LOOKUP_CHUNK
+            points, sectors = self.candidates(lats[start:end], lons[start:end], altitudes[start:end])
+            if not len(points):
+                continue
+            order = np.lexsort((sectors, self.areas[sectors], points))
+            points = points[order]
+            sectors = sectors[order]
+            first = np.flatnonzero(np.r_[True, points[1:] != points[:-1]])
+            result[start + points[first]] = sectors[first]
+        return result
+
+    def sector_at(self, lat, lon, flight_level):
+        """The Sector owning one position, or None"""
+        index = int(self.locate([lat], [lon], [flight_level])[0])
+        return self.sectors[index] if index >= 0 else None
+
+    def sectors_at(self, lat, lon, flight_level):
+        """Every Sector containing one position, smallest first"""
+        _, sectors = self.candidates([lat], [lon], [flight_level * 100])
+        return [self.sectors[index] for index in sorted(sectors.tolist(), key=lambda s: self.areas[s])]
+
+    def owner(self, lat, lon, flight_level):
+        """Primary owner position id of the sector at a position, or None"""
+        sector = self.sector_at(lat, lon, flight_level)
+        return sector.owners[0] if sector is not None and sector.owners else None
+
+
+def _brute_force(index, lat, lon, flight_level):
+    """Reference lookup testing every sector in plain Python"""
+    best = -1
+    altitude = flight_level * 100
+    for sector in range(len(index)):
+        if not index.bottoms[sector] <= altitude < index.tops[sector]:
+            continue
+        rings = index.rings
+        inside = False
+        for edge in range(rings.edge_starts[sector], rings.edge_starts[sector + 1]):
+            lat1, lon1 = rings.lat1[edge], rings.lon1[edge]
+            lat2, lon2 = rings.lat2[edge], rings.lon2[edge]
+            if (lat1 > lat) != (lat2 > lat) and lon < lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1):
+                inside = not inside
+        if inside and (best < 0 or index.areas[sector] < index.areas[best]):
+            best = sector
+    return best
+
+
+def main():
+    """Time batch sector attribution of random positions and check it against brute force"""
+    path = sys.argv[1] if len(sys.argv) > 1 else "FASA-Package_20251004101136-251001-0002.ese"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    started = time.perf_counter()
+    index = SectorIndex(EseFile(path).airspace)
+    build_time = time.perf_counter() - started
+    print(f"🗺️ {len(index)} sector polygons, {len(index.rings.lat1)} edges, "
+          f"{len(index.tree.levels)} R-tree levels in {build_time * 1000:.1f} ms")
+
+    rng = np.random.default_rng(0)
+    boxes = index.tree.levels[-1]
+    lats = rng.uniform(boxes[:, 0].min(), boxes[:, 2].max(), count)
+    lons = rng.uniform(boxes[:, 1].min(), boxes[:, 3].max(), count)
+    levels = rng.uniform(0, 450, count)
+
+    started = time.perf_counter()
+    found = index.locate(lats, lons, levels)
+    elapsed = time.perf_counter() - started
+    print(f"📍 {count} positions in {elapsed:.2f} s ({count / elapsed:,.0f} per second), "
+          f"{np.count_nonzero(found >= 0)} inside a sector")
+
+    sample = min(count, 2000)
+    expected = np.array([_brute_force(index, lats[i], lons[i], levels[i]) for i in range(sample)])
+    mismatches = np.count_nonzero(expected != found[:sample])
+    print(f"✅ Brute force check on {sample} positions: {mismatches} mismatches")
+
+    sector = index.sector_at(-26.13, 28.24, 50)
+    if sector is not None:
+        print(f"   FAOR at FL050: {sector.name} owned by {sector.owners[0] if sector.owners else '-'}")
+
+
+if __name__ == "__main__":
+    main()
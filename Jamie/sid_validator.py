@@ -0,0 +1,343 @@
+"""
+Batch flight plan validator for vFPC SID rules (FASA/Plugins/vFPC/Sid.json)
+The rules are compiled once into per-airport, per-SID tables of tuples; flight
+plans are read lazily from CSV or JSONL, checked in chunks on a process pool
+and the results are yielded as each chunk finishes.
+
+Flight plan fields: callsign, departure, destination, route, rfl (cruise level
+in feet or as FL350) and optionally engine (J, T or P).
+"""
+
+import csv
+import json
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+SID_RULES_FILE = os.path.join("FASA", "Plugins", "vFPC", "Sid.json")
+
+# Plans per pool task; large enough that pickling stays small next to the checks
+CHUNK_SIZE = 5000
+
+# Route tokens that only separate points
+DIRECT_TOKENS = frozenset(('DCT',))
+
+SidRule = namedtuple('SidRule', ['airways', 'destinations', 'min_fl', 'max_fl', 'parity', 'engine', 'suffixes'])
+Result = namedtuple('Result', ['callsign', 'departure', 'sid', 'status', 'message'])
+
+RESULT_FIELDS = Result._fields
+
+
+def route_tokens(route):
+    """Upper-case route tokens without speed/level suffixes or DCT"""
+    tokens = []
+    for token in route.upper().split():
+        token = token.split('/')[0]
+        if token and token not in DIRECT_TOKENS:
+            tokens.append(token)
+    return tuple(tokens)
+
+
+def compile_rules(path=SID_RULES_FILE):
+    """
+    Compile Sid.json into {airport: {sid waypoint: (SidRule, ...)}}.
+    Airway strings become token tuples starting at the SID waypoint,
+    destinations frozensets (None for any) and EVEN/ODD a level parity.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        airports = json.load(f)
+
+    compiled = {}
+    for airport in airports:
+        sids = compiled.setdefault(airport['icao'], {})
+        for waypoint, rules in airport.get('sids', {}).items():
+            entries = []
+            for rule in rules:
+                airways = []
+                for airway in rule.get('airways', []):
+                    tokens = route_tokens(airway)
+                    if tokens and tokens[0] != waypoint:
+                        tokens = (waypoint,) + tokens
+                    airways.append(tokens)
+                suffixes = rule.get('suffix')
+                if isinstance(suffixes, str):
+                    suffixes = [suffixes]
+                direction = rule.get('direction')
+                entries.append(SidRule(
+                    tuple(airways),
+                    frozenset(rule['destinations']) if rule.get('destinations') else None,
+                    rule.get('min_fl', 0),
+                    rule.get('max_fl', 999),
+                    {'EVEN': 0, 'ODD': 1}.get(direction),
+                    rule.get('engine'),
+                    frozenset(suffixes) if suffixes else None
+                ))
+            sids[waypoint] = tuple(entries)
+    return compiled
+
+
+def flight_level(rfl):
+    """Cruise level in hundreds of feet from '35000', 'FL350' or '350', or None"""
+    text = str(rfl or '').strip().upper()
+    if text.startswith('FL'):
+        text = text[2:]
+    if not text.isdigit():
+        return None
+    value = int(text)
+    return value // 100 if value >= 1000 else value
+
+
+def find_sid(tokens, sids):
+    """
+    (waypoint, suffix, position) of the first route token naming one of the
+    airport's SID waypoints, either bare or as a SID such as VASUR3A.
+    """
+    for position, token in enumerate(tokens):
+        if token in sids:
+            return token, None, position
+        # SID names are the waypoint plus a digit and letter
+        if len(token) > 2 and token[:-2] in sids and token[-2].isdigit():
+            return token[:-2], token[-2:], position
+    return None, None, None
+
+
+def check_plan(plan, rules):
+    """Check one flight plan dict; returns a Result"""
+    callsign = plan.get('callsign', '')
+    departure = (plan.get('departure') or '').upper()
+    sids = rules.get(departure)
+    if sids is None:
+        return Result(callsign, departure, '', 'SKIPPED', 'no SID rules for departure airport')
+
+    tokens = route_tokens(plan.get('route') or '')
+    waypoint, suffix, position = find_sid(tokens, sids)
+    if waypoint is None:
+        return Result(callsign, departure, '', 'ERROR', 'route does not contain a SID waypoint')
+    # From the SID waypoint on, as the rule airways are written; plans
+    # usually repeat the waypoint after the SID name (VASUR3A VASUR ...)
+    following = tokens[position + 1:]
+    if following[:1] == (waypoint,):
+        following = following[1:]
+    tokens = (waypoint,) + following
+
+    destination = (plan.get('destination') or '').upper()
+    engine = (plan.get('engine') or '').upper() or None
+    level = flight_level(plan.get('rfl'))
+
+    candidates = [rule for rule in sids[waypoint]
+                  if (rule.suffixes is None or suffix is None or suffix in rule.suffixes)
+                  and (rule.engine is None or engine is None or rule.engine == engine)]
+    if not candidates:
+        return Result(callsign, departure, waypoint, 'ERROR', 'no rule for SID, engine type or suffix')
+
+    candidates = [rule for rule in candidates if rule.destinations is None or destination in rule.destinations]
+    if not candidates:
+        return Result(callsign, departure, waypoint, 'ERROR', f'{waypoint} not valid to {destination}')
+
+    candidates = [rule for rule in candidates
+                  if any(tokens[:len(airway)] == airway for airway in rule.airways)]
+    if not candidates:
+        return Result(callsign, departure, waypoint, 'ERROR', 'route after SID does not match any allowed airway')
+
+    if level is None:
+        return Result(callsign, departure, waypoint, 'ERROR', 'invalid cruise level')
+    for rule in candidates:
+        if rule.min_fl <= level <= rule.max_fl and (rule.parity is None or (level // 10) % 2 == rule.parity):
+            return Result(callsign, departure, waypoint, 'OK', '')
+    if not any(rule.min_fl <= level <= rule.max_fl for rule in candidates):
+        return Result(callsign, departure, waypoint, 'ERROR', f'FL{level} outside allowed levels')
+    return Result(callsign, departure, waypoint, 'ERROR', f'FL{level} wrong for direction of flight')
+
+
+def check_plans(plans, rules):
+    return [check_plan(plan, rules) for plan in plans]
+
+
+def read_plans(path):
+    """Lazily yield flight plan dicts from a .csv (with header) or .jsonl file"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith(('.jsonl', '.json')):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def chunked(plans, size=CHUNK_SIZE):
+    chunk = []
+    for plan in plans:
+        chunk.append(plan)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Compiled rules of a pool worker: inherited on fork, compiled by the initializer on spawn
+_worker_rules = None
+
+
+def _init_worker(rules_path):
+    global _worker_rules
+    if _worker_rules is None:
+        _worker_rules = compile_rules(rules_path)
+
+
+def _check_chunk(plans):
+    return check_plans(plans, _worker_rules)
+
+
+def validate_plans(plans, rules_path=SID_RULES_FILE, jobs=1, chunk_size=CHUNK_SIZE):
+    """
+    Validate an iterable of flight plans, yielding Results chunk by chunk as
+    workers finish (so not in input order when jobs > 1). At most two chunks
+    per worker are in flight, so the input is never loaded all at once.
+    """
+    global _worker_rules
+    rules = compile_rules(rules_path)
+    if jobs <= 1:
+        for chunk in chunked(plans, chunk_size):
+            yield from check_plans(chunk, rules)
+        return
+
+    # Set before the pool starts so forked workers share it copy-on-write
+    _worker_rules = rules
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(rules_path,)) as pool:
+            pending = set()
+            for chunk in chunked(plans, chunk_size):
+                pending.add(pool.submit(_check_chunk, chunk))
+                if len(pending) >= 2 * jobs:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+    finally:
+        _worker_rules = None
+
+
+def synthetic_plans(rules, count, seed=0):
+    """
+    Flight plans generated from the rules themselves: mostly valid, with a
+    share of wrong levels, destinations and routes so every check runs.
+    """
+    rng = random.Random(seed)
+    templates = []
+    for airport, sids in rules.items():
+        for waypoint, entries in sids.items():
+            for rule in entries:
+                for airway in rule.airways:
+                    templates.append((airport, waypoint, rule, airway))
+    for number in range(count):
+        airport, waypoint, rule, airway = rng.choice(templates)
+        destination = rng.choice(sorted(rule.destinations)) if rule.destinations else 'FAOR'
+        low = max(rule.min_fl, 50)
+        high = min(rule.max_fl, 410)
+        levels = [level for level in range(low, high + 1, 10)
+                  if rule.parity is None or (level // 10) % 2 == rule.parity] or [low]
+        level = rng.choice(levels)
+        suffix = rng.choice(sorted(rule.suffixes)) if rule.suffixes else '1A'
+        route = [waypoint + suffix] + list(airway[1:])
+        mistake = rng.random()
+        if mistake < 0.05:
+            level += 10
+        elif mistake < 0.08:
+            destination = 'FXXX'
+        elif mistake < 0.10:
+            route = route[:1] + ['XXXXX'] + route[1:]
+        yield {
+            'callsign': f"SYN{number:06d}",
+            'departure': airport,
+            'destination': destination,
+            'route': ' '.join(route),
+            'rfl': str(level * 100),
+            'engine': rule.engine or ''
+        }
+
+
+def check_filing_styles(rules, plans):
+    """
+    Plans whose route files the SID as 'TETAN3A UZ2 NIBEX' must get the same
+    result when it is filed as 'TETAN3A/N0450F350 TETAN UZ2 NIBEX DCT GBV';
+    returns the number of plans where the two differ.
+    """
+    mismatches = 0
+    for plan in plans:
+        tokens = plan['route'].split()
+        waypoint, _, position = find_sid(route_tokens(plan['route']), rules.get(plan['departure'], {}))
+        if waypoint is None or position != 0:
+            continue
+        refiled = dict(plan, route=' '.join([tokens[0] + '/N0450F350', waypoint] + tokens[1:] + ['DCT', 'GBV']))
+        if check_plan(plan, rules).status != check_plan(refiled, rules).status:
+            mismatches += 1
+    return mismatches
+
+
+def benchmark(count=100000, jobs=None):
+    """Time validation of synthetic plans on one worker and on a pool"""
+    rules = compile_rules()
+    plans = list(synthetic_plans(rules, count))
+    print(f"🧪 {len(plans)} synthetic flight plans over {len(rules)} airports")
+    mismatches = check_filing_styles(rules, plans[:10000])
+    print(f"{'✅' if not mismatches else '❌'} Repeated SID waypoint and suffix filing: {mismatches} mismatches")
+
+    for workers in (1, jobs or os.cpu_count() or 1):
+        started = time.perf_counter()
+        statuses = {}
+        for result in validate_plans(plans, jobs=workers):
+            statuses[result.status] = statuses.get(result.status, 0) + 1
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f"{count} {status}" for status, count in sorted(statuses.items()))
+        print(f"   {workers} worker(s): {elapsed:.2f} s, {len(plans) / elapsed * 60:,.0f} plans/min ({summary})")
+        if workers == 1 and (jobs or os.cpu_count() or 1) == 1:
+            break
+
+
+def parse_option(args, name, default):
+    if name not in args:
+        return default
+    index = args.index(name)
+    return args[index + 1] if index + 1 < len(args) else default
+
+
+def main():
+    """
+    Usage: python sid_validator.py plans.csv|plans.jsonl [--jobs N] [--output results.csv]
+           python sid_validator.py --benchmark [N] [--jobs N]
+    """
+    args = sys.argv[1:]
+    jobs = int(parse_option(args, "--jobs", 1)) or os.cpu_count() or 1
+    if not args or args[0] == "--benchmark":
+        count = int(args[1]) if len(args) > 1 and args[1].isdigit() else 100000
+        benchmark(count, jobs if "--jobs" in args else None)
+        return
+
+    output = parse_option(args, "--output", None)
+    started = time.perf_counter()
+    counts = {}
+    with open(output, 'w', newline='', encoding='utf-8') if output else open(os.devnull, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_FIELDS)
+        for result in validate_plans(read_plans(args[0]), jobs=jobs):
+            counts[result.status] = counts.get(result.status, 0) + 1
+            writer.writerow(result)
+            if not output and result.status == 'ERROR':
+                print(f"❌ {result.callsign} {result.departure} {result.sid}: {result.message}")
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"✅ Checked {total} flight plans in {elapsed:.2f} s: "
+          + ', '.join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
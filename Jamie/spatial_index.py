@@ -0,0 +1,129 @@
+"""
+Geographic grid index over navigation points
+Points are bucketed into fixed lat/lon cells stored in CSR form (one sorted
+order array plus cell start offsets), giving bounding-box, radius and
+k-nearest queries without scanning every point.
+"""
+
+import math
+
+import numpy as np
+
+from geodesy import EARTH_RADIUS_NM, great_circle_nm_array
+
+
+class GeoGrid:
+    """Lat/lon bucket index over arrays of point coordinates"""
+    __slots__ = ('lats', 'lons', 'cell_size', 'rows', 'cols', 'order', 'starts')
+
+    def __init__(self, lats, lons, cell_size=1.0):
+        """
+        Build the index. Points with NaN coordinates are left out of every query.
+        cell_size is in degrees; 1 degree suits sector maps of 50-200 NM.
+        """
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_size = cell_size
+        self.rows = int(math.ceil(180 / cell_size))
+        self.cols = int(math.ceil(360 / cell_size))
+
+        valid = ~(np.isnan(self.lats) | np.isnan(self.lons))
+        points = np.flatnonzero(valid)
+        cells = self._cell_ids(self.lats[points], self.lons[points])
+
+        # CSR layout: points of cell c are order[starts[c]:starts[c + 1]]
+        sort = np.argsort(cells, kind='stable')
+        self.order = points[sort].astype(np.int64)
+        counts = np.bincount(cells, minlength=self.rows * self.cols)
+        self.starts = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _cell_row(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90) / self.cell_size).astype(np.int64), 0, self.rows - 1)
+
+    def _cell_col(self, lon):
+        return np.floor((np.asarray(lon) + 180) / self.cell_size).astype(np.int64) % self.cols
+
+    def _cell_ids(self, lats, lons):
+        return self._cell_row(lats) * self.cols + self._cell_col(lons)
+
+    def _gather(self, row_range, col_ranges):
+        """Point indices stored in a block of cells"""
+        chunks = []
+        for row in range(row_range[0], row_range[1] + 1):
+            for first, last in col_ranges:
+                start = self.starts[row * self.cols + first]
+                stop = self.starts[row * self.cols + last + 1]
+                if stop > start:
+                    chunks.append(self.order[start:stop])
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(chunks)
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        """Points in every cell touched by a box; min_lon > max_lon wraps the antimeridian"""
+        row_range = (int(self._cell_row(min_lat)), int(self._cell_row(max_lat)))
+        if max_lon - min_lon >= 360:
+            col_ranges = [(0, self.cols - 1)]
+        else:
+            first = int(self._cell_col(min_lon))
+            last = int(self._cell_col(max_lon))
+            if first <= last and min_lon <= max_lon:
+                col_ranges = [(first, last)]
+            else:
+                col_ranges = [(first, self.cols - 1), (0, last)]
+        return self._gather(row_range, col_ranges)
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Sorted indices of points inside a box (edges included)"""
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lats = self.lats[candidates]
+        lons = self.lons[candidates]
+        inside = (lats >= min_lat) & (lats <= max_lat)
+        if min_lon <= max_lon:
+            inside &= (lons >= min_lon) & (lons <= max_lon)
+        else:
+            inside &= (lons >= min_lon) | (lons <= max_lon)
+        return np.sort(candidates[inside])
+
+    def radius_bbox(self, lat, lon, radius_nm):
+        """Box containing every point within radius_nm great-circle distance"""
+        angle = radius_nm / EARTH_RADIUS_NM
+        dlat = math.degrees(angle)
+        min_lat = max(lat - dlat, -90.0)
+        max_lat = min(lat + dlat, 90.0)
+        if min_lat <= -90 or max_lat >= 90 or angle >= math.pi / 2:
+            return min_lat, -180.0, max_lat, 180.0
+        dlon = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+        min_lon = (lon - dlon + 180) % 360 - 180
+        max_lon = (lon + dlon + 180) % 360 - 180
+        if dlon >= 180:
+            return min_lat, -180.0, max_lat, 180.0
+        return min_lat, min_lon, max_lat, max_lon
+
+    def radius(self, lat, lon, radius_nm):
+        """Sorted indices of points within radius_nm, with their distances"""
+        candidates = self.bbox(*self.radius_bbox(lat, lon, radius_nm))
+        distances = great_circle_nm_array(lat, lon, self.lats[candidates], self.lons[candidates])
+        inside = distances <= radius_nm
+        return candidates[inside], distances[inside]
+
+    def nearest(self, lat, lon, k=1):
+        """Indices of the k nearest points, closest first, with their distances"""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        search = self.cell_size * 60
+        while True:
+            indices, distances = self.radius(lat, lon, search)
+            # Every point closer than the k-th found lies inside the searched radius
+            if len(indices) >= k or search >= math.pi * EARTH_RADIUS_NM:
+                break
+            search *= 2
+        if len(indices) < k:
+            indices = self.order
+            distances = great_circle_nm_array(lat, lon, self.lats[indices], self.lons[indices])
+        best = np.argsort(distances, kind='stable')[:k]
+        return indices[best], distances[best]
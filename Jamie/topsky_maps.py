@@ -0,0 +1,502 @@
+"""
+TopSky map and area reader (FASA/Plugins/TopSky/TopSkyMaps.txt and TopSkyAreas.txt)
+Both files are parsed in one streaming pass into typed map and area objects
+whose coordinates live in packed float64 arrays (struct-of-arrays, with text
+interned in one string table). The parsed result is cached next to the source
+as <file>.cache.npz keyed by the source's SHA-256 and CACHE_VERSION, so a
+warm load reads a few arrays and skips text parsing entirely.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+
+from build_manifest import file_hash
+from coordinates import parse_coordinate
+from nav_store import StringTable
+from npz_cache import CACHE_ERRORS, save_npz
+
+TOPSKY_DIR = os.path.join("FASA", "Plugins", "TopSky")
+TOPSKY_ENCODING = 'latin-1'
+CACHE_SUFFIX = ".cache.npz"
+# Bump whenever the parsers or the cached array layout change, so old caches are rebuilt
+CACHE_VERSION = 1
+
+# Shape kinds inside a map; coordinates of each shape are a slice of the vertex arrays
+SHAPE_KINDS = ('line', 'polyline', 'polygon', 'symbol', 'text')
+LINE, POLYLINE, POLYGON, SYMBOL, TEXT = range(len(SHAPE_KINDS))
+
+# Drawing commands that make up a SYMBOLDEF body
+SYMBOL_COMMANDS = ('MOVETO', 'LINETO', 'SETPIXEL', 'ARC', 'FILLARC', 'POLYGON', 'ELLIPSE_CIRCLE')
+
+# Vertex keywords that name a point relative to a navaid instead of a coordinate
+RELATIVE_COORDS = ('COORD_PBD', 'COORD_AF', 'COORD_CIRCLE', 'COORD_HM')
+
+Shape = namedtuple('Shape', ['kind', 'coords', 'refs', 'text', 'params'])
+Label = namedtuple('Label', ['lat', 'lon', 'text'])
+
+
+def iter_topsky_lines(path):
+    """Yield (keyword, fields, line) for every data line; comments and blanks are skipped"""
+    with open(path, 'r', encoding=TOPSKY_ENCODING) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] in ';/':
+                continue
+            fields = line.split(':')
+            yield fields[0].upper(), fields[1:], line
+
+
+def parse_limit(value, default):
+    """Area limit in hundreds of feet from '195', 'FL195' or '7600FT AMSL'"""
+    text = value.strip().upper()
+    if text.startswith('FL'):
+        text = text[2:]
+    feet = text.endswith('FT') or 'FT ' in text
+    digits = text.split('FT')[0].strip()
+    if not digits.isdigit():
+        return default
+    return int(digits) // 100 if feet else int(digits)
+
+
+def read_point(fields, index):
+    """
+    (lat, lon, ref, next index) for a point at fields[index]: a DMS
+    coordinate pair, or a fix/navaid name (NaN coordinates, ref kept).
+    """
+    if index + 1 < len(fields):
+        lat = parse_coordinate(fields[index])
+        lon = parse_coordinate(fields[index + 1])
+        if lat is not None and lon is not None:
+            return lat, lon, '', index + 2
+    ref = fields[index] if index < len(fields) else ''
+    return np.nan, np.nan, ref, index + 1
+
+
+class ShapeColumns:
+    """Growing vertex and shape columns shared by the map and area builders"""
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.lats = []
+        self.lons = []
+        self.refs = []
+        self.starts = [0]
+
+    def add_vertex(self, lat, lon, ref=''):
+        self.lats.append(lat)
+        self.lons.append(lon)
+        self.refs.append(self.strings.intern(ref))
+
+    def close_shape(self):
+        self.starts.append(len(self.lats))
+
+    def arrays(self):
+        return {
+            'coords': np.column_stack([np.asarray(self.lats, dtype=np.float64),
+                                       np.asarray(self.lons, dtype=np.float64)]).reshape(-1, 2),
+            'refs': np.asarray(self.refs, dtype=np.int32),
+            'starts': np.asarray(self.starts, dtype=np.int64)
+        }
+
+
+class TopSkyMap:
+    """One MAP block: its properties and a range of shapes in the shared arrays"""
+    __slots__ = ('maps', 'name', 'properties', 'first', 'last')
+
+    def __init__(self, maps, name, properties, first, last):
+        self.maps = maps
+        self.name = name
+        self.properties = properties
+        self.first = first
+        self.last = last
+
+    def get(self, key, default=None):
+        """First value of a property such as FOLDER, COLOR, ZOOM or LAYER"""
+        for name, value in self.properties:
+            if name == key:
+                return value
+        return default
+
+    def values(self, key):
+        """Every value of a repeatable property such as ACTIVE or SCTDATA"""
+        return [value for name, value in self.properties if name == key]
+
+    @property
+    def folder(self):
+        return self.get('FOLDER')
+
+    @property
+    def color(self):
+        return self.get('COLOR')
+
+    def __len__(self):
+        return self.last - self.first
+
+    def shapes(self, kind=None):
+        """Shapes of the map, optionally of one kind ('line', 'polygon', ...)"""
+        code = SHAPE_KINDS.index(kind) if kind is not None else None
+        for shape in range(self.first, self.last):
+            if code is None or self.maps.shape_kinds[shape] == code:
+                yield self.maps.shape(shape)
+
+    def coords(self):
+        """(n, 2) view of every vertex of the map"""
+        starts = self.maps.starts
+        return self.maps.coords[starts[self.first]:starts[self.last]]
+
+    def __repr__(self):
+        return f"TopSkyMap({self.name!r}, {len(self)} shapes)"
+
+
+class TopSkyMaps:
+    """Every map of a TopSkyMaps.txt with colour and symbol definitions"""
+
+    def __init__(self, arrays, strings, meta):
+        self.coords = arrays['coords']
+        self.refs = arrays['refs']
+        self.starts = arrays['starts']
+        self.shape_kinds = arrays['shape_kinds']
+        self.shape_texts = arrays['shape_texts']
+        self.shape_params = arrays['shape_params']
+        self.strings = strings
+        self.colors = {name: tuple(rgb) for name, rgb in meta['colors'].items()}
+        self.overrides = meta['overrides']
+        self.symbols = meta['symbols']
+        self.maps = [TopSkyMap(self, *entry) for entry in meta['maps']]
+        self.by_name = {}
+        for entry in self.maps:
+            self.by_name.setdefault(entry.name, entry)
+
+    def __len__(self):
+        return len(self.maps)
+
+    def __iter__(self):
+        return iter(self.maps)
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    def shape(self, index):
+        start = self.starts[index]
+        end = self.starts[index + 1]
+        strings = self.strings
+        return Shape(SHAPE_KINDS[self.shape_kinds[index]], self.coords[start:end],
+                     [strings[ref] for ref in self.refs[start:end].tolist()],
+                     strings[self.shape_texts[index]], strings[self.shape_params[index]])
+
+    def nbytes(self):
+        arrays = (self.coords, self.refs, self.starts, self.shape_kinds, self.shape_texts, self.shape_params)
+        return sum(values.nbytes for values in arrays) + self.strings.nbytes()
+
+
+def parse_maps(path):
+    """Stream TopSkyMaps.txt into the (arrays, strings, meta) a TopSkyMaps is built from"""
+    columns = ShapeColumns()
+    strings = columns.strings
+    kinds = []
+    texts = []
+    params = []
+    colors = {}
+    overrides = []
+    symbols = {}
+    maps = []
+
+    current = None
+    symbol = None
+    pending = 0
+
+    def add_shape(kind, text='', param=''):
+        columns.close_shape()
+        kinds.append(kind)
+        texts.append(strings.intern(text))
+        params.append(strings.intern(param))
+
+    def finish_map():
+        if current is not None:
+            maps.append([current[0], current[1], current[2], len(kinds)])
+
+    for keyword, fields, line in iter_topsky_lines(path):
+        if symbol is not None:
+            if keyword in SYMBOL_COMMANDS:
+                symbols[symbol].append(line)
+                continue
+            symbol = None
+
+        if keyword == 'COLORDEF' and len(fields) >= 4:
+            colors[fields[0]] = [int(value) for value in fields[1:4]]
+        elif keyword == 'OVERRIDE_SCT_MAP':
+            overrides.append(':'.join(fields))
+        elif keyword == 'SYMBOLDEF':
+            symbol = ':'.join(fields)
+            symbols[symbol] = []
+        elif keyword == 'MAP':
+            finish_map()
+            # Vertices not closed by COORDLINE/COORDPOLY are dropped
+            del columns.lats[len(columns.lats) - pending:]
+            del columns.lons[len(columns.lons) - pending:]
+            del columns.refs[len(columns.refs) - pending:]
+            pending = 0
+            current = (':'.join(fields), [], len(kinds))
+        elif current is None:
+            continue
+        elif keyword == 'LINE':
+            lat, lon, ref, index = read_point(fields, 0)
+            columns.add_vertex(lat, lon, ref)
+            lat, lon, ref, index = read_point(fields, index)
+            columns.add_vertex(lat, lon, ref)
+            add_shape(LINE, param=':'.join(fields[index:]))
+        elif keyword == 'COORD':
+            lat, lon, ref, _ = read_point(fields, 0)
+            columns.add_vertex(lat, lon, ref)
+            pending += 1
+        elif keyword in RELATIVE_COORDS:
+            columns.add_vertex(np.nan, np.nan, line)
+            pending += 1
+        elif keyword == 'COORDLINE':
+            add_shape(POLYLINE)
+            pending = 0
+        elif keyword == 'COORDPOLY':
+            add_shape(POLYGON, param=':'.join(fields))
+            pending = 0
+        elif keyword == 'SYMBOL' and len(fields) >= 2:
+            lat, lon, ref, index = read_point(fields, 1)
+            columns.add_vertex(lat, lon, ref)
+            label = fields[index] if index < len(fields) else ''
+            add_shape(SYMBOL, label, ':'.join([fields[0]] + fields[index + 1:]))
+        elif keyword == 'TEXT':
+            lat, lon, ref, index = read_point(fields, 0)
+            columns.add_vertex(lat, lon, ref)
+            add_shape(TEXT, ':'.join(fields[index:]))
+        else:
+            current[1].append((keyword, ':'.join(fields)))
+    finish_map()
+    if pending:
+        del columns.lats[len(columns.lats) - pending:]
+        del columns.lons[len(columns.lons) - pending:]
+        del columns.refs[len(columns.refs) - pending:]
+
+    strings.freeze()
+    arrays = columns.arrays()
+    arrays['shape_kinds'] = np.asarray(kinds, dtype=np.uint8)
+    arrays['shape_texts'] = np.asarray(texts, dtype=np.int32)
+    arrays['shape_params'] = np.asarray(params, dtype=np.int32)
+    meta = {'colors': colors, 'overrides': overrides, 'symbols': symbols, 'maps': maps}
+    return arrays, strings, meta
+
+
+class TopSkyArea:
+    """One AREA block: limits in hundreds of feet and its outline"""
+    __slots__ = ('areas', 'index', 'name', 'kind', 'category', 'group', 'active', 'label',
+                 'lower', 'upper', 'flags')
+
+    def __init__(self, areas, index, name, kind, category, group, active, label, lower, upper, flags):
+        self.areas = areas
+        self.index = index
+        self.name = name
+        self.kind = kind
+        self.category = category
+        self.group = group
+        self.active = active
+        self.label = Label(*label) if label else None
+        self.lower = lower
+        self.upper = upper
+        self.flags = flags
+
+    @property
+    def coords(self):
+        """(n, 2) lat/lon view of the outline"""
+        starts = self.areas.starts
+        return self.areas.coords[starts[self.index]:starts[self.index + 1]]
+
+    def __repr__(self):
+        return f"TopSkyArea({self.name!r}, {self.category}, {self.lower}-{self.upper}, {len(self.coords)} points)"
+
+
+class TopSkyAreas:
+    """Every area of a TopSkyAreas.txt with its category definitions"""
+
+    def __init__(self, arrays, strings, meta):
+        self.coords = arrays['coords']
+        self.refs = arrays['refs']
+        self.starts = arrays['starts']
+        self.strings = strings
+        self.categories = meta['categories']
+        self.areas = [TopSkyArea(self, index, *entry) for index, entry in enumerate(meta['areas'])]
+        self.by_name = {}
+        for area in self.areas:
+            self.by_name.setdefault(area.name, []).append(area)
+
+    def __len__(self):
+        return len(self.areas)
+
+    def __iter__(self):
+        return iter(self.areas)
+
+    def __getitem__(self, name):
+        """Areas with a name (some are split into lower and upper parts)"""
+        return self.by_name[name]
+
+    def nbytes(self):
+        return self.coords.nbytes + self.refs.nbytes + self.starts.nbytes + self.strings.nbytes()
+
+
+def parse_areas(path):
+    """
+    Stream TopSkyAreas.txt into the (arrays, strings, meta) a TopSkyAreas is
+    built from. Outline points are either
+    'lat lon' decimal lines or COORD:lat:lon DMS lines.
+    """
+    columns = ShapeColumns()
+    categories = {}
+    areas = []
+    current = None
+
+    def finish_area():
+        if current is not None:
+            columns.close_shape()
+            areas.append(current)
+
+    with open(path, 'r', encoding=TOPSKY_ENCODING) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] in ';/':
+                continue
+            if line[0] in '-0123456789':
+                parts = line.split()
+                if current is not None and len(parts) >= 2:
+                    try:
+                        columns.add_vertex(float(parts[0]), float(parts[1]))
+                    except ValueError:
+                        pass
+                continue
+
+            keyword, _, rest = line.partition(':')
+            keyword = keyword.upper()
+            fields = rest.split(':') if rest else []
+            if keyword == 'CATEGORYDEF' and fields:
+                categories[fields[0]] = fields[1:]
+            elif keyword == 'AREA':
+                finish_area()
+                kind, name = (fields[0], ':'.join(fields[1:])) if len(fields) > 1 else ('', rest)
+                # name, kind, category, group, active, label, lower, upper, flags
+                current = [name, kind, '', '', [], None, 0, 999, []]
+            elif current is None:
+                continue
+            elif keyword == 'COORD':
+                lat, lon, ref, _ = read_point(fields, 0)
+                columns.add_vertex(lat, lon, ref)
+            elif keyword == 'CATEGORY':
+                current[2] = rest
+            elif keyword == 'GROUP':
+                current[3] = rest
+            elif keyword == 'ACTIVE':
+                current[4].append(rest)
+            elif keyword == 'LABEL' and len(fields) >= 3:
+                current[5] = [float(fields[0]), float(fields[1]), ':'.join(fields[2:])]
+            elif keyword == 'LIMITS' and len(fields) >= 2:
+                current[6] = parse_limit(fields[0], 0)
+                current[7] = parse_limit(fields[1], 999)
+            else:
+                current[8].append(line)
+    finish_area()
+
+    columns.strings.freeze()
+    return columns.arrays(), columns.strings, {'categories': categories, 'areas': areas}
+
+
+def cache_path(path):
+    return path + CACHE_SUFFIX
+
+
+def cache_hash(path):
+    """SHA-256 over the source file's hash and CACHE_VERSION, or None when it is missing"""
+    source_hash = file_hash(path)
+    if source_hash is None:
+        return None
+    return hashlib.sha256(json.dumps([source_hash, CACHE_VERSION]).encode('utf-8')).hexdigest()
+
+
+def save_cache(path, source_hash, arrays, strings, meta):
+    """Write parsed arrays, the packed string table and JSON metadata to one .npz, atomically"""
+    blob, offsets = strings.packed()
+    save_npz(path, source_hash=np.frombuffer(bytes.fromhex(source_hash), dtype=np.uint8),
+             meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+             strings_blob=np.frombuffer(blob, dtype=np.uint8), strings_offsets=offsets, **arrays)
+
+
+def load_cache(path, source_hash):
+    """(arrays, strings, meta) from a cache written for source_hash, or None when stale or unreadable"""
+    try:
+        with np.load(path) as cached:
+            if cached['source_hash'].tobytes().hex() != source_hash:
+                return None
+            meta = json.loads(cached['meta'].tobytes().decode('utf-8'))
+            strings = StringTable.from_packed(cached['strings_blob'].tobytes(), cached['strings_offsets'])
+            arrays = {name: cached[name] for name in cached.files
+                      if name not in ('source_hash', 'meta', 'strings_blob', 'strings_offsets')}
+    except CACHE_ERRORS:
+        return None
+    return arrays, strings, meta
+
+
+def _load(path, parser, cls, cache):
+    source_hash = cache_hash(path)
+    if source_hash is None:
+        raise FileNotFoundError(path)
+    if cache:
+        loaded = load_cache(cache_path(path), source_hash)
+        if loaded is not None:
+            return cls(*loaded)
+    parsed = parser(path)
+    if cache:
+        # Read-only plugin folders just parse every time
+        save_cache(cache_path(path), source_hash, *parsed)
+    return cls(*parsed)
+
+
+def load_maps(path=os.path.join(TOPSKY_DIR, "TopSkyMaps.txt"), cache=True):
+    """TopSkyMaps from the cache when it matches the source hash, else parsed and cached"""
+    return _load(path, parse_maps, TopSkyMaps, cache)
+
+
+def load_areas(path=os.path.join(TOPSKY_DIR, "TopSkyAreas.txt"), cache=True):
+    """TopSkyAreas from the cache when it matches the source hash, else parsed and cached"""
+    return _load(path, parse_areas, TopSkyAreas, cache)
+
+
+def _measure(load):
+    """Time one load, then repeat it under tracemalloc (which slows it) for memory"""
+    started = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    result = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current, peak
+
+
+def benchmark(topsky_dir=TOPSKY_DIR):
+    """Report cold (text parse) against warm (cache) load time and memory"""
+    for filename, loader in (("TopSkyMaps.txt", load_maps), ("TopSkyAreas.txt", load_areas)):
+        path = os.path.join(topsky_dir, filename)
+        result, cold_time, cold_bytes, cold_peak = _measure(lambda: loader(path, cache=False))
+        # Writes the cache for the warm loads
+        loader(path)
+        _, warm_time, warm_bytes, warm_peak = _measure(lambda: loader(path))
+        print(f"📁 {filename}: {len(result)} entries, {len(result.coords)} points, "
+              f"cache {os.path.getsize(cache_path(path)) / 1024:.0f} KiB")
+        print(f"   Cold: {cold_time * 1000:8.1f} ms, {cold_bytes / 1024:6.0f} KiB held, {cold_peak / 1024:6.0f} KiB peak")
+        print(f"   Warm: {warm_time * 1000:8.1f} ms, {warm_bytes / 1024:6.0f} KiB held, {warm_peak / 1024:6.0f} KiB peak")
+        print(f"   Speed-up: {cold_time / warm_time:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else TOPSKY_DIR)
@@ -0,0 +1,319 @@
+"""
+Headless time-stepped traffic simulator over the .ese SIDs and STARs
+Departures are spawned at the threshold of an active departure runway (.rwy
+ACTIVE_RUNWAY flag 1) and fly one of its SIDs; arrivals join a STAR of an
+active arrival runway at its first fix and fly it down to the threshold.
+Every aircraft lives in a slot of flat NumPy state arrays and each tick
+advances all of them at once: speed and altitude move towards their targets
+within acceleration and vertical rate limits, and positions are interpolated
+along the packed procedure polylines.
+
+Position reports go to a binary log: an 8-byte magic, a length-prefixed
+JSON header and fixed 26-byte records (LOG_DTYPE), which reads back as a
+memory-mapped record array. Field elevations are not in the nav data, so
+altitudes are heights above the runway.
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from procedure_paths import SID, STAR, load_procedure_paths, parse_active_runways
+
+LOG_MAGIC = b'SIMLOG01'
+LOG_HEADER = struct.Struct('<8sI')
+LOG_DTYPE = np.dtype([('tick', '<u4'), ('callsign', '<u4'), ('route', '<u2'), ('lat', '<f4'), ('lon', '<f4'),
+                      ('altitude', '<f4'), ('speed', '<u2'), ('track', '<u2')])
+
+# Kinematics
+ACCELERATION_KT_S = 1.5
+CLIMB_RATE_FPM = 2000.0
+DESCENT_RATE_FPM = 2000.0
+# Three degree glide path
+GLIDE_FT_PER_NM = 318.0
+
+# Speed schedule (knots)
+TAKEOFF_SPEED = 150.0
+CLIMB_SPEED_LOW = 250.0
+CLIMB_SPEED_HIGH = 290.0
+SPEED_LIMIT_ALTITUDE = 10000.0
+ARRIVAL_SPEED = 250.0
+FINAL_SPEED = 160.0
+FINAL_DISTANCE_NM = 15.0
+
+# Cruise altitudes of departures and STAR entry altitudes of arrivals (feet)
+CRUISE_ALTITUDES = (15000.0, 37000.0)
+ENTRY_ALTITUDES = (9000.0, 24000.0)
+
+CALLSIGN_PREFIX = 'SIM'
+
+
+class TrafficSim:
+    """Fixed-capacity state arrays for every simulated aircraft"""
+
+    def __init__(self, paths, routes, capacity, dt=1.0, seed=0):
+        if not len(routes):
+            raise ValueError("No procedures to fly")
+        self.paths = paths
+        self.routes = np.asarray(routes, dtype=np.int64)
+        self.dt = dt
+        self.rng = np.random.default_rng(seed)
+        self.tick_count = 0
+        self.next_callsign = 0
+
+        self.active = np.zeros(capacity, dtype=bool)
+        self.callsign = np.zeros(capacity, dtype=np.int64)
+        self.route = np.zeros(capacity, dtype=np.int64)
+        self.along = np.zeros(capacity)
+        self.altitude = np.zeros(capacity)
+        self.target_altitude = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.lat = np.zeros(capacity)
+        self.lon = np.zeros(capacity)
+        self.track = np.zeros(capacity)
+
+    @property
+    def time(self):
+        return self.tick_count * self.dt
+
+    def __len__(self):
+        return int(np.count_nonzero(self.active))
+
+    def spawn(self, count, spread=False):
+        """
+        Start up to count aircraft in free slots on random procedures; with
+        spread they are placed anywhere along them, as if already flying
+        """
+        slots = np.flatnonzero(~self.active)[:count]
+        count = len(slots)
+        if not count:
+            return slots
+        rng = self.rng
+        route = self.routes[rng.integers(0, len(self.routes), count)]
+        lengths = self.paths.lengths[route]
+        along = rng.uniform(0, 1, count) * lengths if spread else np.zeros(count)
+        departing = self.paths.kinds[route] == SID
+
+        cruise = rng.uniform(*CRUISE_ALTITUDES, count)
+        entry = rng.uniform(*ENTRY_ALTITUDES, count)
+        # Spread departures are somewhere in their climb, arrivals on their descent profile
+        climbed = np.minimum(cruise, along / CLIMB_SPEED_LOW * 60 * CLIMB_RATE_FPM)
+        profile = np.minimum(entry, (lengths - along) * GLIDE_FT_PER_NM)
+        self.active[slots] = True
+        self.callsign[slots] = np.arange(self.next_callsign, self.next_callsign + count)
+        self.next_callsign += count
+        self.route[slots] = route
+        self.along[slots] = along
+        self.altitude[slots] = np.where(departing, climbed, profile)
+        self.target_altitude[slots] = np.where(departing, cruise, entry)
+        self.speed[slots] = np.where(departing, np.where(spread, CLIMB_SPEED_LOW, TAKEOFF_SPEED), ARRIVAL_SPEED)
+        self.lat[slots], self.lon[slots], self.track[slots] = self.paths.position(route, along)
+        return slots
+
+    def step(self):
+        """Advance every active aircraft by one tick; returns how many finished their procedure"""
+        dt = self.dt
+        slots = np.flatnonzero(self.active)
+        route = self.route[slots]
+        along = self.along[slots]
+        altitude = self.altitude[slots]
+        speed = self.speed[slots]
+        departing = self.paths.kinds[route] == SID
+        remaining = self.paths.lengths[route] - along
+
+        target_speed = np.where(departing,
+                                np.where(altitude < SPEED_LIMIT_ALTITUDE, CLIMB_SPEED_LOW, CLIMB_SPEED_HIGH),
+                                np.where(remaining > FINAL_DISTANCE_NM, ARRIVAL_SPEED, FINAL_SPEED))
+        change = ACCELERATION_KT_S * dt
+        speed = speed + np.clip(target_speed - speed, -change, change)
+
+        # Departures climb to cruise; arrivals never sit above the glide path
+        climbed = np.minimum(altitude + CLIMB_RATE_FPM * dt / 60, self.target_altitude[slots])
+        profile = np.minimum(self.target_altitude[slots], (remaining - speed * dt / 3600) * GLIDE_FT_PER_NM)
+        descended = np.minimum(altitude, np.maximum(np.maximum(profile, 0), altitude - DESCENT_RATE_FPM * dt / 60))
+        altitude = np.where(departing, climbed, descended)
+
+        along = along + speed * dt / 3600
+        finished = along >= self.paths.lengths[route]
+        self.along[slots] = along
+        self.altitude[slots] = altitude
+        self.speed[slots] = speed
+        self.lat[slots], self.lon[slots], self.track[slots] = self.paths.position(route, along)
+        self.active[slots[finished]] = False
+        self.tick_count += 1
+        return int(np.count_nonzero(finished))
+
+    def records(self):
+        """LOG_DTYPE position reports of the active aircraft at the current tick"""
+        slots = np.flatnonzero(self.active)
+        records = np.empty(len(slots), dtype=LOG_DTYPE)
+        records['tick'] = self.tick_count
+        records['callsign'] = self.callsign[slots]
+        records['route'] = self.route[slots]
+        records['lat'] = self.lat[slots]
+        records['lon'] = self.lon[slots]
+        records['altitude'] = self.altitude[slots]
+        records['speed'] = np.rint(self.speed[slots])
+        records['track'] = np.rint(self.track[slots] * 100) % 36000
+        return records
+
+    def run(self, ticks, log=None, keep=None):
+        """
+        Run ticks steps, writing every tick's reports to log (a SimLog) when
+        given; with keep, finished aircraft are replaced to hold that count
+        """
+        for _ in range(ticks):
+            self.step()
+            if keep is not None:
+                self.spawn(keep - len(self))
+            if log is not None:
+                log.write(self.records())
+
+
+class SimLog:
+    """Binary position report writer: magic, JSON header, then LOG_DTYPE records"""
+
+    def __init__(self, path, meta):
+        self.file = open(path, 'wb')
+        header = json.dumps(dict(meta, dtype=LOG_DTYPE.descr)).encode('utf-8')
+        self.file.write(LOG_HEADER.pack(LOG_MAGIC, len(header)))
+        self.file.write(header)
+        self.records = 0
+
+    def write(self, records):
+        self.file.write(records.tobytes())
+        self.records += len(records)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def read_sim_log(path):
+    """(header dict, memory-mapped LOG_DTYPE records) of a simulator log"""
+    with open(path, 'rb') as f:
+        magic, length = LOG_HEADER.unpack(f.read(LOG_HEADER.size))
+        if magic != LOG_MAGIC:
+            raise ValueError(f"{path} is not a simulator log")
+        meta = json.loads(f.read(length).decode('utf-8'))
+    offset = LOG_HEADER.size + length
+    count = (os.path.getsize(path) - offset) // LOG_DTYPE.itemsize
+    if not count:
+        return meta, np.zeros(0, dtype=LOG_DTYPE)
+    return meta, np.memmap(path, dtype=LOG_DTYPE, mode='r', offset=offset, shape=(count,))
+
+
+def log_replay(records, dt=1.0):
+    """Log records as (tracks, times, lats, lons, altitudes) sorted by callsign and time, as replays are"""
+    order = np.lexsort((records['tick'], records['callsign']))
+    records = records[order]
+    return (records['callsign'].astype(np.int32), records['tick'] * dt, records['lat'].astype(np.float64),
+            records['lon'].astype(np.float64), records['altitude'].astype(np.float64))
+
+
+def log_snapshots(records, dt=1.0):
+    """(time, stca snapshot) per tick of a log"""
+    from stca import make_snapshot
+    ticks = records['tick']
+    boundaries = np.flatnonzero(np.diff(ticks)) + 1
+    for block in np.split(np.arange(len(records)), boundaries):
+        if len(block):
+            tick = records[block]
+            yield float(tick['tick'][0]) * dt, make_snapshot(
+                tick['callsign'], tick['lat'], tick['lon'], tick['altitude'] / 100.0, tick['speed'],
+                tick['track'] / 100.0)
+
+
+def active_procedures(paths, active_runways):
+    """Procedures flown from the active runways: SIDs of departure runways and STARs of arrival runways"""
+    routes = []
+    for airport, runway, departures in active_runways:
+        routes.extend(paths.select(SID if departures else STAR, airport, runway))
+    return np.unique(np.asarray(routes, dtype=np.int64))
+
+
+def benchmark(paths, routes, sizes=(1000, 5000, 20000), ticks=300, log_path=None):
+    """Ticks per second with the traffic held at each size, with and without the binary log"""
+    print(f"🧪 {ticks} ticks at 1 Hz over {len(routes)} procedures")
+    print(f"{'Aircraft':>9}  {'Ticks/s':>9}  {'x real':>8}  {'Logged/s':>9}  {'Log MB':>7}")
+    for size in sizes:
+        sim = TrafficSim(paths, routes, size)
+        sim.spawn(size, spread=True)
+        started = time.perf_counter()
+        sim.run(ticks, keep=size)
+        rate = ticks / (time.perf_counter() - started)
+
+        logged = ''
+        megabytes = ''
+        if log_path:
+            sim = TrafficSim(paths, routes, size)
+            sim.spawn(size, spread=True)
+            started = time.perf_counter()
+            with SimLog(log_path, {'dt': sim.dt}) as log:
+                sim.run(ticks, log=log, keep=size)
+            logged = f"{ticks / (time.perf_counter() - started):,.0f}"
+            megabytes = f"{os.path.getsize(log_path) / 1e6:.1f}"
+        print(f"{size:>9}  {rate:>9,.0f}  {rate * sim.dt:>8,.0f}  {logged:>9}  {megabytes:>7}")
+
+
+def parse_option(args, name, default):
+    if name not in args:
+        return default
+    index = args.index(name)
+    return args[index + 1] if index + 1 < len(args) else default
+
+
+def main():
+    """
+    Usage: python traffic_sim.py [--aircraft N] [--ticks N] [--log sim.bin] [--all-runways]
+           python traffic_sim.py --benchmark [--log sim.bin]
+    """
+    args = sys.argv[1:]
+    ese_path = parse_option(args, "--ese", "FASA-Package_20251004101136-251001-0002.ese")
+    rwy_path = parse_option(args, "--rwy", os.path.splitext(ese_path)[0] + ".rwy")
+    paths = load_procedure_paths(ese_path)
+    if "--all-runways" in args:
+        routes = np.arange(len(paths))
+    else:
+        active = parse_active_runways(rwy_path)
+        routes = active_procedures(paths, active)
+        summary = ', '.join(f"{airport} {runway} {'DEP' if departures else 'ARR'}"
+                            for airport, runway, departures in active)
+        print(f"🛬 Active runways: {summary}")
+    print(f"🛫 {len(routes)} procedures in use")
+
+    log_path = parse_option(args, "--log", None)
+    if "--benchmark" in args:
+        benchmark(paths, routes, log_path=log_path)
+        return
+
+    aircraft = int(parse_option(args, "--aircraft", 5000))
+    ticks = int(parse_option(args, "--ticks", 3600))
+    sim = TrafficSim(paths, routes, aircraft)
+    sim.spawn(aircraft, spread=True)
+    started = time.perf_counter()
+    if log_path:
+        with SimLog(log_path, {'dt': sim.dt, 'callsign_prefix': CALLSIGN_PREFIX,
+                               'routes': [f"{paths.airports[r]} {paths.runways[r]} {paths.names[r]}"
+                                          for r in range(len(paths))]}) as log:
+            sim.run(ticks, log=log, keep=aircraft)
+        written = f", {log.records} reports ({os.path.getsize(log_path) / 1e6:.1f} MB) in {log_path}"
+    else:
+        sim.run(ticks, keep=aircraft)
+        written = ''
+    elapsed = time.perf_counter() - started
+    print(f"✅ {ticks} ticks of {aircraft} aircraft in {elapsed:.2f} s "
+          f"({ticks * sim.dt / elapsed:,.0f}x real time){written}; {sim.next_callsign} flights flown")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 EuroScope .SCT File Parser for FASA London Control Adaptation
-Parses VORs, NDBs, Fixes, and Airports from .sct files
+Parses VORs, NDBs, Fixes, and Airports from .sct files in a single
+streaming pass, with handlers for every other standard section
 """
 
 import re
@@ -9,6 +10,7 @@ import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import sys
+import time
 
 def convert_coordinates(coord_string):
     """
@@ -41,83 +43,211 @@ def convert_coordinates(coord_string):
     
     return None
 
-def parse_section(section_name, lines, data_type):
-    """Parse a specific section from the .sct file"""
-    results = []
-    current_section = False
-    
-    for line in lines:
+# Marker written after each navaid line in the parsed output
+NAVAID_MARKERS = {
+    'VOR': 'v',
+    'NDB': 'n',
+    'FIXES': 'f',
+    'AIRPORT': 'a'
+}
+
+# Sections whose lines are coordinate segments: (label, lat, lon, lat, lon)
+SEGMENT_SECTIONS = ('ARTCC', 'ARTCC HIGH', 'ARTCC LOW', 'SID', 'STAR',
+                    'HIGH AIRWAY', 'LOW AIRWAY', 'GEO')
+
+
+def iter_section_lines(file):
+    """
+    Stream (section, line) pairs from an open .sct file in a single pass.
+    Section names are upper-cased, blank lines and comments are dropped.
+    A (section, None) pair is yielded whenever a new section header starts.
+    """
+    section = None
+    for line in file:
         line = line.strip()
-        
-        # Check if we've entered our target section
-        if line.upper() == f"[{section_name.upper()}]":
-            current_section = True
-            continue
-        # Check if we've left our target section
-        elif line.startswith('[') and current_section:
-            break
+
         # Skip empty lines and comments
-        elif not line or line.startswith(';') or not current_section:
+        if not line or line.startswith(';'):
             continue
-        
-        # Parse the line based on data type
-        if data_type == "VOR":
-            # VOR format: ABV  112.100 S028.34.14.350 E016.32.01.798
-            parts = line.split()
-            if len(parts) >= 4:
-                ident = parts[0]
-                coords = ' '.join(parts[2:4])
-                formatted_coords = convert_coordinates(coords)
-                if formatted_coords:
-                    results.append(f"{ident}\t{formatted_coords} v - ")
-        
-        elif data_type == "NDB":
-            # NDB format: BI   233.000 S020.59.50.999 E031.33.54.000
-            parts = line.split()
-            if len(parts) >= 4:
-                ident = parts[0]
-                coords = ' '.join(parts[2:4])
-                formatted_coords = convert_coordinates(coords)
-                if formatted_coords:
-                    results.append(f"{ident}\t{formatted_coords} n - ")
-        
-        elif data_type == "FIXES":
-            # FIXES format: 031X  S026.14.14.859 E028.24.04.971
-            parts = line.split()
-            if len(parts) >= 3:
-                ident = parts[0]
-                coords = ' '.join(parts[1:3])
-                formatted_coords = convert_coordinates(coords)
-                if formatted_coords:
-                    results.append(f"{ident}\t{formatted_coords} f - ")
-        
-        elif data_type == "AIRPORT":
-            # AIRPORT format: FAAB 000.000 S028.34.23.941 E016.32.03.609 D
+
+        # Check for section headers
+        if line.startswith('[') and line.endswith(']'):
+            section = line[1:-1].strip().upper()
+            yield section, None
+            continue
+
+        yield section, line
+
+
+def navaid_handler(data_type, sink):
+    """
+    Handler for VOR, NDB, FIXES and AIRPORT lines.
+    VOR/NDB/AIRPORT: IDENT FREQ LAT LON [...]
+    FIXES:           IDENT LAT LON
+    Sends "IDENT\tDDMMSSH DDMMSSH x - " strings to the sink.
+    """
+    marker = NAVAID_MARKERS[data_type]
+    coord_index = 1 if data_type == "FIXES" else 2
+    while True:
+        line = yield
+        parts = line.split()
+        if len(parts) >= coord_index + 2:
+            coords = ' '.join(parts[coord_index:coord_index + 2])
+            formatted_coords = convert_coordinates(coords)
+            if formatted_coords:
+                sink(f"{parts[0]}\t{formatted_coords} {marker} - ")
+
+
+def runway_handler(sink):
+    """
+    Handler for [RUNWAY] lines.
+    Format: 05 23 053 233 S025.20.37.370 E027.09.54.860 S025.19.25.989 E027.10.54.029 FAPN
+    Sends (airport, rwy1, rwy2, hdg1, hdg2, lat1, lon1, lat2, lon2) tuples to the sink.
+    """
+    while True:
+        line = yield
+        parts = line.split()
+        if len(parts) >= 9:
+            sink((parts[8],) + tuple(parts[:8]))
+
+
+def segment_handler(sink):
+    """
+    Handler for ARTCC, SID, STAR, airway and GEO lines.
+    Format: [NAME] LAT LON LAT LON [COLOR]
+    The name may contain spaces and is omitted on continuation lines, so the
+    coordinates are located from the first token that looks like a latitude.
+    Sends (name, lat1, lon1, lat2, lon2, color) tuples to the sink.
+    """
+    name = ''
+    while True:
+        line = yield
+        parts = line.split()
+        start = None
+        for i, part in enumerate(parts):
+            if part[0] in 'NS' and part[1:2].isdigit():
+                start = i
+                break
+        if start is None:
+            # SID/STAR/airway lines may use fix names instead of coordinates
+            start = len(parts) - 4
+        if start < 0 or len(parts) < start + 4:
+            continue
+        if start > 0:
+            name = ' '.join(parts[:start])
+        color = ' '.join(parts[start + 4:])
+        sink((name,) + tuple(parts[start:start + 4]) + (color,))
+
+
+def region_handler(sink):
+    """
+    Handler for [REGIONS] lines.
+    Format: REGIONNAME name / COLOR LAT LON / LAT LON ...
+    Sends (name, color, [(lat, lon), ...]) tuples to the sink as each region completes.
+    """
+    region = None
+    try:
+        while True:
+            line = yield
             parts = line.split()
-            if len(parts) >= 4:
-                ident = parts[0]
-                # Skip frequency (parts[1]) and use coordinates (parts[2:4])
-                coords = ' '.join(parts[2:4])
-                formatted_coords = convert_coordinates(coords)
-                if formatted_coords:
-                    results.append(f"{ident}\t{formatted_coords} a - ")
-    
-    return results
+            if parts[0].upper() == 'REGIONNAME':
+                if region and region[2]:
+                    sink(region)
+                region = (' '.join(parts[1:]), '', [])
+            elif region is None:
+                continue
+            elif len(parts) >= 3:
+                if region[2]:
+                    sink(region)
+                region = (region[0], parts[0], [(parts[1], parts[2])])
+            elif len(parts) == 2:
+                region[2].append((parts[0], parts[1]))
+    finally:
+        if region and region[2]:
+            sink(region)
+
+
+def stream_sct_file(file, sinks):
+    """
+    Read an open .sct file once and feed every line to its section handler.
+    sinks maps section names to callables receiving the parsed records; sections
+    without a sink are still counted but not parsed.
+    Returns per-section statistics: {section: {'lines', 'records', 'seconds'}}.
+    """
+    handlers = {}
+    section_stats = {}
+
+    def counting(section, sink):
+        def emit(record):
+            section_stats[section]['records'] += 1
+            sink(record)
+        return emit
+
+    for section, sink in sinks.items():
+        emit = counting(section, sink)
+        if section in NAVAID_MARKERS:
+            handler = navaid_handler(section, emit)
+        elif section == 'RUNWAY':
+            handler = runway_handler(emit)
+        elif section == 'REGIONS':
+            handler = region_handler(emit)
+        else:
+            handler = segment_handler(emit)
+        next(handler)
+        handlers[section] = handler
+
+    current = None
+    handler = None
+    started = time.perf_counter()
+    for section, line in iter_section_lines(file):
+        if line is None:
+            now = time.perf_counter()
+            if current is not None:
+                section_stats[current]['seconds'] += now - started
+            started = now
+            current = section
+            section_stats.setdefault(section, {'lines': 0, 'records': 0, 'seconds': 0.0})
+            handler = handlers.get(section)
+            continue
+        if current is None:
+            continue
+        section_stats[current]['lines'] += 1
+        if handler is not None:
+            handler.send(line)
+
+    if current is not None:
+        section_stats[current]['seconds'] += time.perf_counter() - started
+    for handler in handlers.values():
+        handler.close()
+
+    return section_stats
+
 
 def parse_sct_file(filename):
     """Parse entire .sct file and extract all navigation data"""
+    vors = []
+    ndbs = []
+    fixes = []
+    airports = []
+
+    # Navaids are kept for the output file, every other section is only counted
+    sinks = {
+        'VOR': vors.append,
+        'NDB': ndbs.append,
+        'FIXES': fixes.append,
+        'AIRPORT': airports.append,
+        'RUNWAY': lambda record: None,
+        'REGIONS': lambda record: None
+    }
+    for section in SEGMENT_SECTIONS:
+        sinks[section] = lambda record: None
+
     try:
         with open(filename, 'r', encoding='utf-8', errors='ignore') as file:
-            lines = file.readlines()
+            section_stats = stream_sct_file(file, sinks)
     except Exception as e:
         return None, f"Error reading file: {str(e)}"
     
-    # Parse each section
-    vors = parse_section("VOR", lines, "VOR")
-    ndbs = parse_section("NDB", lines, "NDB")
-    fixes = parse_section("FIXES", lines, "FIXES")
-    airports = parse_section("AIRPORT", lines, "AIRPORT")
-    
     # Combine all data
     all_data = []
     all_data.append("; London Control Adaptation - Parsed Navigation Data")
@@ -148,11 +278,18 @@ def parse_sct_file(filename):
         'ndbs': len(ndbs),
         'fixes': len(fixes),
         'airports': len(airports),
-        'total': len(vors) + len(ndbs) + len(fixes) + len(airports)
+        'total': len(vors) + len(ndbs) + len(fixes) + len(airports),
+        'sections': section_stats
     }
     
     return all_data, stats
 
+def print_section_report(stats):
+    """Print per-section line counts and timings"""
+    print(f"{'Section':<14}{'Lines':>10}{'Records':>10}{'Time (ms)':>12}")
+    for section, info in stats['sections'].items():
+        print(f"{section:<14}{info['lines']:>10}{info['records']:>10}{info['seconds'] * 1000:>12.2f}")
+
 def save_output(data, output_filename):
     """Save parsed data to output file"""
     try:
@@ -207,6 +344,7 @@ def select_and_parse_file():
         messagebox.showinfo("Parsing Complete", result_message)
         print(f"\nParsing complete! Output saved to: {output_file}")
         print(f"Processed: {stats['vors']} VORs, {stats['ndbs']} NDBs, {stats['fixes']} fixes, {stats['airports']} airports")
+        print_section_report(stats)
     else:
         messagebox.showerror("Error", "Failed to save output file")
 
@@ -229,6 +367,7 @@ def main():
                     print(f"Statistics: {stats['vors']} VORs, {stats['ndbs']} NDBs, "
                           f"{stats['fixes']} fixes, {stats['airports']} airports "
                           f"({stats['total']} total)")
+                    print_section_report(stats)
                 else:
                     print("Error saving output file")
             else: